@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from datetime import datetime
-import httpx
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.wallet_read_service import WalletReadService
+from app.utils.authz import get_current_user
 
 
 from sqlalchemy import text
@@ -59,37 +64,15 @@ Só observa e responde melhor.
 
 
 
-async def fetch_backend_data(user_email: str, tipo: str):
-    base = "http://127.0.0.1:8000"
-
-    endpoints = {
-        "saldo": "/api/v1/pix/balance?days=7",
-        "entradas_mes": "/api/v1/pix/balance?days=7",
-        "saidas_mes": "/api/v1/pix/balance?days=7",
-        "historico": "/api/v1/pix/history",
-        "saude_financeira": "/api/v1/pix/balance?days=7",
-    }
-
-    url = base + endpoints[tipo]
-
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url, headers={"X-User-Email": user_email})
-        r.raise_for_status()
-        return r.json()
-
-    endpoints = {
-        "saldo": "/api/v1/pix/balance",
-        "entradas_mes": "/api/v1/pix/balance",
-        "saidas_mes": "/api/v1/pix/balance",
-        "historico": "/api/v1/pix/history",
-    }
-
-    url = base + endpoints[tipo]
+def fetch_backend_data(service: WalletReadService, user_id: int, tipo: str) -> dict:
+    """
+    Lê saldo/histórico in-process pelo WalletReadService
+    (mesma sessão do request, sem chamada HTTP de volta para a API).
+    """
+    if tipo == "historico":
+        return {"historico": service.get_history(user_id)}
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url, headers={"X-User-Email": user_email})
-        r.raise_for_status()
-        return r.json()
+    return service.get_balance(user_id)
 
 
 
@@ -213,8 +196,17 @@ def format_response(intent: str, data: dict, msg: str) -> str:
         f"{interpretacao}{corpo}\n{resumo}"
     )
 
+def _authorized_backend_data(request: Request, db: Session, tipo: str) -> dict:
+    user = get_current_user(request, db)
+    return fetch_backend_data(WalletReadService(db), int(user.id), tipo)
+
+
 @router.post("/chat_lab")
-async def chat_lab(payload: ChatPayload, x_user_email: str = Header(None)):
+async def chat_lab(
+    payload: ChatPayload,
+    request: Request,
+    db: Session = Depends(get_db),
+):
     """
     Endpoint LAB da IA 3.0 Premium.
     Não altera nada no painel oficial, só lê dados reais e responde melhor.
@@ -232,11 +224,9 @@ async def chat_lab(payload: ChatPayload, x_user_email: str = Header(None)):
         )
         return {"reply": reply, "intent": intent}
 
-    if not x_user_email:
-        raise HTTPException(status_code=400, detail="X-User-Email header is required")
-
-    # Busca dados reais no backend PIX (saldo, entradas, saídas, histórico)
-    data = await fetch_backend_data(x_user_email, intent)
+    # JWT (401 se ausente/inválido) + dados reais do PIX numa ida só ao
+    # threadpool: decode e queries são síncronos e não podem travar o loop
+    data = await run_in_threadpool(_authorized_backend_data, request, db, intent)
 
     # Monta resposta Premium organizada
     reply = format_response(intent, data, msg)
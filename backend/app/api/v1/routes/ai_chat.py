@@ -1,10 +1,14 @@
 import textwrap
-from fastapi import APIRouter, Header, Request
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from typing import Optional
-import asyncio
 import json
-from urllib import request, error as urlerror  # noqa: F401
+
+from app.database import get_db
+from app.services.wallet_read_service import WalletReadService
+from app.utils.authz import get_current_user
 
 
 from sqlalchemy import text
@@ -90,92 +94,49 @@ def _fmt_brl(v: Optional[float]) -> str:
 
 
 
-def _email_from_auth_header(auth_header):
+def _chat_user_id(request: Request, db: Session) -> Optional[int]:
     """
-    Extrai 'sub' (email/username) do JWT para usar como X-User-Email quando o client não envia.
-    Não derruba a IA se falhar.
+    Usuário autenticado do chat (JWT validado), resolvido uma vez por request.
+    Em caso de erro, retorna None sem derrubar a IA.
     """
-    if not auth_header:
-        return None
-    ah = str(auth_header).strip()
-    if not ah:
-        return None
-    token = ah.split(None, 1)[1].strip() if ah.lower().startswith("bearer ") else ah
+    cached = getattr(request.state, "wallet_user_id", None)
+    if cached is not None:
+        return cached
 
     try:
-        import os
-        import jwt
-
-        secret = os.getenv("JWT_SECRET") or os.getenv("SECRET_KEY") or "dev-secret"
-        alg = os.getenv("JWT_ALG") or os.getenv("JWT_ALGORITHM") or os.getenv("ALGORITHM") or "HS256"
-
-        payload = jwt.decode(token, secret, algorithms=[alg])
-        sub = payload.get("sub")
-        return str(sub) if sub else None
+        user = get_current_user(request, db)
     except Exception:
         return None
 
+    request.state.wallet_user_id = int(user.id)
+    return request.state.wallet_user_id
 
 
-async def _fetch_internal_json(
-    path: str,
-    x_user_email: Optional[str],
-    auth_header: Optional[str] = None,
-) -> Optional[dict]:
-    """
-    Faz uma chamada interna para a própria API (localhost:8000),
-    reaproveitando toda a lógica já existente de PIX.
-    Em caso de erro, retorna None sem derrubar a IA.
-    """
-    url = f"http://127.0.0.1:8000{path}"
-
-    # Headers mínimos e consistentes p/ chamadas internas
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-
-    if x_user_email:
-        headers["X-User-Email"] = x_user_email
-
-    # Encaminha Authorization do request original (aceita token cru ou 'Bearer <token>')
-    if auth_header:
-        ah = auth_header.strip()
-        if not ah.lower().startswith("bearer "):
-            ah = "Bearer " + ah
-        headers["Authorization"] = ah
-
-    req = request.Request(url, headers=headers, method="GET")
+def _read_wallet(request: Request, db: Session, what: str):
+    user_id = _chat_user_id(request, db)
+    if user_id is None:
+        return None
 
-    loop = asyncio.get_running_loop()
+    try:
+        service = WalletReadService(db)
+        if what == "history":
+            return service.get_history(user_id)
+        return service.get_balance(user_id)
+    except Exception:
+        return None
 
-    def _do_request() -> Optional[dict]:
-        try:
-            with request.urlopen(req, timeout=2.5) as resp:
-                raw = resp.read().decode("utf-8")
-            return json.loads(raw)
-        except Exception:
-            return None
 
-    return await loop.run_in_executor(None, _do_request)
+async def _get_pix_balance(request: Request, db: Session) -> Optional[dict]:
+    # mesma sessão do request; threadpool só para não bloquear o loop
+    return await run_in_threadpool(_read_wallet, request, db, "balance")
 
 
-async def _get_pix_balance(
-    x_user_email: Optional[str],
-    authorization: Optional[str],
-) -> Optional[dict]:
-    if not x_user_email and authorization:
-        x_user_email = _email_from_auth_header(authorization)
-    return await _fetch_internal_json("/api/v1/pix/balance", x_user_email, authorization)
+def _get_pix_month_summary(request: Request, db: Session) -> dict:
+    return _ia3_get_pix_month_summary(db, _chat_user_id(request, db))
 
 
-async def _get_pix_history(
-    x_user_email: Optional[str],
-    authorization: Optional[str],
-) -> Optional[list]:
-    if not x_user_email and authorization:
-        x_user_email = _email_from_auth_header(authorization)
-    data = await _fetch_internal_json("/api/v1/pix/history", x_user_email, authorization)
+async def _get_pix_history(request: Request, db: Session) -> Optional[list]:
+    data = await run_in_threadpool(_read_wallet, request, db, "history")
 
     # casos: lista direta
     if isinstance(data, list):
@@ -320,14 +281,12 @@ def _build_gasto_mais_reply(history: list) -> str:
 async def ai_chat(
     payload: ChatRequest,
     request: Request,
-    x_user_email: Optional[str] = Header(default=None, alias="X-User-Email"),
+    db: Session = Depends(get_db),
 ):
     """
     IA 3.0 da Aurea Gold — versão Premium com explicação organizada
     e, sempre que possível, usando dados reais de PIX do próprio painel.
     """
-    auth = request.headers.get('authorization') or request.headers.get('Authorization')
-
     raw_msg = payload.message.strip()
     norm_msg = _normalize(raw_msg)
     # atalhos diretos para perguntas de entradas/saídas do mês no PIX
@@ -340,7 +299,7 @@ async def ai_chat(
             "entradas no pix esse mês",
         ]
     ):
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         if balance:
             reply = _build_entradas_reply(balance)
         else:
@@ -359,7 +318,7 @@ async def ai_chat(
             "gastos do mês no pix",
         ]
     ):
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         if balance:
             reply = _build_saidas_reply(balance)
         else:
@@ -384,27 +343,21 @@ async def ai_chat(
             "como foi meu mes no pix",
         ]
     ):
-        if not x_user_email:
+        # JWT validado no threadpool (decode + query não travam o loop)
+        if await run_in_threadpool(_chat_user_id, request, db) is None:
             return {
                 "reply": (
                     "✨ IA 3.0 Premium – Resumo do mês no PIX\n\n"
 
-                    "Para montar o resumo do mês, preciso que o app envie o header "
-                    "X-User-Email com o seu e-mail Aurea Gold."
+                    "Para montar o resumo do mês, preciso que você esteja logado "
+                    "na sua conta Aurea Gold."
                 )
             }
 
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         _reply = _ia3_build_consulting_reply(balance)
         return {"reply": _reply}
 
-    user_hint = (
-        f"\n\nAtendo você usando o cadastro: {x_user_email}."
-        if x_user_email
-        else ""
-    )
-
     intro = (
         "Olá! Eu sou a IA 3.0 da Aurea Gold.\n\n"
         "Estou aqui para te ajudar com saldos, PIX, movimentações e dúvidas do dia a dia, "
@@ -434,7 +387,7 @@ async def ai_chat(
                 "entradas no pix esse mês",
             ]
         ):
-            resumo = _ia3_get_pix_month_summary(x_user_email)
+            resumo = await run_in_threadpool(_get_pix_month_summary, request, db)
             if resumo:
                 reply = _ia3_build_entradas_mes_reply(resumo)
             else:
@@ -453,7 +406,7 @@ async def ai_chat(
                 "gastos do mês no pix",
             ]
         ):
-            resumo = _ia3_get_pix_month_summary(x_user_email)
+            resumo = await run_in_threadpool(_get_pix_month_summary, request, db)
             if resumo:
                 reply = _ia3_build_saidas_mes_reply(resumo)
             else:
@@ -472,7 +425,7 @@ async def ai_chat(
 
     if any(p in norm_msg for p in ["saldo", "quanto tenho", "quanto eu tenho"]):
         tema_label = "saldo"
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         if balance:
             tema_reply = _build_saldo_reply(balance)
         else:
@@ -486,7 +439,7 @@ async def ai_chat(
 
     elif any(p in norm_msg for p in ["entrada", "entradas", "receb", "ganho", "ganhos"]):
         tema_label = "entradas"
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         if balance:
             tema_reply = _build_entradas_reply(balance)
         else:
@@ -499,7 +452,7 @@ async def ai_chat(
 
     elif any(p in norm_msg for p in ["saida", "saidas", "gasto", "gastos", "paguei", "pagamento"]):
         tema_label = "saídas"
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         if balance:
             tema_reply = _build_saidas_reply(balance)
         else:
@@ -512,11 +465,11 @@ async def ai_chat(
 
     elif any(p in norm_msg for p in ["onde gasto mais", "onde eu gasto mais", "onde gasto", "gasto mais", "meus gastos", "maiores gastos"]):
         tema_label = "onde_gasto_mais"
-        history = await _get_pix_history(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        history = await _get_pix_history(request, db)
         tema_reply = _build_gasto_mais_reply(history or [])
     elif any(p in norm_msg for p in ["historico", "historico pix", "ultimas movimentacoes", "movimentacao"]):
         tema_label = "histórico de PIX"
-        history = await _get_pix_history(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        history = await _get_pix_history(request, db)
         tema_reply = _build_history_reply(history or [])
 
     # IA 3.0 – Modo consultor financeiro focado em PIX (usa resumo do mês)
@@ -545,7 +498,7 @@ async def ai_chat(
         ]
     ):
         tema_label = "modo consultor financeiro"
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         tema_reply = _ia3_build_consulting_reply(balance)
         intro = ""
 
@@ -588,7 +541,7 @@ async def ai_chat(
         ]
     ):
         tema_label = "modo consultor financeiro"
-        balance = await _get_pix_balance(x_user_email, request.headers.get('authorization') or request.headers.get('Authorization'))
+        balance = await _get_pix_balance(request, db)
         tema_reply = _ia3_build_consulting_reply(balance)
 
     else:
@@ -603,7 +556,7 @@ async def ai_chat(
     # Montagem final da resposta
     if tema_label == "modo consultor financeiro":
         # No modo consultor, o helper já monta todo o texto (intro, pergunta, resumo, etc.)
-        final_reply = f"{tema_reply}{user_hint}"
+        final_reply = tema_reply
     else:
         resumo_final = f"\n\nResumo rápido: estou te ajudando agora com {tema_label}."
         final_reply = (
@@ -611,7 +564,6 @@ async def ai_chat(
             f"Você perguntou: \"{raw_msg}\".\n\n"
             f"{tema_reply}"
             f"{resumo_final}"
-            f"{user_hint}"
         )
 
     return ChatResponse(reply=final_reply)
@@ -627,50 +579,15 @@ o "resumo do mês".
 """
 
 
-def _ia3_get_month_range_now():
-    """
-    Retorna (início_do_mês, início_próximo_mês) em UTC
-    para filtrar transações do mês atual.
+def _ia3_get_pix_month_summary(db, user_id: Optional[int]) -> dict:
     """
-    from datetime import datetime
-
-    hoje = datetime.utcnow()
-    inicio_mes = hoje.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    if hoje.month == 12:
-        inicio_prox = hoje.replace(
-            year=hoje.year + 1,
-            month=1,
-            day=1,
-            hour=0,
-            minute=0,
-            second=0,
-            microsecond=0,
-        )
-    else:
-        inicio_prox = hoje.replace(
-            month=hoje.month + 1,
-            day=1,
-            hour=0,
-            minute=0,
-            second=0,
-            microsecond=0,
-        )
-
-    return inicio_mes, inicio_prox
-
-
-def _ia3_get_pix_month_summary(user_email: str) -> dict:
-    """
-    Versão definitiva e robusta do resumo do mês.
+    Resumo do mês a partir de pix_daily_rollup (no máximo 31 linhas),
+    usando a sessão do próprio request.
 
     Nunca deve derrubar a API:
-    - Se não conseguir importar SessionLocal ou PixTransaction → retorna tudo 0.
+    - Usuário não autenticado → retorna tudo 0.
     - Se a query der erro → retorna tudo 0.
     """
-    from sqlalchemy.orm import Session
-    from sqlalchemy import func
-
     zeros = {
         "entradas_mes": 0.0,
         "saidas_mes": 0.0,
@@ -678,71 +595,25 @@ def _ia3_get_pix_month_summary(user_email: str) -> dict:
         "qtd_transacoes": 0,
     }
 
-    # Tenta importar SessionLocal em caminhos diferentes
-    try:
-        try:
-            from app.db.session import SessionLocal  # se existir app/db/session.py
-        except Exception:
-            from app.database.session import SessionLocal  # fallback comum
-    except Exception as e:
-        print("IA3 resumo_mes: não consegui importar SessionLocal:", e)
+    if user_id is None:
         return zeros
 
-    # Tenta importar PixTransaction em caminhos diferentes
-    try:
-        try:
-            from app.models.pix_transaction import PixTransaction
-        except Exception:
-            from app.models.pix import PixTransaction
-    except Exception as e:
-        print("IA3 resumo_mes: não consegui importar PixTransaction:", e)
-        return zeros
+    from app.services.pix_rollup_service import month_totals
 
-    inicio_mes, inicio_prox = _ia3_get_month_range_now()
-    db: Session = SessionLocal()
     try:
-        base_query = (
-            db.query(
-                PixTransaction.kind,
-                func.sum(PixTransaction.amount).label("total"),
-                func.count().label("qtd"),
-            )
-            .filter(
-                PixTransaction.user_email == user_email,
-                PixTransaction.created_at >= inicio_mes,
-                PixTransaction.created_at < inicio_prox,
-            )
-            .group_by(PixTransaction.kind)
-        )
-
-        entradas = 0.0
-        saidas = 0.0
-        total_qtd = 0
-
-        for row in base_query:
-            kind = (row.kind or "").lower()
-            valor = float(row.total or 0)
-            qtd = int(row.qtd or 0)
-            total_qtd += qtd
-
-            if kind == "entrada":
-                entradas += valor
-            elif kind == "saida":
-                saidas += valor
-
-        net = entradas - saidas
+        totais = month_totals(db, int(user_id))
+        entradas = float(totais["entradas"])
+        saidas = float(totais["saidas"])
 
         return {
-            "entradas_mes": float(entradas),
-            "saidas_mes": float(saidas),
-            "net_mes": float(net),
-            "qtd_transacoes": int(total_qtd),
+            "entradas_mes": entradas,
+            "saidas_mes": saidas,
+            "net_mes": entradas - saidas,
+            "qtd_transacoes": int(totais["count"]),
         }
     except Exception as e:
-        print("IA3 resumo_mes: erro ao consultar transações:", e)
+        print("IA3 resumo_mes: erro ao consultar rollup do mês:", e)
         return zeros
-    finally:
-        db.close()
 
 
 
@@ -1,17 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from datetime import datetime, timezone
 
 from app.database import get_db
 from app.models.user_main import User
-from app.models.refresh_token import RefreshToken
+from app.services.password_hash_executor import (
+    PasswordHashPoolSaturated,
+    password_hash_executor,
+)
+from app.services.refresh_token_service import issue_refresh_token, rotate_refresh_token
 from app.utils.security import (
-    verify_password,
     create_access_token,
-    generate_refresh_token,
-    hash_refresh_token,
-    refresh_token_expiry_dt,
     SECRET_KEY,
     ALGORITHM,
 )
@@ -88,23 +87,28 @@ def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)
     pwd_hash = getattr(user, "hashed_password", None)
     _dbg('[AUTH LOGIN] user.id=', getattr(user,'id',None), 'username=', getattr(user,'username',None), 'email=', getattr(user,'email',None))
 
-    if (not pwd_hash) or (not verify_password(payload.password, pwd_hash)):
+    if not pwd_hash:
+        _rl_fail()
+
+    # bcrypt no pool dedicado; saturado = recusa rápida, sem consumir tentativa
+    try:
+        password_ok = password_hash_executor.verify(payload.password, pwd_hash)
+    except PasswordHashPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Autenticação ocupada. Tente novamente em instantes.',
+            headers={'Retry-After': '1'},
+        )
+
+    if not password_ok:
         _rl_fail()
 
     # sub do token: prioriza username, senão email
     sub = (getattr(user, "username", None) or getattr(user, "email", None) or ident)
     access_token = create_access_token({"sub": sub})
 
-    raw_refresh = generate_refresh_token()
-    hashed = hash_refresh_token(raw_refresh)
-
-    token_row = RefreshToken(
-        user_id=user.id,
-        token_hash=hashed,
-        expires_at=refresh_token_expiry_dt(),
-        created_at=datetime.now(timezone.utc),
-    )
-    db.add(token_row)
+    # revoga as sessões mais antigas além do limite por usuário
+    raw_refresh = issue_refresh_token(db, user_id=user.id)
     db.commit()
 
     return TokenResponse(
@@ -190,55 +194,26 @@ def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
         new_refresh = create_refresh_token(sub)
         return {"access_token": new_access, "refresh_token": new_refresh, "token_type": "bearer"}
 
-    # Caso OPACO (sem pontos) — DB guarda token_hash (sha256 do token puro)
-    from datetime import datetime, timezone, timedelta
-    import secrets, hashlib
-
-    try:
-        from app.models.refresh_token import RefreshToken
-    except Exception:
-        raise HTTPException(status_code=500, detail="Modelo RefreshToken não encontrado")
-
-    if not hasattr(RefreshToken, "token_hash"):
-        raise HTTPException(status_code=500, detail="RefreshToken sem coluna token_hash")
-
-    rt_hash = hashlib.sha256(rt.encode("utf-8")).hexdigest()
-
-    obj = db.query(RefreshToken).filter(RefreshToken.token_hash == rt_hash).first()
-    if not obj:
-        # fallback ultra-legacy (se algum dia foi salvo “sem hash”)
-        obj = db.query(RefreshToken).filter(RefreshToken.token_hash == rt).first()
-
-    if not obj:
+    # Caso OPACO (sem pontos) — DB guarda token_hash (sha256 do token puro).
+    # Uma sonda no índice único de token_hash, que já revoga o token usado.
+    rotated = rotate_refresh_token(db, rt)
+    if rotated is None:
         raise HTTPException(status_code=401, detail="Refresh token inválido/expirado")
 
-    now = datetime.now(timezone.utc)
-
-    exp = getattr(obj, "expires_at", None)
-    if exp:
-        try:
-            if getattr(exp, "tzinfo", None) is None:
-                exp = exp.replace(tzinfo=timezone.utc)
-            if now >= exp:
-                raise HTTPException(status_code=401, detail="Refresh token inválido/expirado")
-        except HTTPException:
-            raise
-        except Exception:
-            pass
+    uid, new_rt = rotated
 
     # resolve sub via user_id -> User
     sub = None
-    uid = getattr(obj, "user_id", None)
-    if uid is not None:
-        try:
-            from app.models.user_main import User
-            u = db.query(User).get(uid)
-            if u:
-                sub = getattr(u, "username", None) or getattr(u, "email", None)
-        except Exception:
-            sub = None
+    try:
+        from app.models.user_main import User
+        u = db.get(User, uid)
+        if u:
+            sub = getattr(u, "username", None) or getattr(u, "email", None)
+    except Exception:
+        sub = None
 
     if not sub:
+        db.rollback()
         raise HTTPException(status_code=401, detail="Refresh token inválido/expirado")
 
     try:
@@ -246,15 +221,6 @@ def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
     except Exception:
         new_access = create_access_token(sub=sub)  # type: ignore
 
-    # rotaciona: novo token puro -> salva hash
-    new_rt = secrets.token_hex(32)
-    obj.token_hash = hashlib.sha256(new_rt.encode("utf-8")).hexdigest()
-
-    if hasattr(obj, "expires_at"):
-        obj.expires_at = now + timedelta(days=30)
-
-    db.add(obj)
     db.commit()
 
     return {"access_token": new_access, "refresh_token": new_rt, "token_type": "bearer"}
-
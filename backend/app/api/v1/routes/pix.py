@@ -3,17 +3,18 @@ logger = logging.getLogger("aurea.pix")
 from app.core.rate_limit import limiter
 from datetime import datetime
 import calendar
-from decimal import Decimal
 from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from app.core.json_codec import FastJSONResponse
 from fastapi import Request, APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.pix_transaction import PixTransaction
 from app.models import User
+from app.services.wallet_read_service import WalletReadService
 from app.utils.authz import require_customer
 from app.utils.authz import require_customer
+from app.utils.pagination import apply_keyset, keyset_page, parse_cursor_param
 
 
 
@@ -58,32 +59,7 @@ def get_balance(
     current_user = Depends(require_customer),
 ):
     try:
-        from app.models.pix_ledger import PixLedger
-        from sqlalchemy import func, case
-        from decimal import Decimal
-
-        result = (
-            db.query(
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (PixLedger.kind == "credit", PixLedger.amount),
-                            else_=-PixLedger.amount,
-                        )
-                    ),
-                    0,
-                )
-            )
-            .filter(PixLedger.user_id == current_user.id)
-            .scalar()
-        )
-
-        saldo = float(Decimal(result or 0))
-
-        return {
-            "saldo": saldo,
-            "source": "real"
-        }
+        return WalletReadService(db).get_balance(current_user.id)
 
     except Exception as e:
         print("[AUREA PIX] erro ao calcular saldo:", e)
@@ -96,42 +72,27 @@ def get_balance(
 
 @router.get("/history")
 def get_history(
+    limit: int = 50,
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_customer),
     db: Session = Depends(get_db),
 ):
-    """Retorna as últimas transações PIX do usuário autenticado."""
+    """
+    Retorna as transações PIX do usuário autenticado, mais recentes primeiro.
+    Próxima página: repetir com ?cursor=<X-Next-Cursor>.
+    """
+    after = parse_cursor_param(cursor)
 
     try:
         user_id = getattr(current_user, "id", 1)
 
-        txs = (
-            db.query(PixTransaction)
-            .filter(PixTransaction.user_id == user_id)
-            .order_by(PixTransaction.id.desc())
-            .limit(50)
-            .all()
+        result, next_cursor = WalletReadService(db).get_history_page(
+            user_id,
+            limit=limit,
+            cursor=after,
         )
 
-        result = [
-            {
-                "id": t.id,
-                "tipo": t.tipo,
-                "valor": float(getattr(t, "valor", 0) or 0),
-                "descricao": getattr(t, "descricao", None) or "",
-                "taxa_percentual": float(getattr(t, "taxa_percentual", 0) or 0),
-                "taxa_valor": float(getattr(t, "taxa_valor", 0) or 0),
-                "valor_liquido": float(
-                    getattr(t, "valor_liquido", getattr(t, "valor", 0)) or 0
-                ),
-                "criado_em": getattr(t, "created_at", None),
-            }
-            for t in txs
-        ]
-
-
-        return JSONResponse(
-            content=jsonable_encoder(result, custom_encoder={Decimal: float})
-        )
+        return _paged_json(result, next_cursor)
     except Exception as e:
         print("[AUREA PIX] erro ao carregar histórico:", e)
         return JSONResponse(content=[], status_code=200)
@@ -139,20 +100,23 @@ def get_history(
 @router.get("/list")
 def get_list(
     limit: int = 50,
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_customer),
     db: Session = Depends(get_db),
 ):
-    """Lista curta de movimentações PIX para home/painéis rápidos."""
+    """Lista curta de movimentações PIX para home/painéis rápidos (keyset via X-Next-Cursor)."""
+    after = parse_cursor_param(cursor)
+
     try:
         safe_limit = max(1, min(int(limit or 50), 100))
 
+        query = db.query(PixTransaction).filter(PixTransaction.user_id == current_user.id)
         txs = (
-            db.query(PixTransaction)
-            .filter(PixTransaction.user_id == current_user.id)
-            .order_by(PixTransaction.id.desc())
-            .limit(safe_limit)
+            apply_keyset(query, PixTransaction.criado_em, PixTransaction.id, after)
+            .limit(safe_limit + 1)
             .all()
         )
+        txs, next_cursor = keyset_page(txs, safe_limit, created_attr="criado_em")
 
         result = [
             {
@@ -165,18 +129,24 @@ def get_list(
                 "valor_liquido": float(
                     getattr(t, "valor_liquido", getattr(t, "valor", 0)) or 0
                 ),
-                "created_at": getattr(t, "created_at", None),
+                "created_at": getattr(t, "criado_em", None),
             }
             for t in txs
         ]
 
-        return JSONResponse(
-            content=jsonable_encoder(result, custom_encoder={Decimal: float})
-        )
+        return _paged_json(result, next_cursor)
     except Exception as e:
         print("[AUREA PIX] erro ao carregar lista PIX:", e)
         return JSONResponse(content=[], status_code=200)
 
+def _paged_json(result: list, next_cursor: Optional[str]) -> FastJSONResponse:
+    # corpo continua sendo lista (compat front); cursor vai no header
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(
+        content=result,
+        headers=headers,
+    )
+
 @router.get("/forecast")
 def get_forecast(
     db: Session = Depends(get_db),
@@ -198,22 +168,15 @@ def get_forecast(
     }
     """
     try:
-        rows = (
-            db.query(PixTransaction)
-            .filter(PixTransaction.user_id == current_user.id)
-            .all()
-        )
+        from app.services.pix_rollup_service import month_totals
+        from app.services.wallet_balance_service import get_available_balance
 
-        entradas = 0.0
-        saidas = 0.0
-        for t in rows:
-            valor = float(t.valor)
-            if t.tipo == "entrada":
-                entradas += valor
-            else:
-                saidas += valor
+        # até 31 linhas de pix_daily_rollup + 1 linha de wallet_balances
+        totais_mes = month_totals(db, current_user.id)
+        entradas = float(totais_mes["entradas"])
+        saidas = float(totais_mes["saidas"])
 
-        saldo_atual = entradas - saidas
+        saldo_atual = float(get_available_balance(db, current_user.id))
 
         # Dados de calendário (mês atual, UTC)
         agora = datetime.utcnow()
@@ -297,8 +260,8 @@ def get_forecast(
             "recomendacoes": recomendacoes,
         }
 
-        return JSONResponse(
-            content=jsonable_encoder(payload, custom_encoder={Decimal: float})
+        return FastJSONResponse(
+            content=payload
         )
     except Exception as e:
         logger.exception("pix_forecast_failed")
@@ -318,8 +281,8 @@ def get_forecast(
             ],
         "debug_error": str(e),
         }
-        return JSONResponse(
-            content=jsonable_encoder(payload, custom_encoder={Decimal: float}),
+        return FastJSONResponse(
+            content=payload,
             status_code=200,
         )
 
@@ -327,6 +290,8 @@ from fastapi import Request, HTTPException
 from time import perf_counter
 from app.schemas.pix_send import PixSendRequest, PixSendResponse
 from app.services.pix_service import send_pix
+from app.services.pix_send_mailbox import PixSendQueueBusy
+from app.services.wallet_balance_service import WalletBalanceConflict
 from app.core.rate_limit import Limiter
 from app.core.observability import PIX_SEND_TOTAL, PIX_SEND_DURATION_SECONDS
 
@@ -358,15 +323,15 @@ def post_pix_send(
             # conflito / em processamento
             if code in ("IDEMPOTENCY_KEY_REUSE_DIFFERENT_PAYLOAD", "IDEMPOTENCY_IN_PROGRESS"):
                 outcome = "error"
-                return JSONResponse(
-                    content=jsonable_encoder(result, custom_encoder={Decimal: float}),
+                return FastJSONResponse(
+                    content=result,
                     status_code=409,
                 )
 
             # replay concluído (não aplicar response_model aqui)
             outcome = "replay"
-            return JSONResponse(
-                content=jsonable_encoder(result, custom_encoder={Decimal: float}),
+            return FastJSONResponse(
+                content=result,
                 status_code=200,
                 headers={"X-Idempotency-Replayed": "true"},
             )
@@ -381,6 +346,23 @@ def post_pix_send(
             status="success",
         )
 
+    except PixSendQueueBusy:
+        # envios do mesmo usuário enfileirados além do limite
+        outcome = "queue_busy"
+        raise HTTPException(
+            status_code=429,
+            detail="Muitos envios PIX em andamento. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+    except WalletBalanceConflict:
+        # modo otimista: saldo mudou em todas as tentativas; nada foi gravado
+        db.rollback()
+        outcome = "conflict"
+        raise HTTPException(
+            status_code=409,
+            detail="Saldo alterado por outra operação. Tente novamente.",
+            headers={"Retry-After": "1"},
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -391,5 +373,98 @@ def post_pix_send(
         try:
             PIX_SEND_TOTAL.labels(outcome=outcome).inc()
             PIX_SEND_DURATION_SECONDS.labels(outcome=outcome).observe(dur)
+            # já contado aqui: o middleware não conta este 429 como rate_limited
+            request.state.pix_send_counted = True
+        except Exception:
+            pass
+
+
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
+
+from app.services.pix_batch_service import (
+    PixBatchItem,
+    PixBatchValidationError,
+    send_pix_batch,
+)
+
+
+class PixSendBatchItemIn(BaseModel):
+    chave_pix: str = Field(..., min_length=3, max_length=255)
+    valor: Decimal = Field(..., gt=0)
+    descricao: str | None = Field(default="PIX")
+    idempotency_key: str | None = Field(default=None, min_length=1, max_length=128)
+
+
+class PixSendBatchIn(BaseModel):
+    items: list[PixSendBatchItemIn] = Field(..., min_length=1)
+    # None = PIX_SEND_BATCH_DEFAULT_MODE
+    mode: Literal["atomic", "partial"] | None = None
+
+
+@router.post("/send/batch")
+@limiter.limit("10/minute")
+def post_pix_send_batch(
+    request: Request,
+    body: PixSendBatchIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_customer),
+):
+    """
+    Vários envios PIX numa transação: um lock de saldo, INSERTs em lote e
+    um commit. Idempotência por item (item.idempotency_key ou, sem ela,
+    "<Idempotency-Key do header>:<índice>").
+    """
+    start = perf_counter()
+    outcome = "error"
+    batch_key = request.headers.get("Idempotency-Key")
+    try:
+        result = send_pix_batch(
+            db,
+            user_id=current_user.id,
+            items=[
+                PixBatchItem(
+                    valor=item.valor,
+                    chave_pix=item.chave_pix,
+                    descricao=item.descricao or "PIX",
+                    idempotency_key=item.idempotency_key
+                    or (f"{batch_key}:{index}" if batch_key else None),
+                )
+                for index, item in enumerate(body.items)
+            ],
+            mode=body.mode,
+        )
+
+        outcome = "success" if result["status"] != "rejected" else "error"
+        return FastJSONResponse(
+            content=result,
+            status_code=200 if result["status"] != "rejected" else 400,
+        )
+
+    except PixSendQueueBusy:
+        outcome = "queue_busy"
+        raise HTTPException(
+            status_code=429,
+            detail="Muitos envios PIX em andamento. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+    except PixBatchValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IntegrityError:
+        # key do lote gravada por outra requisição entre a consulta e o commit
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Idempotency-Key do lote em uso por outra requisição")
+    except Exception:
+        logger.exception("pix_send_batch_failed")
+        raise HTTPException(status_code=500, detail="Erro interno ao enviar lote PIX")
+    finally:
+        dur = perf_counter() - start
+        try:
+            PIX_SEND_TOTAL.labels(outcome=f"batch_{outcome}").inc()
+            PIX_SEND_DURATION_SECONDS.labels(outcome=f"batch_{outcome}").observe(dur)
+            request.state.pix_send_counted = True
         except Exception:
             pass
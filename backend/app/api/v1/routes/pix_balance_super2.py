@@ -15,6 +15,8 @@ from pydantic import BaseModel, Field
 from app.database import get_db
 from app.models.pix_transaction import PixTransaction
 from app.models import User
+from app.services.pix_rollup_service import last_days_series, month_totals
+from app.services.wallet_balance_service import get_available_balance
 from app.utils.authz import get_current_user
 from app.api.v1.schemas.errors import ErrorResponse, OPENAPI_422
 
@@ -193,6 +195,24 @@ def _balance_from_ledger(db: Session, tbl: str, user_id: int) -> tuple[float, fl
     return entradas, saidas, list(day_map.values()), total
 
 
+def _balance_from_rollup(db: Session, user_id: int) -> tuple[float, float, float, List[Dict[str, Any]], int]:
+    # saldo de wallet_balances + mês/7d de pix_daily_rollup (<= 31 linhas)
+    totais_mes = month_totals(db, user_id)
+    saldo = _sf(float(get_available_balance(db, user_id)))
+    ult7 = [
+      {k: (_sf(v) if k != "dia" else v) for k, v in ponto.items()}
+      for ponto in last_days_series(db, user_id, days=7)
+    ]
+
+    return (
+      saldo,
+      _sf(float(totais_mes["entradas"])),
+      _sf(float(totais_mes["saidas"])),
+      ult7,
+      int(totais_mes["count"]),
+    )
+
+
 def _ultimos_7d(db: Session, user_id: int) -> List[Dict[str, Any]]:
     hoje = date.today()
     day_map: Dict[str, Dict[str, Any]] = {}
@@ -254,8 +274,11 @@ def get_pix_balance(
     ledger_tbl = _pick_table(db, ("pix_ledger", "pix_ledger_main"))
 
     debug_tx_total = None
+    saldo = None
     try:
-        if ledger_tbl:
+        if ledger_tbl == "pix_ledger":
+            saldo, entradas, saidas, ult7, debug_tx_total = _balance_from_rollup(db, user_id)
+        elif ledger_tbl:
             entradas, saidas, ult7, debug_tx_total = _balance_from_ledger(db, ledger_tbl, user_id)
         else:
             entradas = (
@@ -281,7 +304,8 @@ def get_pix_balance(
                 db.query(func.count(PixTransaction.id)).filter(PixTransaction.user_id == user_id).scalar() or 0
             )
 
-        saldo = _sf(float(entradas)) - _sf(float(saidas))
+        if saldo is None:
+            saldo = _sf(float(entradas)) - _sf(float(saidas))
         source = "real"
     except Exception as e:
         print("[AUREA PIX] balance error:", type(e).__name__, e)
@@ -322,19 +346,12 @@ def get_pix_forecast(
     """
     user_id = int(current_user.id)
 
-    rows = db.query(PixTransaction).filter(PixTransaction.user_id == user_id).all()
-
-    entradas = 0.0
-    saidas = 0.0
-    for t in rows:
-      valor = _sf(getattr(t, "valor", 0.0) or 0.0)
-      tipo = str(getattr(t, "tipo", "") or "").lower()
-      if tipo in ("recebimento", "entrada"):
-          entradas += valor
-      elif tipo in ("envio", "saida"):
-          saidas += valor
+    # mês corrente via pix_daily_rollup (<= 31 linhas) + saldo materializado
+    totais_mes = month_totals(db, user_id)
+    entradas = _sf(float(totais_mes["entradas"]))
+    saidas = _sf(float(totais_mes["saidas"]))
 
-    saldo_atual = _sf(entradas - saidas)
+    saldo_atual = _sf(float(get_available_balance(db, user_id)))
 
     agora = datetime.now(timezone.utc)
     dia_atual = max(agora.day, 1)
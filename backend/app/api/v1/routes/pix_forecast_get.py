@@ -1,10 +1,8 @@
 from datetime import datetime
 import calendar
-from decimal import Decimal
 
 from fastapi import APIRouter, Depends, Header
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from app.core.json_codec import FastJSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -141,8 +139,8 @@ def get_pix_forecast(
             "debug_error": debug_error,
         }
 
-        return JSONResponse(
-            content=jsonable_encoder(payload, custom_encoder={Decimal: float})
+        return FastJSONResponse(
+            content=payload
         )
 
     except Exception as e:
@@ -163,7 +161,7 @@ def get_pix_forecast(
             ],
             "debug_error": debug_error,
         }
-        return JSONResponse(
-            content=jsonable_encoder(payload, custom_encoder={Decimal: float}),
+        return FastJSONResponse(
+            content=payload,
             status_code=200,
         )
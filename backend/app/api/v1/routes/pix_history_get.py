@@ -7,11 +7,11 @@ from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, Depends, Query, Request, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.database import get_db
 from app.models.pix_transaction import PixTransaction
 from app.utils.authz import require_customer
+from app.utils.pagination import apply_keyset, keyset_page, parse_cursor_param
 from app.api.v1.schemas.errors import ErrorResponse, OPENAPI_422
 
 router = APIRouter(prefix="/api/v1/pix", tags=["pix"])
@@ -47,7 +47,7 @@ def _to_dt(v) -> Optional[datetime]:
 
 def _pick_date_value(tx: PixTransaction):
     """Tenta achar um campo de data no tx sem quebrar."""
-    for name in ("created_at", "created", "timestamp", "data", "dia", "date"):
+    for name in ("criado_em", "created_at", "created", "timestamp", "data", "dia", "date"):
         if hasattr(tx, name):
             val = getattr(tx, name, None)
             if val is not None:
@@ -87,6 +87,7 @@ class PixHistoryResponse(BaseModel):
     items: List[PixHistoryItem] = []
     updated_at: str = Field(..., description="ISO8601 UTC")
     source: str = Field(default="real")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor opaco da próxima página")
 
 
 @router.get(
@@ -102,7 +103,8 @@ class PixHistoryResponse(BaseModel):
 def get_pix_history(
     request: Request,
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
     db: Session = Depends(get_db),
     current_user=Depends(require_customer),
 ):
@@ -113,23 +115,14 @@ def get_pix_history(
 
         q = db.query(PixTransaction).filter(PixTransaction.user_id == int(user_id))
 
-        # ordenação: tenta usar uma coluna “date-like” se existir
-        # (se não existir, ordena por id desc)
-        cols = set(PixTransaction.__table__.columns.keys())
-        if "created_at" in cols:
-            q = q.order_by(getattr(PixTransaction, "created_at").desc())
-        elif "timestamp" in cols:
-            q = q.order_by(getattr(PixTransaction, "timestamp").desc())
-        elif "created" in cols:
-            q = q.order_by(getattr(PixTransaction, "created").desc())
-        elif "data" in cols:
-            q = q.order_by(getattr(PixTransaction, "data").desc())
-        elif "dia" in cols:
-            q = q.order_by(getattr(PixTransaction, "dia").desc())
-        else:
-            q = q.order_by(PixTransaction.id.desc())
-
-        transactions = q.offset(offset).limit(limit).all()
+        # keyset por (criado_em, id); offset fica só por compat sem cursor
+        after = parse_cursor_param(cursor)
+        q = apply_keyset(q, PixTransaction.criado_em, PixTransaction.id, after)
+        if after is None and offset:
+            q = q.offset(offset)
+
+        rows = q.limit(limit + 1).all()
+        transactions, next_cursor = keyset_page(rows, limit, created_attr="criado_em")
 
         # agregação por dia
         dias_map: Dict[str, Dict[str, float]] = {}
@@ -194,6 +187,7 @@ def get_pix_history(
             "items": history_items or [],
             "updated_at": updated,
             "source": "real",
+            "next_cursor": next_cursor,
         }
 
     except HTTPException:
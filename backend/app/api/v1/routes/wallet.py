@@ -1,19 +1,33 @@
 from fastapi import APIRouter, Body, Depends, Header, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, exists, or_, text
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import Iterable, Iterator
+import asyncio
 import hashlib
 import hmac
 import json
 from pydantic import BaseModel
 
+from app.core import json_codec
 from app.database import get_db
 from app.utils.authz import require_customer
+from app.utils.pagination import apply_keyset, keyset_page, parse_cursor_param
 from app.models.transaction import Transaction
 from app.models.idempotency import IdempotencyKey
 from app.models.user_main import User
-from app.config import WALLET_MODE, IS_PARTNER_WALLET
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.models.wallet_webhook_inbox import WalletWebhookInbox
+from app.config import (
+    WALLET_MODE,
+    IS_PARTNER_WALLET,
+    ASAAS_WEBHOOK_INGEST_MODE,
+    WALLET_STATEMENT_SOURCE_TIMEOUT_SEC,
+)
 from app.partner import (
     PartnerWebhookEvent,
     StatementItem,
@@ -24,6 +38,16 @@ from app.partner.asaas_client import AsaasSandboxClient
 from app.partner.asaas_payment_correlation import (
     resolve_asaas_payment_user_correlation_from_payment,
 )
+from app.services.idempotency_inflight import (
+    idempotency_inflight,
+    wait_for_idempotency_completion,
+)
+from app.services.idempotency_replay_cache import cached_replay, remember_replay
+from app.services.statement_merge_service import (
+    decode_statement_cursor,
+    merge_statement_sources,
+    sorted_statement_source,
+)
 from app.services.asaas_correlated_pix_payment_service import (
     AsaasCorrelatedPixPaymentConflictError,
     AsaasCorrelatedPixPaymentStorageError,
@@ -32,7 +56,7 @@ from app.services.asaas_correlated_pix_payment_service import (
 from app.services.wallet_partner_service import (
     create_wallet_pix_payment as create_partner_pix_payment,
     get_wallet_balance as get_partner_wallet_balance,
-    get_wallet_statement as get_partner_wallet_statement,
+    aget_wallet_statement as aget_partner_wallet_statement,
     handle_wallet_webhook as handle_partner_wallet_webhook,
 )
 
@@ -256,199 +280,310 @@ def _asaas_sandbox_statement_reference(
     return f"asaas-sandbox-payment-{digest[:24]}"
 
 
-def _sandbox_statement_items_from_webhooks(
+_WEBHOOK_STATEMENT_EVENT_TYPES = {
+    "sandbox": "pix.payment.confirmed",
+    "asaas": "PAYMENT_RECEIVED",
+}
+
+_WEBHOOK_STATEMENT_DESCRIPTIONS = {
+    "sandbox": "PIX sandbox confirmado",
+    "asaas": "PIX Asaas Sandbox recebido",
+}
+
+_WEBHOOK_STATEMENT_SOURCES = {
+    "sandbox": "wallet_sandbox_webhook",
+    "asaas": "asaas_sandbox_payment_received",
+}
+
+
+def _record_wallet_webhook_event(
     db: Session,
     *,
-    user_id: int,
-    limit: int,
-) -> list[StatementItem]:
-    safe_limit = max(1, min(int(limit or 50), 100))
-    rows = (
-        db.query(IdempotencyKey)
-        .filter(IdempotencyKey.key.like("wallet-sandbox-webhook:%"))
-        .order_by(IdempotencyKey.created_at.desc())
-        .limit(min(safe_limit * 4, 400))
-        .all()
+    idempotency_key: str,
+    provider: str,
+    event_type: str,
+    status: str,
+    received_at: datetime,
+    user_id: int | None = None,
+    provider_reference: str | None = None,
+    amount: Decimal | None = None,
+) -> None:
+    """
+    Projeta o webhook em wallet_webhook_events na transação corrente.
+
+    Quem chama faz o commit junto com o registro de idempotência,
+    então evento e idempotência nunca divergem.
+    """
+    db.add(
+        WalletWebhookEvent(
+            idempotency_key=idempotency_key,
+            user_id=user_id,
+            provider=provider,
+            provider_reference=provider_reference,
+            event_type=event_type,
+            status=status,
+            amount=amount,
+            received_at=received_at,
+        )
     )
 
-    items: list[StatementItem] = []
-    seen_references: set[str] = set()
 
-    for row in rows:
-        raw_response = getattr(row, "response_json", None)
-        if not raw_response:
-            continue
+def _webhook_event_received_at(row) -> str | None:
+    received_at = getattr(row, "received_at", None)
+    if received_at is None:
+        return None
 
-        try:
-            response = json.loads(raw_response)
-        except (TypeError, ValueError):
-            continue
+    if isinstance(received_at, str):
+        return received_at
 
-        if response.get("user_id") != user_id:
-            continue
+    # SQLite devolve datetime naive; gravamos sempre em UTC.
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
 
-        event = response.get("event") or {}
-        event_type = str(event.get("event_type") or "").strip()
-        status = str(event.get("status") or "").strip().lower()
+    return received_at.isoformat()
 
-        if event_type != "pix.payment.confirmed" or status != "confirmed":
-            continue
 
-        provider_reference = _safe_receipt_part(
-            event.get("provider_reference")
-        )
-        if (
-            provider_reference == "not-provided"
-            or provider_reference in seen_references
-        ):
-            continue
+def _webhook_statement_event_filter(event):
+    """Evento de webhook que entra no extrato: par provider/event_type, confirmado, com valor."""
+    return and_(
+        event.status == "confirmed",
+        or_(
+            *(
+                and_(event.provider == provider, event.event_type == event_type)
+                for provider, event_type in _WEBHOOK_STATEMENT_EVENT_TYPES.items()
+            )
+        ),
+        event.amount > 0,
+    )
 
-        try:
-            amount = Decimal(str(event.get("amount") or "0.00"))
-        except Exception:
-            continue
 
-        if amount <= Decimal("0.00"):
-            continue
+def _iter_webhook_statement_items(
+    db: Session,
+    *,
+    user_id: int,
+    page_size: int,
+    before: datetime | None = None,
+) -> Iterator[StatementItem]:
+    """
+    Itens de extrato vindos de webhooks sandbox/Asaas do usuário, em ordem
+    (received_at desc, provider_reference desc), buscados sob demanda.
+
+    Consulta indexada em wallet_webhook_events (user_id, status,
+    received_at) com LIMIT no banco; o próximo lote (dobrando de tamanho)
+    só é lido se o consumidor pedir mais itens.
+
+    Cada provider_reference aparece uma vez, pelo evento mais recente: a
+    deduplicação fica na própria consulta (NOT EXISTS de evento mais novo
+    com a mesma referência), então vale entre páginas do cursor também.
+    """
+    page_size = max(1, min(int(page_size or 50), 100))
+    seen_references: set[str] = set()
+    last_row = None
+    newer = aliased(WalletWebhookEvent)
+
+    while True:
+        query = (
+            db.query(WalletWebhookEvent)
+            .filter_by(user_id=user_id, status="confirmed")
+            .filter(
+                _webhook_statement_event_filter(WalletWebhookEvent),
+                ~exists().where(
+                    newer.user_id == WalletWebhookEvent.user_id,
+                    newer.provider_reference == WalletWebhookEvent.provider_reference,
+                    _webhook_statement_event_filter(newer),
+                    or_(
+                        newer.received_at > WalletWebhookEvent.received_at,
+                        and_(
+                            newer.received_at == WalletWebhookEvent.received_at,
+                            newer.id > WalletWebhookEvent.id,
+                        ),
+                    ),
+                ),
+            )
+        )
+        if last_row is not None:
+            query = query.filter(
+                or_(
+                    WalletWebhookEvent.received_at < last_row.received_at,
+                    and_(
+                        WalletWebhookEvent.received_at == last_row.received_at,
+                        or_(
+                            WalletWebhookEvent.provider_reference < last_row.provider_reference,
+                            and_(
+                                WalletWebhookEvent.provider_reference == last_row.provider_reference,
+                                WalletWebhookEvent.id < last_row.id,
+                            ),
+                        ),
+                    ),
+                )
+            )
+        elif before is not None:
+            query = query.filter(WalletWebhookEvent.received_at <= before)
+
+        rows = (
+            query.order_by(
+                WalletWebhookEvent.received_at.desc(),
+                WalletWebhookEvent.provider_reference.desc(),
+                WalletWebhookEvent.id.desc(),
+            )
+            .limit(page_size)
+            .all()
+        )
+
+        for row in rows:
+            provider = getattr(row, "provider", None)
+            if (
+                _WEBHOOK_STATEMENT_EVENT_TYPES.get(provider)
+                != getattr(row, "event_type", None)
+            ):
+                continue
+
+            # a consulta já deduplica; o set só protege fontes que ignoram filtros
+            provider_reference = getattr(row, "provider_reference", None)
+            if (
+                not provider_reference
+                or provider_reference in seen_references
+            ):
+                continue
+
+            amount = _asaas_sandbox_positive_amount(
+                getattr(row, "amount", None)
+            )
+            if amount is None:
+                continue
 
-        seen_references.add(provider_reference)
-        items.append(
-            StatementItem(
+            seen_references.add(provider_reference)
+            yield StatementItem(
                 provider_reference=provider_reference,
                 amount=amount,
                 direction="credit",
                 status="confirmed",
-                description="PIX sandbox confirmado",
-                created_at=event.get("received_at"),
+                description=_WEBHOOK_STATEMENT_DESCRIPTIONS[provider],
+                created_at=_webhook_event_received_at(row),
                 raw={
                     "sandbox": True,
                     "real_money": False,
-                    "source": "wallet_sandbox_webhook",
+                    "source": _WEBHOOK_STATEMENT_SOURCES[provider],
                 },
             )
-        )
 
-        if len(items) >= safe_limit:
-            break
-
-    return items
+        # keyset que não avança (ex: fonte que ignora o filtro) encerra aqui
+        if len(rows) < page_size or rows[-1] is last_row:
+            return
 
+        last_row = rows[-1]
+        page_size = min(page_size * 2, 100)
 
 
-def _asaas_sandbox_statement_items_from_webhooks(
+def _webhook_statement_items(
     db: Session,
     *,
     user_id: int,
     limit: int,
 ) -> list[StatementItem]:
+    """Até limit itens de extrato vindos de webhooks do usuário."""
     safe_limit = max(1, min(int(limit or 50), 100))
-    rows = (
-        db.query(IdempotencyKey)
-        .filter(
-            IdempotencyKey.key.like(
-                "asaas-sandbox-webhook:%"
-            )
+    return list(
+        islice(
+            _iter_webhook_statement_items(db, user_id=user_id, page_size=safe_limit),
+            safe_limit,
         )
-        .order_by(IdempotencyKey.created_at.desc())
-        .limit(min(safe_limit * 4, 400))
-        .all()
     )
 
-    items: list[StatementItem] = []
-    seen_references: set[str] = set()
 
-    for row in rows:
-        row_key = str(getattr(row, "key", "") or "")
-        if not row_key.startswith("asaas-sandbox-webhook:"):
-            continue
+def _set_local_statement_timeout(db: Session, timeout: float) -> None:
+    """Postgres: corta consultas lentas da fonte local no próprio banco."""
+    try:
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+    except Exception:
+        is_postgres = False
 
-        raw_response = getattr(row, "response_json", None)
-        if not raw_response:
-            continue
+    if is_postgres:
+        db.execute(text(f"SET LOCAL statement_timeout = '{max(1, int(timeout * 1000))}ms'"))
 
-        try:
-            response = json.loads(raw_response)
-        except (TypeError, ValueError, json.JSONDecodeError):
-            continue
 
-        event = response.get("event") or {}
-        audit = response.get("audit") or {}
-        correlation_storage = (
-            audit.get("correlation_storage") or {}
-        )
+def _prefetch_statement_items(
+    db: Session,
+    items: Iterator[StatementItem],
+    count: int,
+    timeout: float,
+) -> list[StatementItem]:
+    try:
+        _set_local_statement_timeout(db, timeout)
+        return list(islice(items, count))
+    except SQLAlchemyError:
+        db.rollback()
+        raise
 
-        if (
-            event.get("event_type") != "PAYMENT_RECEIVED"
-            or event.get("accepted") is not True
-        ):
-            continue
 
-        if (
-            correlation_storage.get("contract")
-            != "asaas_payment_received_user_correlation_v1"
-        ):
-            continue
+def _statement_source_error(exc: BaseException, timeout: float) -> str:
+    if isinstance(exc, asyncio.TimeoutError):
+        return f"timeout após {timeout:g}s"
+    return str(exc) or exc.__class__.__name__
 
-        if correlation_storage.get("user_id") != user_id:
-            continue
 
-        if (
-            correlation_storage.get("real_money_enabled")
-            is not False
-            or correlation_storage.get("can_credit_balance")
-            is not False
-        ):
-            continue
+async def _gather_statement_sources(
+    db: Session,
+    *,
+    user_id: int,
+    provider: str,
+    limit: int,
+    after=None,
+    timeout: float | None = None,
+) -> tuple[dict[str, Iterable[StatementItem]], dict[str, str]]:
+    """
+    Busca as fontes do extrato ao mesmo tempo: parceiro (async, com
+    timeout) e, no sandbox, o primeiro lote de webhooks numa thread.
 
-        amount = _asaas_sandbox_positive_amount(
-            correlation_storage.get("amount")
-        )
-        if amount is None:
-            continue
+    Devolve (fontes que responderam, erro por fonte que falhou). O DB não
+    é abandonado no meio da consulta (a sessão é do request): o timeout
+    dele é aplicado no próprio Postgres via statement_timeout.
+    """
+    timeout = WALLET_STATEMENT_SOURCE_TIMEOUT_SEC if timeout is None else timeout
+    pending = {
+        "partner": asyncio.wait_for(
+            aget_partner_wallet_statement(user_id=user_id, limit=limit),
+            timeout,
+        ),
+    }
 
-        provider_reference = (
-            _asaas_sandbox_statement_reference(
-                correlation_storage.get("correlation_key")
-            )
+    webhook_items = None
+    if provider == "sandbox":
+        webhook_items = _iter_webhook_statement_items(
+            db,
+            user_id=user_id,
+            page_size=limit + 1,
+            before=after[0] if after else None,
         )
-        if (
-            provider_reference is None
-            or provider_reference in seen_references
-        ):
-            continue
-
-        seen_references.add(provider_reference)
-        items.append(
-            StatementItem(
-                provider_reference=provider_reference,
-                amount=amount,
-                direction="credit",
-                status="confirmed",
-                description="PIX Asaas Sandbox recebido",
-                created_at=(
-                    event.get("received_at")
-                    or audit.get("received_at")
-                ),
-                raw={
-                    "sandbox": True,
-                    "real_money": False,
-                    "source": (
-                        "asaas_sandbox_payment_received"
-                    ),
-                },
-            )
+        pending["webhook"] = run_in_threadpool(
+            _prefetch_statement_items,
+            db,
+            webhook_items,
+            limit + 1,
+            timeout,
         )
 
-        if len(items) >= safe_limit:
-            break
+    results = await asyncio.gather(*pending.values(), return_exceptions=True)
 
-    return items
+    sources: dict[str, Iterable[StatementItem]] = {}
+    errors: dict[str, str] = {}
+    for name, result in zip(pending, results):
+        if isinstance(result, BaseException):
+            errors[name] = _statement_source_error(result, timeout)
+        elif name == "partner":
+            # adapter não pagina: lê até limit e ordena em memória
+            sources[name] = sorted_statement_source(name, result)
+        else:
+            # lote já lido + continuação preguiçosa do mesmo gerador
+            sources[name] = chain(result, webhook_items)
 
+    return sources, errors
 
 
 @router.get("/api/v1/wallet/structured-statement")
-def get_wallet_structured_statement(
+async def get_wallet_structured_statement(
     limit: int = 50,
+    cursor: str | None = None,
     current_user: User = Depends(require_customer),
     db: Session = Depends(get_db),
 ):
@@ -466,35 +601,46 @@ def get_wallet_structured_statement(
     - real_money_enabled
 
     Em modo demo, pode retornar lista vazia e nunca representa dinheiro real.
+
+    Fontes (parceiro + webhooks no sandbox) são buscadas em paralelo e
+    intercaladas por created_at desc; próxima página: repetir com
+    ?cursor=<statement.next_cursor>. Se só parte das fontes responder, o
+    extrato vem parcial (statement.partial) e adapter_error diz qual falhou.
     """
     safe_limit = max(1, min(int(limit or 50), 100))
 
+    try:
+        after = decode_statement_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Cursor de extrato inválido.") from None
+
+    next_cursor = None
+    partial = False
+
     try:
         adapter = get_partner_adapter()
         provider = adapter.provider_name
-        statement = list(
-            get_partner_wallet_statement(
-                user_id=current_user.id,
-                limit=safe_limit,
-            )
+        sources, source_errors = await _gather_statement_sources(
+            db,
+            user_id=current_user.id,
+            provider=provider,
+            limit=safe_limit,
+            after=after,
         )
-
-        if provider == "sandbox":
-            statement.extend(
-                _sandbox_statement_items_from_webhooks(
-                    db,
-                    user_id=current_user.id,
-                    limit=safe_limit,
-                )
-            )
-            statement.extend(
-                _asaas_sandbox_statement_items_from_webhooks(
-                    db,
-                    user_id=current_user.id,
-                    limit=safe_limit,
-                )
-            )
-            statement = statement[:safe_limit]
+        source_error = "; ".join(
+            f"{name}: {error}" for name, error in source_errors.items()
+        ) or None
+        if not sources:
+            raise RuntimeError(source_error)
+
+        # lotes seguintes de webhook (raros) também fora do event loop
+        statement, next_cursor = await run_in_threadpool(
+            merge_statement_sources,
+            sources,
+            limit=safe_limit,
+            after=after,
+        )
+        partial = bool(source_errors)
 
         mode = WALLET_MODE
         source = (
@@ -505,7 +651,7 @@ def get_wallet_structured_statement(
         real_money_enabled = bool(
             IS_PARTNER_WALLET and provider != "sandbox"
         )
-        adapter_error = None
+        adapter_error = source_error
     except Exception as exc:
         provider = "not_configured"
         statement = []
@@ -531,6 +677,8 @@ def get_wallet_structured_statement(
             "items": items,
             "count": len(items),
             "limit": safe_limit,
+            "next_cursor": next_cursor,
+            "partial": partial,
             "currency": "BRL",
         },
         "wallet": {
@@ -1182,13 +1330,7 @@ def _asaas_sandbox_payment_correlation(
 def _asaas_sandbox_webhook_public_response(
     stored_response: dict,
 ) -> dict:
-    public_response = json.loads(
-        json.dumps(
-            stored_response,
-            ensure_ascii=False,
-            default=str,
-        )
-    )
+    public_response = json_codec.normalize(stored_response)
 
     audit = public_response.get("audit")
     if isinstance(audit, dict):
@@ -1197,104 +1339,125 @@ def _asaas_sandbox_webhook_public_response(
     return public_response
 
 
-@router.post("/api/v1/partners")
-@router.post("/api/v1/partners/")
-@router.post("/api/v1/partners/asaas/webhooks/sandbox")
-def handle_asaas_sandbox_webhook_receiver(
-    payload: dict = Body(...),
-    db: Session = Depends(get_db),
-    asaas_access_token: str | None = Header(default=None, alias="asaas-access-token"),
-):
-    """
-    Recebe webhooks reais do Asaas Sandbox com token e idempotência.
+def _remember_idempotency_record(record) -> None:
+    """Depois do commit: guarda a resposta concluída no cache de replay."""
+    remember_replay(
+        record.key,
+        request_hash=record.request_hash,
+        response_json=record.response_json,
+        status_code=record.status_code,
+    )
 
-    Segurança:
-    - Valida header asaas-access-token.
-    - Usa ASAAS_WEBHOOK_TOKEN fora do Git.
-    - Exige identificador único do evento para idempotência.
-    - Não exige login do cliente.
-    - Não salva payload bruto.
-    - Não expõe token nem payment_id.
-    - Não credita saldo real.
-    - Não gera comprovante real.
-    - Não marca pagamento como real.
-    """
-    if not isinstance(payload, dict):
-        raise HTTPException(status_code=422, detail="Payload Asaas inválido.")
 
-    config = _asaas_sandbox_webhook_config()
-    _validate_asaas_sandbox_webhook_token(
-        asaas_access_token,
-        config.webhook_token,
-    )
-    provider = "asaas"
+def _sandbox_webhook_replay(stored, request_hash: str) -> dict:
+    """Replay de webhook sandbox concluído (linha da tabela ou cache)."""
+    if getattr(stored, "request_hash", None) and stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=409,
+            detail="Idempotency-Key reutilizada com payload diferente.",
+        )
 
-    event_id = _asaas_sandbox_webhook_event_id(payload)
-    event_type = _asaas_sandbox_webhook_event_type(payload)
-    request_hash = _asaas_sandbox_webhook_hash(payload)
-    idem_key = _asaas_sandbox_webhook_idempotency_key(event_id)
+    response = json_codec.loads(stored.response_json)
+    response["duplicated"] = True
+    response["idempotency"]["replayed"] = True
+    return response
 
-    try:
-        record = IdempotencyKey(key=idem_key, request_hash=request_hash)
-        db.add(record)
-        db.flush()
-    except IntegrityError:
-        db.rollback()
-        existing = db.query(IdempotencyKey).filter_by(key=idem_key).first()
-        if not existing:
-            raise
 
-        if getattr(existing, "request_hash", None) and existing.request_hash != request_hash:
-            raise HTTPException(
-                status_code=409,
-                detail="Evento Asaas reutilizado com payload diferente.",
-            )
+def _await_idempotency_record(
+    db: Session,
+    existing: IdempotencyKey,
+    request_hash: str,
+) -> IdempotencyKey:
+    """
+    Duplicado de key ainda em processamento espera a requisição original
+    terminar; devolve a linha concluída ou a original se o prazo acabou.
+    """
+    if existing.response_json:
+        _remember_idempotency_record(existing)
+        return existing
 
-        if existing.response_json:
-            stored_response = json.loads(existing.response_json)
-            response = _asaas_sandbox_webhook_public_response(
-                stored_response
-            )
-            response["duplicated"] = True
-            response.setdefault("idempotency", {})["replayed"] = True
-            response["idempotency"]["state"] = "replayed"
-            response["idempotency"]["replay_audit_status"] = (
-                "asaas_sandbox_webhook_idempotent_replay"
-            )
+    if getattr(existing, "request_hash", None) and existing.request_hash != request_hash:
+        return existing
 
-            audit = response.setdefault("audit", {})
-            audit["replay"] = {
-                "replay_status": "asaas_sandbox_webhook_idempotent_replay",
-                "safe_replay": True,
-                "duplicated": True,
-                "idempotency_replayed": True,
-                "raw_payload_stored": False,
-                "raw_event_id_stored": False,
-                "raw_payment_id_stored": False,
-                "can_credit_balance": False,
-                "can_generate_real_receipt": False,
-                "can_mark_real_paid": False,
-                "notice": (
-                    "Evento Asaas Sandbox repetido reconhecido por idempotência. "
-                    "Nenhum saldo real, comprovante real ou pagamento real foi gerado."
-                ),
-            }
+    completed = wait_for_idempotency_completion(db, existing.key)
+    if completed is None:
+        return existing
+
+    _remember_idempotency_record(completed)
+    return completed
 
-            response["can_credit_balance"] = False
-            response["can_generate_real_receipt"] = False
-            response["can_mark_real_paid"] = False
-            return response
 
+def _asaas_sandbox_webhook_replay(
+    existing: IdempotencyKey,
+    request_hash: str,
+) -> dict:
+    """Resposta para evento Asaas já registrado (replay, conflito ou em andamento)."""
+    if getattr(existing, "request_hash", None) and existing.request_hash != request_hash:
         raise HTTPException(
-            status_code=503,
-            detail=(
-                "Evento Asaas Sandbox aguardando conclusão "
-                "do processamento anterior."
-            ),
-            headers={"Retry-After": "30"},
+            status_code=409,
+            detail="Evento Asaas reutilizado com payload diferente.",
+        )
+
+    if existing.response_json:
+        stored_response = json_codec.loads(existing.response_json)
+        response = _asaas_sandbox_webhook_public_response(
+            stored_response
         )
+        response["duplicated"] = True
+        response.setdefault("idempotency", {})["replayed"] = True
+        response["idempotency"]["state"] = "replayed"
+        response["idempotency"]["replay_audit_status"] = (
+            "asaas_sandbox_webhook_idempotent_replay"
+        )
+
+        audit = response.setdefault("audit", {})
+        audit["replay"] = {
+            "replay_status": "asaas_sandbox_webhook_idempotent_replay",
+            "safe_replay": True,
+            "duplicated": True,
+            "idempotency_replayed": True,
+            "raw_payload_stored": False,
+            "raw_event_id_stored": False,
+            "raw_payment_id_stored": False,
+            "can_credit_balance": False,
+            "can_generate_real_receipt": False,
+            "can_mark_real_paid": False,
+            "notice": (
+                "Evento Asaas Sandbox repetido reconhecido por idempotência. "
+                "Nenhum saldo real, comprovante real ou pagamento real foi gerado."
+            ),
+        }
+
+        response["can_credit_balance"] = False
+        response["can_generate_real_receipt"] = False
+        response["can_mark_real_paid"] = False
+        return response
 
+    raise HTTPException(
+        status_code=503,
+        detail=(
+            "Evento Asaas Sandbox aguardando conclusão "
+            "do processamento anterior."
+        ),
+        headers={"Retry-After": "30"},
+    )
 
+
+def _build_asaas_sandbox_webhook_records(
+    db: Session,
+    *,
+    record: IdempotencyKey,
+    payload: dict,
+    event_type: str,
+    idem_key: str,
+    request_hash: str,
+    provider: str,
+    now: datetime,
+) -> dict:
+    """
+    Monta auditoria/correlação do evento Asaas e preenche o registro de
+    idempotência e wallet_webhook_events. Não faz commit (sync ou worker).
+    """
     accepted = event_type in _ASAAS_SANDBOX_WEBHOOK_ACCEPTED_EVENTS
     payment_payload = (
         payload.get("payment")
@@ -1311,7 +1474,6 @@ def handle_asaas_sandbox_webhook_receiver(
     payment_amount = _asaas_sandbox_positive_amount(
         payment_payload.get("value")
     )
-    now = datetime.now(timezone.utc)
 
     audit_record = {
         "provider": "asaas",
@@ -1402,13 +1564,7 @@ def handle_asaas_sandbox_webhook_receiver(
         ],
     }
 
-    stored_response = json.loads(
-        json.dumps(
-            response,
-            ensure_ascii=False,
-            default=str,
-        )
-    )
+    stored_response = json_codec.normalize(response)
 
     if payment_correlation is not None:
         correlation_storage = {
@@ -1436,33 +1592,324 @@ def handle_asaas_sandbox_webhook_receiver(
         ] = correlation_storage
 
     record.status_code = 200
-    record.response_json = json.dumps(
-        stored_response,
-        ensure_ascii=False,
-        default=str,
+    record.response_json = json_codec.dumps(stored_response)
+    _record_wallet_webhook_event(
+        db,
+        idempotency_key=idem_key,
+        provider="asaas",
+        event_type=event_type,
+        status="confirmed" if accepted else "ignored",
+        received_at=now,
+        user_id=(
+            payment_correlation.user_id
+            if payment_correlation is not None
+            else None
+        ),
+        provider_reference=(
+            _asaas_sandbox_statement_reference(
+                payment_correlation.correlation_key
+            )
+            if payment_correlation is not None
+            else None
+        ),
+        amount=payment_amount,
     )
 
-    try:
-        db.commit()
-    except SQLAlchemyError:
-        db.rollback()
-        raise HTTPException(
-            status_code=503,
-            detail="Webhook Asaas Sandbox temporariamente indisponível.",
-            headers={"Retry-After": "30"},
-        ) from None
-
     return response
 
 
-
-@router.post("/api/v1/wallet/pix/sandbox-webhook")
-def handle_wallet_pix_sandbox_webhook(
-    payload: WalletPixSandboxWebhookIn,
-    current_user: User = Depends(require_customer),
-    db: Session = Depends(get_db),
-    x_idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
-):
+def _asaas_sandbox_webhook_inbox_payload(payload: dict) -> dict:
+    """
+    Recorte mínimo do evento para a inbox: só o que a auditoria e a
+    correlação usam. payment_id vira digest; nada do payload bruto fica.
+    """
+    payment = (
+        payload.get("payment")
+        if isinstance(payload.get("payment"), dict)
+        else {}
+    )
+
+    minimal = {
+        field: payment.get(field)
+        for field in (
+            "status",
+            "billingType",
+            "externalReference",
+            "external_reference",
+            "value",
+        )
+        if payment.get(field) is not None
+    }
+
+    if payment:
+        minimal["object"] = str(payment.get("object") or "payment")
+
+    if payment.get("id"):
+        digest = hashlib.sha256(
+            str(payment.get("id")).encode("utf-8")
+        ).hexdigest()
+        minimal["id"] = f"sha256:{digest[:16]}"
+
+    return {"payment": minimal}
+
+
+def _asaas_sandbox_webhook_queued_response(
+    item: WalletWebhookInbox,
+    *,
+    duplicated: bool,
+) -> dict:
+    accepted = item.event_type in _ASAAS_SANDBOX_WEBHOOK_ACCEPTED_EVENTS
+    received_at = item.received_at
+
+    return {
+        "ok": True,
+        "service": "aurea-wallet",
+        "duplicated": duplicated,
+        "queued": True,
+        "event": {
+            "provider": "asaas",
+            "environment": "sandbox",
+            "event_id_present": True,
+            "event_type": item.event_type,
+            "accepted": accepted,
+            "ignored": not accepted,
+            "received_at": (
+                received_at.isoformat() if received_at is not None else None
+            ),
+        },
+        "wallet": {
+            "mode": WALLET_MODE,
+            "provider": "asaas",
+            "source": "asaas_sandbox",
+            "real_money_enabled": False,
+        },
+        "idempotency": {
+            "key": item.idempotency_key,
+            "request_hash": item.request_hash,
+            "replayed": duplicated,
+            "state": "queued",
+        },
+        "can_credit_balance": False,
+        "can_generate_real_receipt": False,
+        "can_mark_real_paid": False,
+        "notice": (
+            "Webhook Asaas Sandbox recebido e enfileirado com segurança. "
+            "Nenhum saldo real, comprovante real ou pagamento real foi gerado."
+        ),
+    }
+
+
+def _enqueue_asaas_sandbox_webhook(
+    db: Session,
+    *,
+    payload: dict,
+    event_type: str,
+    idem_key: str,
+    request_hash: str,
+) -> dict:
+    """
+    Modo queue: grava o evento na inbox (idempotency_key única) e responde.
+    Auditoria e correlação ficam com os workers da inbox.
+    """
+    existing = db.query(IdempotencyKey).filter_by(key=idem_key).first()
+    if existing is not None:
+        if existing.response_json:
+            _remember_idempotency_record(existing)
+        return _asaas_sandbox_webhook_replay(existing, request_hash)
+
+    try:
+        item = WalletWebhookInbox(
+            idempotency_key=idem_key,
+            request_hash=request_hash,
+            provider="asaas",
+            event_type=event_type[:64],
+            payload_json=json_codec.dumps(
+                _asaas_sandbox_webhook_inbox_payload(payload)
+            ),
+            status="pending",
+            attempts=0,
+            received_at=datetime.now(timezone.utc),
+        )
+        db.add(item)
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        item = (
+            db.query(WalletWebhookInbox)
+            .filter_by(idempotency_key=idem_key)
+            .first()
+        )
+        if item is None:
+            raise
+
+        if item.request_hash != request_hash:
+            raise HTTPException(
+                status_code=409,
+                detail="Evento Asaas reutilizado com payload diferente.",
+            )
+
+        return _asaas_sandbox_webhook_queued_response(item, duplicated=True)
+
+    try:
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(
+            status_code=503,
+            detail="Webhook Asaas Sandbox temporariamente indisponível.",
+            headers={"Retry-After": "30"},
+        ) from None
+
+    return _asaas_sandbox_webhook_queued_response(item, duplicated=False)
+
+
+def process_asaas_sandbox_webhook_inbox_item(
+    db: Session,
+    item: WalletWebhookInbox,
+) -> str:
+    """
+    Processa um item da inbox com o mesmo fluxo do modo sync
+    (idempotência insert-first + auditoria/correlação). Não faz commit.
+
+    Retorna o outcome: processed | duplicate | conflict.
+    """
+    try:
+        record = IdempotencyKey(
+            key=item.idempotency_key,
+            request_hash=item.request_hash,
+        )
+        db.add(record)
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        existing = (
+            db.query(IdempotencyKey)
+            .filter_by(key=item.idempotency_key)
+            .first()
+        )
+        if existing is None:
+            raise
+
+        if existing.request_hash and existing.request_hash != item.request_hash:
+            return "conflict"
+        return "duplicate"
+
+    received_at = item.received_at or datetime.now(timezone.utc)
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+
+    _build_asaas_sandbox_webhook_records(
+        db,
+        record=record,
+        payload=json_codec.loads(item.payload_json or "{}"),
+        event_type=item.event_type,
+        idem_key=item.idempotency_key,
+        request_hash=item.request_hash,
+        provider="asaas",
+        now=received_at,
+    )
+
+    return "processed"
+
+
+@router.post("/api/v1/partners")
+@router.post("/api/v1/partners/")
+@router.post("/api/v1/partners/asaas/webhooks/sandbox")
+def handle_asaas_sandbox_webhook_receiver(
+    payload: dict = Body(...),
+    db: Session = Depends(get_db),
+    asaas_access_token: str | None = Header(default=None, alias="asaas-access-token"),
+):
+    """
+    Recebe webhooks reais do Asaas Sandbox com token e idempotência.
+
+    Segurança:
+    - Valida header asaas-access-token.
+    - Usa ASAAS_WEBHOOK_TOKEN fora do Git.
+    - Exige identificador único do evento para idempotência.
+    - Não exige login do cliente.
+    - Não salva payload bruto.
+    - Não expõe token nem payment_id.
+    - Não credita saldo real.
+    - Não gera comprovante real.
+    - Não marca pagamento como real.
+    """
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="Payload Asaas inválido.")
+
+    config = _asaas_sandbox_webhook_config()
+    _validate_asaas_sandbox_webhook_token(
+        asaas_access_token,
+        config.webhook_token,
+    )
+    provider = "asaas"
+
+    event_id = _asaas_sandbox_webhook_event_id(payload)
+    event_type = _asaas_sandbox_webhook_event_type(payload)
+    request_hash = _asaas_sandbox_webhook_hash(payload)
+    idem_key = _asaas_sandbox_webhook_idempotency_key(event_id)
+
+    cached = cached_replay(idem_key)
+    if cached is not None:
+        return _asaas_sandbox_webhook_replay(cached, request_hash)
+
+    if ASAAS_WEBHOOK_INGEST_MODE == "queue":
+        return _enqueue_asaas_sandbox_webhook(
+            db,
+            payload=payload,
+            event_type=event_type,
+            idem_key=idem_key,
+            request_hash=request_hash,
+        )
+
+    try:
+        record = IdempotencyKey(key=idem_key, request_hash=request_hash)
+        db.add(record)
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        existing = db.query(IdempotencyKey).filter_by(key=idem_key).first()
+        if not existing:
+            raise
+
+        existing = _await_idempotency_record(db, existing, request_hash)
+        return _asaas_sandbox_webhook_replay(existing, request_hash)
+
+    with idempotency_inflight(db, idem_key):
+        now = datetime.now(timezone.utc)
+        response = _build_asaas_sandbox_webhook_records(
+            db,
+            record=record,
+            payload=payload,
+            event_type=event_type,
+            idem_key=idem_key,
+            request_hash=request_hash,
+            provider=provider,
+            now=now,
+        )
+
+        try:
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise HTTPException(
+                status_code=503,
+                detail="Webhook Asaas Sandbox temporariamente indisponível.",
+                headers={"Retry-After": "30"},
+            ) from None
+
+    _remember_idempotency_record(record)
+    return response
+
+
+
+@router.post("/api/v1/wallet/pix/sandbox-webhook")
+def handle_wallet_pix_sandbox_webhook(
+    payload: WalletPixSandboxWebhookIn,
+    current_user: User = Depends(require_customer),
+    db: Session = Depends(get_db),
+    x_idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+):
     """
     Recebe evento PIX sandbox com idempotência.
 
@@ -1510,6 +1957,10 @@ def handle_wallet_pix_sandbox_webhook(
     request_hash = _sandbox_webhook_hash(payload)
     idem_key = _sandbox_webhook_idempotency_key(payload, x_idempotency_key)
 
+    cached = cached_replay(idem_key)
+    if cached is not None:
+        return _sandbox_webhook_replay(cached, request_hash)
+
     try:
         record = IdempotencyKey(key=idem_key, request_hash=request_hash)
         db.add(record)
@@ -1520,18 +1971,16 @@ def handle_wallet_pix_sandbox_webhook(
         if not existing:
             raise
 
+        existing = _await_idempotency_record(db, existing, request_hash)
+        if existing.response_json:
+            return _sandbox_webhook_replay(existing, request_hash)
+
         if getattr(existing, "request_hash", None) and existing.request_hash != request_hash:
             raise HTTPException(
                 status_code=409,
                 detail="Idempotency-Key reutilizada com payload diferente.",
             )
 
-        if existing.response_json:
-            response = json.loads(existing.response_json)
-            response["duplicated"] = True
-            response["idempotency"]["replayed"] = True
-            return response
-
         return {
             "ok": True,
             "service": "aurea-wallet",
@@ -1560,64 +2009,84 @@ def handle_wallet_pix_sandbox_webhook(
             "notice": "Evento sandbox já está em processamento. Nenhum dinheiro real foi movimentado.",
         }
 
-    webhook_result = handle_partner_wallet_webhook(
-        PartnerWebhookEvent(
+    with idempotency_inflight(db, idem_key):
+        webhook_result = handle_partner_wallet_webhook(
+            PartnerWebhookEvent(
+                provider="sandbox",
+                event_type=event_type,
+                provider_reference=provider_reference,
+                status=status,
+                raw=payload.raw or {},
+            )
+        )
+
+        now = datetime.now(timezone.utc)
+        response = {
+            "ok": True,
+            "service": "aurea-wallet",
+            "user_id": getattr(current_user, "id", None),
+            "duplicated": False,
+            "event": {
+                "provider": "sandbox",
+                "provider_reference": provider_reference,
+                "event_type": event_type,
+                "status": status,
+                "amount": _decimal_as_money(payload.amount) if payload.amount is not None else None,
+                "received_at": now.isoformat(),
+            },
+            "wallet": {
+                "mode": WALLET_MODE,
+                "provider": provider,
+                "source": "sandbox",
+                "real_money_enabled": False,
+            },
+            "webhook": webhook_result,
+            "idempotency": {
+                "key": idem_key,
+                "request_hash": request_hash,
+                "replayed": False,
+                "state": "stored",
+            },
+            "can_credit_balance": False,
+            "can_generate_real_receipt": False,
+            "can_mark_real_paid": False,
+            "notice": "Webhook PIX sandbox processado apenas para simulação técnica. Não movimenta dinheiro real.",
+            "limitations": [
+                "Não credita saldo real.",
+                "Não confirma pagamento real.",
+                "Não gera comprovante financeiro real.",
+                "Não substitui webhook assinado de parceiro financeiro homologado.",
+            ],
+            "next_steps": [
+                "Persistir eventos sandbox em ledger/auditoria própria.",
+                "Implementar reconciliação sandbox por provider_reference.",
+                "Validar assinatura/token de webhook antes de integração real.",
+                "Liberar crédito real somente via parceiro financeiro homologado.",
+            ],
+        }
+
+        record.status_code = 200
+        record.response_json = json_codec.dumps(response)
+        safe_reference = _safe_receipt_part(provider_reference)
+        _record_wallet_webhook_event(
+            db,
+            idempotency_key=idem_key,
             provider="sandbox",
             event_type=event_type,
-            provider_reference=provider_reference,
             status=status,
-            raw=payload.raw or {},
+            received_at=now,
+            user_id=getattr(current_user, "id", None),
+            provider_reference=(
+                safe_reference if safe_reference != "not-provided" else None
+            ),
+            amount=(
+                Decimal(str(payload.amount))
+                if payload.amount is not None
+                else None
+            ),
         )
-    )
-
-    now = datetime.now(timezone.utc)
-    response = {
-        "ok": True,
-        "service": "aurea-wallet",
-        "user_id": getattr(current_user, "id", None),
-        "duplicated": False,
-        "event": {
-            "provider": "sandbox",
-            "provider_reference": provider_reference,
-            "event_type": event_type,
-            "status": status,
-            "amount": _decimal_as_money(payload.amount) if payload.amount is not None else None,
-            "received_at": now.isoformat(),
-        },
-        "wallet": {
-            "mode": WALLET_MODE,
-            "provider": provider,
-            "source": "sandbox",
-            "real_money_enabled": False,
-        },
-        "webhook": webhook_result,
-        "idempotency": {
-            "key": idem_key,
-            "request_hash": request_hash,
-            "replayed": False,
-            "state": "stored",
-        },
-        "can_credit_balance": False,
-        "can_generate_real_receipt": False,
-        "can_mark_real_paid": False,
-        "notice": "Webhook PIX sandbox processado apenas para simulação técnica. Não movimenta dinheiro real.",
-        "limitations": [
-            "Não credita saldo real.",
-            "Não confirma pagamento real.",
-            "Não gera comprovante financeiro real.",
-            "Não substitui webhook assinado de parceiro financeiro homologado.",
-        ],
-        "next_steps": [
-            "Persistir eventos sandbox em ledger/auditoria própria.",
-            "Implementar reconciliação sandbox por provider_reference.",
-            "Validar assinatura/token de webhook antes de integração real.",
-            "Liberar crédito real somente via parceiro financeiro homologado.",
-        ],
-    }
-
-    record.status_code = 200
-    record.response_json = json.dumps(response, ensure_ascii=False, default=str)
-    db.commit()
+        db.commit()
+    _remember_idempotency_record(record)
 
     return response
 
@@ -1631,61 +2100,92 @@ def _find_sandbox_webhook_event_by_reference(
     """
     Busca evento sandbox registrado pela idempotência.
 
-    Fase 10: fundação de reconciliação sem nova tabela.
+    Ponto único indexado em wallet_webhook_events (provider, provider_reference).
     Não consulta PSP real, não credita saldo e não emite comprovante real.
     """
+    matches = _find_sandbox_webhook_events_by_references(db, [provider_reference])
+    return matches.get(provider_reference)
+
+
+def _find_sandbox_webhook_events_by_references(
+    db: Session,
+    provider_references: list[str],
+) -> dict[str, dict]:
+    """
+    Versão em lote: uma query (IN + join em idempotency_keys) e só o
+    response_json dos eventos encontrados é decodificado.
+    Para referências repetidas vale o evento mais recente.
+    """
+    references = sorted({ref for ref in provider_references if ref})
+    if not references:
+        return {}
+
     rows = (
-        db.query(IdempotencyKey)
-        .filter(IdempotencyKey.key.like("wallet-sandbox-webhook:%"))
-        .order_by(IdempotencyKey.created_at.desc())
-        .limit(250)
+        db.query(WalletWebhookEvent, IdempotencyKey)
+        .join(IdempotencyKey, IdempotencyKey.key == WalletWebhookEvent.idempotency_key)
+        .filter(
+            WalletWebhookEvent.provider == "sandbox",
+            WalletWebhookEvent.provider_reference.in_(references),
+        )
+        .order_by(WalletWebhookEvent.received_at.desc(), WalletWebhookEvent.id.desc())
         .all()
     )
 
-    for row in rows:
-        raw_response = getattr(row, "response_json", None)
-        if not raw_response:
+    matches: dict[str, dict] = {}
+
+    for event_row, row in rows:
+        reference = event_row.provider_reference
+        if reference in matches or not row.response_json:
             continue
 
         try:
-            response = json.loads(raw_response)
+            response = json_codec.loads(row.response_json)
         except Exception:
             continue
 
-        event = response.get("event") or {}
-        if str(event.get("provider_reference") or "").strip() == provider_reference:
-            return {
-                "idempotency_key": row.key,
-                "request_hash": row.request_hash,
-                "status_code": row.status_code,
-                "created_at": row.created_at.isoformat() if row.created_at else None,
-                "response": response,
-            }
+        matches[reference] = {
+            "idempotency_key": row.key,
+            "request_hash": row.request_hash,
+            "status_code": row.status_code,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "response": response,
+        }
 
-    return None
+    return matches
 
 
-@router.get("/api/v1/wallet/pix/sandbox-reconciliation/{provider_reference}")
-def get_wallet_pix_sandbox_reconciliation(
-    provider_reference: str,
-    current_user: User = Depends(require_customer),
-    db: Session = Depends(get_db),
-):
-    """
-    Consulta reconciliação sandbox por provider_reference.
+def _sandbox_reconciliation_summary(
+    safe_reference: str,
+    match: dict | None,
+) -> dict:
+    if not match:
+        return {
+            "provider": "sandbox",
+            "provider_reference": safe_reference,
+            "status": "not_found",
+            "event_found": False,
+            "audit_status": "not_found",
+            "reconciliation_status": "pending_webhook",
+            "amount": None,
+            "received_at": None,
+        }
 
-    Segurança:
-    - Não consulta transação real.
-    - Não credita saldo real.
-    - Não gera comprovante financeiro real.
-    - Não marca pagamento real como confirmado.
-    - Usa somente eventos sandbox já registrados por webhook/idempotência.
-    """
-    safe_reference = _safe_receipt_part(provider_reference)
+    event = match["response"].get("event") or {}
 
-    if not safe_reference or safe_reference == "not-provided":
-        raise HTTPException(status_code=422, detail="provider_reference é obrigatório.")
+    return {
+        "provider": "sandbox",
+        "provider_reference": safe_reference,
+        "status": str(event.get("status") or "unknown"),
+        "event_found": True,
+        "audit_status": "sandbox_event_recorded",
+        "reconciliation_status": "sandbox_reconciled",
+        "amount": event.get("amount"),
+        "received_at": event.get("received_at"),
+        "event_type": event.get("event_type"),
+    }
 
+
+def _sandbox_reconciliation_provider() -> str:
     try:
         adapter = get_partner_adapter()
         provider = adapter.provider_name
@@ -1704,6 +2204,31 @@ def get_wallet_pix_sandbox_reconciliation(
             ),
         )
 
+    return provider
+
+
+@router.get("/api/v1/wallet/pix/sandbox-reconciliation/{provider_reference}")
+def get_wallet_pix_sandbox_reconciliation(
+    provider_reference: str,
+    current_user: User = Depends(require_customer),
+    db: Session = Depends(get_db),
+):
+    """
+    Consulta reconciliação sandbox por provider_reference.
+
+    Segurança:
+    - Não consulta transação real.
+    - Não credita saldo real.
+    - Não gera comprovante financeiro real.
+    - Não marca pagamento real como confirmado.
+    - Usa somente eventos sandbox já registrados por webhook/idempotência.
+    """
+    safe_reference = _safe_receipt_part(provider_reference)
+
+    if not safe_reference or safe_reference == "not-provided":
+        raise HTTPException(status_code=422, detail="provider_reference é obrigatório.")
+
+    provider = _sandbox_reconciliation_provider()
     match = _find_sandbox_webhook_event_by_reference(db, safe_reference)
 
     if not match:
@@ -1711,16 +2236,7 @@ def get_wallet_pix_sandbox_reconciliation(
             "ok": True,
             "service": "aurea-wallet",
             "user_id": getattr(current_user, "id", None),
-            "reconciliation": {
-                "provider": "sandbox",
-                "provider_reference": safe_reference,
-                "status": "not_found",
-                "event_found": False,
-                "audit_status": "not_found",
-                "reconciliation_status": "pending_webhook",
-                "amount": None,
-                "received_at": None,
-            },
+            "reconciliation": _sandbox_reconciliation_summary(safe_reference, None),
             "wallet": {
                 "mode": WALLET_MODE,
                 "provider": provider,
@@ -1739,26 +2255,13 @@ def get_wallet_pix_sandbox_reconciliation(
             ],
         }
 
-    response = match["response"]
-    event = response.get("event") or {}
-    webhook = response.get("webhook") or {}
-    event_status = str(event.get("status") or "unknown")
+    webhook = match["response"].get("webhook") or {}
 
     return {
         "ok": True,
         "service": "aurea-wallet",
         "user_id": getattr(current_user, "id", None),
-        "reconciliation": {
-            "provider": "sandbox",
-            "provider_reference": safe_reference,
-            "status": event_status,
-            "event_found": True,
-            "audit_status": "sandbox_event_recorded",
-            "reconciliation_status": "sandbox_reconciled",
-            "amount": event.get("amount"),
-            "received_at": event.get("received_at"),
-            "event_type": event.get("event_type"),
-        },
+        "reconciliation": _sandbox_reconciliation_summary(safe_reference, match),
         "wallet": {
             "mode": WALLET_MODE,
             "provider": provider,
@@ -1793,24 +2296,114 @@ def get_wallet_pix_sandbox_reconciliation(
 
 
 
+class WalletSandboxReconciliationBatchIn(BaseModel):
+    provider_references: list[str]
+
+
+SANDBOX_RECONCILIATION_BATCH_MAX = 100
+
+
+@router.post("/api/v1/wallet/pix/sandbox-reconciliation/batch")
+def reconcile_wallet_pix_sandbox_batch(
+    payload: WalletSandboxReconciliationBatchIn,
+    current_user: User = Depends(require_customer),
+    db: Session = Depends(get_db),
+):
+    """
+    Reconciliação sandbox de várias provider_reference em uma consulta.
+
+    Segurança:
+    - Mesmas garantias da consulta individual.
+    - Não consulta transação real nem credita saldo real.
+    """
+    if len(payload.provider_references) > SANDBOX_RECONCILIATION_BATCH_MAX:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Máximo de {SANDBOX_RECONCILIATION_BATCH_MAX} provider_reference por lote.",
+        )
+
+    safe_references = []
+    for reference in payload.provider_references:
+        safe_reference = _safe_receipt_part(reference)
+        if safe_reference == "not-provided":
+            raise HTTPException(status_code=422, detail="provider_reference é obrigatório.")
+        safe_references.append(safe_reference)
+
+    provider = _sandbox_reconciliation_provider()
+    matches = _find_sandbox_webhook_events_by_references(db, safe_references)
+    items = [
+        _sandbox_reconciliation_summary(reference, matches.get(reference))
+        for reference in safe_references
+    ]
+
+    return {
+        "ok": True,
+        "service": "aurea-wallet",
+        "user_id": getattr(current_user, "id", None),
+        "reconciliation": {
+            "provider": "sandbox",
+            "total_requested": len(items),
+            "total_found": sum(1 for item in items if item["event_found"]),
+        },
+        "wallet": {
+            "mode": WALLET_MODE,
+            "provider": provider,
+            "source": "sandbox",
+            "real_money_enabled": False,
+        },
+        "items": items,
+        "can_credit_balance": False,
+        "can_generate_real_receipt": False,
+        "can_mark_real_paid": False,
+        "notice": "Reconciliação sandbox em lote. Este status não representa liquidação financeira real.",
+    }
+
+
 def _list_sandbox_webhook_events(
     db: Session,
     limit: int = 20,
 ) -> list[dict]:
+    items, _next_cursor = _list_sandbox_webhook_events_page(db, limit)
+    return items
+
+
+def _idempotency_audit_rows(
+    db: Session,
+    *,
+    namespace: str,
+    limit: int,
+    cursor,
+) -> tuple[list, str | None]:
+    # igualdade em namespace: range scan em (namespace, created_at, id)
+    query = db.query(IdempotencyKey).filter(IdempotencyKey.namespace == namespace)
+    rows = (
+        apply_keyset(query, IdempotencyKey.created_at, IdempotencyKey.id, cursor)
+        .limit(limit + 1)
+        .all()
+    )
+    return keyset_page(rows, limit)
+
+
+def _list_sandbox_webhook_events_page(
+    db: Session,
+    limit: int = 20,
+    cursor=None,
+) -> tuple[list[dict], str | None]:
     """
     Lista eventos sandbox registrados pela idempotência.
 
     Fase 12: histórico/auditoria sandbox sem nova tabela.
+    Keyset por (created_at, id): o cursor vale para as linhas lidas, mesmo
+    que alguma seja descartada abaixo.
     Não consulta PSP real, não credita saldo e não emite comprovante real.
     """
     safe_limit = max(1, min(int(limit or 20), 100))
 
-    rows = (
-        db.query(IdempotencyKey)
-        .filter(IdempotencyKey.key.like("wallet-sandbox-webhook:%"))
-        .order_by(IdempotencyKey.created_at.desc())
-        .limit(safe_limit)
-        .all()
+    rows, next_cursor = _idempotency_audit_rows(
+        db,
+        namespace="sandbox_webhook",
+        limit=safe_limit,
+        cursor=cursor,
     )
 
     items: list[dict] = []
@@ -1821,7 +2414,7 @@ def _list_sandbox_webhook_events(
             continue
 
         try:
-            response = json.loads(raw_response)
+            response = json_codec.loads(raw_response)
         except Exception:
             continue
 
@@ -1853,12 +2446,13 @@ def _list_sandbox_webhook_events(
             "can_mark_real_paid": False,
         })
 
-    return items
+    return items, next_cursor
 
 
 @router.get("/api/v1/wallet/pix/sandbox-audit-history")
 def get_wallet_pix_sandbox_audit_history(
     limit: int = 20,
+    cursor: str | None = None,
     current_user: User = Depends(require_customer),
     db: Session = Depends(get_db),
 ):
@@ -1891,7 +2485,11 @@ def get_wallet_pix_sandbox_audit_history(
         )
 
     safe_limit = max(1, min(int(limit or 20), 100))
-    items = _list_sandbox_webhook_events(db, safe_limit)
+    items, next_cursor = _list_sandbox_webhook_events_page(
+        db,
+        safe_limit,
+        parse_cursor_param(cursor),
+    )
 
     return {
         "ok": True,
@@ -1902,6 +2500,7 @@ def get_wallet_pix_sandbox_audit_history(
             "source": "idempotency_keys",
             "limit": safe_limit,
             "total_returned": len(items),
+            "next_cursor": next_cursor,
             "audit_status": "sandbox_events_listed",
         },
         "wallet": {
@@ -1934,21 +2533,30 @@ def _list_asaas_sandbox_webhook_audit_events(
     db: Session,
     limit: int = 20,
 ) -> list[dict]:
+    items, _next_cursor = _list_asaas_sandbox_webhook_audit_events_page(db, limit)
+    return items
+
+
+def _list_asaas_sandbox_webhook_audit_events_page(
+    db: Session,
+    limit: int = 20,
+    cursor=None,
+) -> tuple[list[dict], str | None]:
     """
     Lista auditoria segura de webhooks Asaas Sandbox.
 
     Fase v0.2.74: histórico sem nova tabela.
-    Usa somente response_json seguro em IdempotencyKey.
+    Usa somente response_json seguro em IdempotencyKey, paginado por
+    keyset (created_at, id).
     Não consulta PSP real, não credita saldo e não emite comprovante real.
     """
     safe_limit = max(1, min(int(limit or 20), 100))
 
-    rows = (
-        db.query(IdempotencyKey)
-        .filter(IdempotencyKey.key.like("asaas-sandbox-webhook:%"))
-        .order_by(IdempotencyKey.created_at.desc())
-        .limit(safe_limit)
-        .all()
+    rows, next_cursor = _idempotency_audit_rows(
+        db,
+        namespace="asaas_webhook",
+        limit=safe_limit,
+        cursor=cursor,
     )
 
     items: list[dict] = []
@@ -1959,7 +2567,7 @@ def _list_asaas_sandbox_webhook_audit_events(
             continue
 
         try:
-            response = json.loads(raw_response)
+            response = json_codec.loads(raw_response)
         except Exception:
             continue
 
@@ -2014,12 +2622,13 @@ def _list_asaas_sandbox_webhook_audit_events(
             "can_mark_real_paid": False,
         })
 
-    return items
+    return items, next_cursor
 
 
 @router.get("/api/v1/partners/asaas/webhooks/sandbox/audit-history")
 def get_asaas_sandbox_webhook_audit_history(
     limit: int = 20,
+    cursor: str | None = None,
     current_user: User = Depends(require_customer),
     db: Session = Depends(get_db),
 ):
@@ -2036,7 +2645,11 @@ def get_asaas_sandbox_webhook_audit_history(
     """
     config = _asaas_sandbox_webhook_config()
     safe_limit = max(1, min(int(limit or 20), 100))
-    items = _list_asaas_sandbox_webhook_audit_events(db, safe_limit)
+    items, next_cursor = _list_asaas_sandbox_webhook_audit_events_page(
+        db,
+        safe_limit,
+        parse_cursor_param(cursor),
+    )
 
     return {
         "ok": True,
@@ -2048,6 +2661,7 @@ def get_asaas_sandbox_webhook_audit_history(
             "source": "idempotency_keys",
             "limit": safe_limit,
             "total_returned": len(items),
+            "next_cursor": next_cursor,
             "audit_status": "asaas_sandbox_webhooks_listed",
         },
         "wallet": {
@@ -21,3 +21,83 @@ IS_SANDBOX_PARTNER = WALLET_MODE == "partner" and _IS_SANDBOX_PROVIDER
 IS_DEMO_WALLET = WALLET_MODE == "demo"
 IS_PARTNER_WALLET = WALLET_MODE == "partner" and not IS_SANDBOX_PARTNER
 
+# Fila de envios PIX por usuário: envios aguardando (inclui o em curso) e
+# espera máxima pela vez antes de responder 429 (envio unitário só no modo
+# pessimistic do saldo; o lote sempre usa a fila)
+PIX_SEND_MAILBOX_MAX_PENDING = max(1, int(os.getenv("PIX_SEND_MAILBOX_MAX_PENDING", "50") or 50))
+PIX_SEND_MAILBOX_WAIT_SEC = max(0.0, float(os.getenv("PIX_SEND_MAILBOX_WAIT_SEC", "15") or 0))
+
+# Envio PIX em lote: itens por request e semântica padrão de falha parcial
+# atomic = qualquer item inválido recusa o lote todo | partial = envia os válidos
+PIX_SEND_BATCH_MAX_ITEMS = max(1, int(os.getenv("PIX_SEND_BATCH_MAX_ITEMS", "100") or 100))
+_pix_batch_mode_raw = os.getenv("PIX_SEND_BATCH_DEFAULT_MODE", "atomic").strip().lower()
+PIX_SEND_BATCH_DEFAULT_MODE = _pix_batch_mode_raw if _pix_batch_mode_raw in {"atomic", "partial"} else "atomic"
+
+# Débito do saldo no envio PIX: pessimistic = fila por usuário + SELECT ... FOR UPDATE (padrão)
+# | optimistic = UPDATE condicional por version, com novas tentativas e jitter, sem fila nem advisory lock
+_wallet_balance_lock_raw = os.getenv("WALLET_BALANCE_LOCK_MODE", "pessimistic").strip().lower()
+WALLET_BALANCE_LOCK_MODE = _wallet_balance_lock_raw if _wallet_balance_lock_raw in {"pessimistic", "optimistic"} else "pessimistic"
+WALLET_BALANCE_OPTIMISTIC_ATTEMPTS = max(1, int(os.getenv("WALLET_BALANCE_OPTIMISTIC_ATTEMPTS", "5") or 5))
+WALLET_BALANCE_OPTIMISTIC_BACKOFF_MS = max(0.0, float(os.getenv("WALLET_BALANCE_OPTIMISTIC_BACKOFF_MS", "5") or 0))
+
+# Refresh tokens: sessões ativas por usuário (as mais antigas são revogadas),
+# horas que um token revogado fica para auditoria e intervalo do purge (0 = desligado)
+REFRESH_TOKEN_MAX_ACTIVE_PER_USER = max(1, int(os.getenv("REFRESH_TOKEN_MAX_ACTIVE_PER_USER", "10") or 10))
+REFRESH_TOKEN_REVOKED_RETENTION_HOURS = max(0, int(os.getenv("REFRESH_TOKEN_REVOKED_RETENTION_HOURS", "24") or 0))
+REFRESH_TOKEN_PURGE_INTERVAL_SEC = max(0, int(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SEC", "3600") or 0))
+
+# Pool dedicado de bcrypt (login): workers = núcleos que o hash pode ocupar;
+# fila = quantos logins esperam por vaga antes de responder 503
+PASSWORD_HASH_WORKERS = max(1, int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))) or 1))
+PASSWORD_HASH_QUEUE_MAX = max(0, int(os.getenv("PASSWORD_HASH_QUEUE_MAX", "16") or 0))
+
+# Timeout de cada fonte do extrato estruturado (parceiro, webhooks locais), em segundos
+WALLET_STATEMENT_SOURCE_TIMEOUT_SEC = max(0.1, float(os.getenv("WALLET_STATEMENT_SOURCE_TIMEOUT_SEC", "3") or 3))
+
+
+# sync = processa o webhook Asaas dentro do request (padrão)
+# queue = grava na inbox e responde rápido; workers processam em lote
+_asaas_ingest_mode_raw = os.getenv("ASAAS_WEBHOOK_INGEST_MODE", "sync").strip().lower()
+ASAAS_WEBHOOK_INGEST_MODE = _asaas_ingest_mode_raw if _asaas_ingest_mode_raw in {"sync", "queue"} else "sync"
+ASAAS_WEBHOOK_INBOX_WORKERS = max(1, int(os.getenv("ASAAS_WEBHOOK_INBOX_WORKERS", "2") or 2))
+ASAAS_WEBHOOK_INBOX_BATCH_SIZE = max(1, int(os.getenv("ASAAS_WEBHOOK_INBOX_BATCH_SIZE", "50") or 50))
+
+# Rate limit de login (app.utils.rate_limit)
+# memory = por processo | sqlite = arquivo compartilhado no host | postgres = tabela rate_limit_buckets
+_rate_limit_backend_raw = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_BACKEND = _rate_limit_backend_raw if _rate_limit_backend_raw in {"memory", "sqlite", "postgres"} else "memory"
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/dils_wallet_rate_limit.sqlite3")
+RATE_LIMIT_MAX_KEYS = max(1, int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000") or 100000))
+
+# Retenção de idempotency_keys por namespace (dias; 0 = nunca expira); webhooks
+# expiram junto com a projeção em wallet_webhook_events (extrato e reconciliação)
+IDEMPOTENCY_RETENTION_PIX_SEND_DAYS = max(0, int(os.getenv("IDEMPOTENCY_RETENTION_PIX_SEND_DAYS", "7") or 0))
+IDEMPOTENCY_RETENTION_WEBHOOK_DAYS = max(0, int(os.getenv("IDEMPOTENCY_RETENTION_WEBHOOK_DAYS", "180") or 0))
+IDEMPOTENCY_RETENTION_CORRELATION_DAYS = max(0, int(os.getenv("IDEMPOTENCY_RETENTION_CORRELATION_DAYS", "0") or 0))
+IDEMPOTENCY_ARCHIVE_DIR = os.getenv("IDEMPOTENCY_ARCHIVE_DIR", "").strip() or None
+# 0 = job de purge em background desligado (use app.utils.purge_idempotency_keys via cron)
+IDEMPOTENCY_PURGE_INTERVAL_SEC = max(0, int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SEC", "0") or 0))
+
+# Cache de replay idempotente (respostas concluídas)
+# memory = LRU por processo | sqlite = arquivo compartilhado no host | off
+_replay_cache_raw = os.getenv("IDEMPOTENCY_REPLAY_CACHE", "memory").strip().lower()
+IDEMPOTENCY_REPLAY_CACHE = _replay_cache_raw if _replay_cache_raw in {"memory", "sqlite", "off"} else "memory"
+IDEMPOTENCY_REPLAY_CACHE_SIZE = max(1, int(os.getenv("IDEMPOTENCY_REPLAY_CACHE_SIZE", "10000") or 10000))
+IDEMPOTENCY_REPLAY_CACHE_TTL = max(1, int(os.getenv("IDEMPOTENCY_REPLAY_CACHE_TTL", "3600") or 3600))
+IDEMPOTENCY_REPLAY_CACHE_SQLITE_PATH = os.getenv(
+    "IDEMPOTENCY_REPLAY_CACHE_SQLITE_PATH",
+    "/tmp/dils_wallet_replay_cache.sqlite3",
+)
+
+# Quanto um request duplicado espera o original terminar antes de responder "em andamento"
+IDEMPOTENCY_INFLIGHT_WAIT_SEC = max(0.0, float(os.getenv("IDEMPOTENCY_INFLIGHT_WAIT_SEC", "5") or 0))
+
+# Formato de gravação de idempotency_keys.response_json
+# compact = deflate com dicionário versionado (leitura de JSON legado continua transparente) | json
+_idempotency_storage_raw = os.getenv("IDEMPOTENCY_RESPONSE_STORAGE", "compact").strip().lower()
+IDEMPOTENCY_RESPONSE_STORAGE = _idempotency_storage_raw if _idempotency_storage_raw in {"compact", "json"} else "compact"
+
+# LRU (por processo) na frente de asaas_payment_correlations; o TTL limita por
+# quanto tempo outro worker ainda resolve uma correlação apagada pelo purge
+ASAAS_CORRELATION_CACHE_SIZE = max(1, int(os.getenv("ASAAS_CORRELATION_CACHE_SIZE", "10000") or 10000))
+ASAAS_CORRELATION_CACHE_TTL = max(1, int(os.getenv("ASAAS_CORRELATION_CACHE_TTL", "300") or 300))
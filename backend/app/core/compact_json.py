@@ -0,0 +1,114 @@
+import base64
+import zlib
+
+from sqlalchemy.types import Text, TypeDecorator
+
+from app.config import IDEMPOTENCY_RESPONSE_STORAGE
+
+# Formato compacto de response_json: "z1:" + base64(deflate cru com
+# dicionário v1). As respostas de webhook/auditoria repetem as mesmas
+# chaves e avisos em toda linha; com o dicionário pré-carregado o deflate
+# referencia esses trechos em vez de gravá-los de novo.
+#
+# JSON válido nunca começa com "z", então linhas legadas (JSON puro) são
+# lidas como estão. O dicionário de uma versão NUNCA muda: dicionário novo
+# = prefixo novo ("z2:"), mantendo o decode das versões anteriores.
+
+_PREFIX_V1 = "z1:"
+
+_DICTIONARY_V1 = "".join(
+    (
+        '"next_steps":["Persistir eventos sandbox em ledger/auditoria própria.",'
+        '"Implementar reconciliação sandbox por provider_reference.",'
+        '"Validar assinatura/token de webhook antes de integração real.",'
+        '"Liberar crédito real somente via parceiro financeiro homologado."],',
+        '"limitations":["Não credita saldo real.","Não confirma pagamento real.",'
+        '"Não gera comprovante financeiro real.",'
+        '"Não substitui webhook assinado de parceiro financeiro homologado."],',
+        '"notice":"Webhook PIX sandbox processado apenas para simulação técnica. '
+        'Não movimenta dinheiro real.",',
+        '"event":{"provider":"sandbox","provider_reference":"","event_type":"","status":"",'
+        '"amount":null,"received_at":""},"wallet":{"mode":"demo","provider":"sandbox",'
+        '"source":"sandbox","real_money_enabled":false},"webhook":{',
+        '"replay":{"replay_status":"asaas_sandbox_webhook_idempotent_replay",'
+        '"safe_replay":true,"duplicated":true,"idempotency_replayed":true,',
+        '"correlation_storage":{"contract":"asaas_payment_received_user_correlation_v1",'
+        '"user_id":,"correlation_key":"asaas-payment-correlation:","amount_present":true,'
+        '"currency":"BRL","raw_external_reference_stored":false,"can_credit_balance":false,'
+        '"real_money_enabled":false,"amount":""},',
+        '{"ok":true,"service":"aurea-wallet","duplicated":false,"event":{"provider":"asaas",'
+        '"environment":"sandbox","event_id_present":true,"event_type":"PAYMENT_RECEIVED",'
+        '"accepted":true,"ignored":false,"received_at":"+00:00"},"payment":{"object_present":true,'
+        '"payment_id_present":true,"status":"RECEIVED","billing_type":"PIX",'
+        '"external_reference_present":false},"correlation":{"provider":"asaas",'
+        '"environment":"sandbox","user_id_present":false,"correlation_key_present":false,'
+        '"external_reference_present":false,"raw_external_reference_stored":false,'
+        '"can_credit_balance":false,"correlation_status":"missing"},"wallet":{"mode":"demo",'
+        '"provider":"asaas","source":"asaas_sandbox","real_money_enabled":false},'
+        '"audit":{"provider":"asaas","environment":"sandbox",'
+        '"source":"asaas_sandbox_webhook_receiver","audit_status":"asaas_sandbox_webhook_recorded",'
+        '"event_type":"PAYMENT_RECEIVED","event_accepted":true,"event_id_present":true,'
+        '"payment_object_present":true,"payment_id_present":true,"payment_status":"RECEIVED",'
+        '"billing_type":"PIX","correlation":{"provider":"asaas","environment":"sandbox",'
+        '"user_id_present":true,"correlation_key_present":true,"external_reference_present":true,'
+        '"raw_external_reference_stored":false,"can_credit_balance":false,'
+        '"correlation_status":"resolved"},"received_at":"","storage":{"source":"idempotency_keys",'
+        '"raw_payload_stored":false,"raw_event_id_stored":false,"raw_payment_id_stored":false,'
+        '"response_json_stored":true},"idempotency":{"key":"asaas-sandbox-webhook:",'
+        '"request_hash":"","state":"stored"},"real_money_enabled":false,"can_credit_balance":false,'
+        '"can_generate_real_receipt":false,"can_mark_real_paid":false},',
+        '"idempotency":{"key":"asaas-sandbox-webhook:","request_hash":"","replayed":false,'
+        '"state":"stored"},"can_credit_balance":false,"can_generate_real_receipt":false,'
+        '"can_mark_real_paid":false,"notice":"Webhook Asaas Sandbox recebido com segurança. '
+        'Nenhum saldo real, comprovante real ou pagamento real foi gerado.",'
+        '"limitations":["Não credita saldo real.","Não gera comprovante financeiro real.",'
+        '"Não marca pagamento real como confirmado.","Não expõe token.",'
+        '"Não expõe payment_id.","Não salva payload bruto."]}',
+    )
+).encode("utf-8")
+
+
+def is_compact(value: str | None) -> bool:
+    return bool(value) and value.startswith(_PREFIX_V1)
+
+
+def pack(text: str) -> str:
+    """JSON -> formato compacto v1. Não valida o JSON."""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, _DICTIONARY_V1)
+    raw = compressor.compress(text.encode("utf-8")) + compressor.flush()
+    return _PREFIX_V1 + base64.b64encode(raw).decode("ascii")
+
+
+def unpack(value: str | None) -> str | None:
+    """Formato compacto -> JSON; qualquer outro valor volta como está."""
+    if not is_compact(value):
+        return value
+
+    raw = base64.b64decode(value[len(_PREFIX_V1):])
+    decompressor = zlib.decompressobj(-15, _DICTIONARY_V1)
+    return (decompressor.decompress(raw) + decompressor.flush()).decode("utf-8")
+
+
+def encode_for_storage(text: str | None) -> str | None:
+    """Aplica IDEMPOTENCY_RESPONSE_STORAGE; só compacta quando fica menor."""
+    if not text or is_compact(text) or IDEMPOTENCY_RESPONSE_STORAGE != "compact":
+        return text
+
+    packed = pack(text)
+    return packed if len(packed) < len(text) else text
+
+
+class CompactJSONText(TypeDecorator):
+    """
+    Coluna Text cujo valor em Python é sempre o JSON em texto; no banco vai
+    no formato configurado. Leitura aceita os dois formatos.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_for_storage(value)
+
+    def process_result_value(self, value, dialect):
+        return unpack(value)
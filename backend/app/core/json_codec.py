@@ -0,0 +1,106 @@
+import dataclasses
+import datetime as _dt
+import enum
+import json
+import uuid
+from decimal import Decimal
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse
+
+# orjson é opcional: sem ele tudo cai no json da stdlib, com a mesma saída
+# lógica (só muda o espaçamento)
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+# Dois perfis de codificação:
+#  - storage (dumps/normalize): o que vai para idempotency_keys e inbox.
+#    Tipos não-JSON viram str(obj), igual ao default=str de antes, para que
+#    registros novos e antigos sejam lidos do mesmo jeito.
+#  - resposta HTTP (encode_response / FastJSONResponse): Decimal -> float,
+#    datas em ISO 8601, como jsonable_encoder(custom_encoder={Decimal: float}).
+
+HAS_ORJSON = orjson is not None
+
+
+def _storage_default(obj: Any) -> Any:
+    return str(obj)
+
+
+def _response_default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (_dt.datetime, _dt.date, _dt.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+if orjson is not None:
+    # datetime passa pelo default no perfil storage (str(dt), como antes)
+    _STORAGE_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    _RESPONSE_OPTS = orjson.OPT_NON_STR_KEYS
+
+
+def _encode(obj: Any, default: Callable[[Any], Any], *, sort_keys: bool, storage: bool) -> bytes:
+    if orjson is not None:
+        opts = _STORAGE_OPTS if storage else _RESPONSE_OPTS
+        if sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=opts)
+
+    return json.dumps(
+        obj,
+        default=default,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        separators=(",", ":"),
+        allow_nan=False,
+    ).encode("utf-8")
+
+
+def dumps(obj: Any, *, sort_keys: bool = False) -> str:
+    """JSON compacto (UTF-8) para gravar no banco; tipos estranhos viram str."""
+    return _encode(obj, _storage_default, sort_keys=sort_keys, storage=True).decode("utf-8")
+
+
+def loads(data: str | bytes | None) -> Any:
+    """Lança ValueError (json.JSONDecodeError) para conteúdo inválido."""
+    if data is None:
+        raise ValueError("JSON vazio")
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def normalize(obj: Any) -> Any:
+    """
+    Cópia profunda só com tipos JSON, igual a json.loads(json.dumps(obj,
+    default=str)), numa passada de encode nativo.
+    """
+    return loads(_encode(obj, _storage_default, sort_keys=False, storage=True))
+
+
+def encode_response(content: Any) -> bytes:
+    return _encode(content, _response_default, sort_keys=False, storage=False)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta padrão da app: serializa direto (orjson quando disponível),
+    sem precisar de jsonable_encoder antes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_response(content)
@@ -7,10 +7,10 @@ import time
 import uuid
 from typing import Optional, Tuple
 
-from fastapi import Request
 from fastapi.responses import Response as FastAPIResponse
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 from pythonjsonlogger import jsonlogger
+from starlette.datastructures import Headers, MutableHeaders
 
 
 # ---- Request context (request_id) ----
@@ -71,7 +71,7 @@ def setup_logging() -> None:
 PIX_SEND_TOTAL = Counter(
     "aurea_pix_send_total",
     "Total de envios PIX (negócio)",
-    ["outcome"],  # success | replay | error | rate_limited
+    ["outcome"],  # success | replay | error | rate_limited | queue_busy | conflict (lote: batch_<outcome>)
 )
 
 PIX_SEND_DURATION_SECONDS = Histogram(
@@ -80,6 +80,68 @@ PIX_SEND_DURATION_SECONDS = Histogram(
     ["outcome"],
 )
 
+PIX_SEND_QUEUE_WAIT_SECONDS = Histogram(
+    "aurea_pix_send_queue_wait_seconds",
+    "Espera pela vez de envio do usuário (fila no processo / advisory lock entre workers)",
+    ["scope"],  # local | advisory
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15),
+)
+
+PIX_SEND_QUEUE_REJECTED_TOTAL = Counter(
+    "aurea_pix_send_queue_rejected_total",
+    "Envios PIX recusados pela fila por usuário",
+    ["reason"],  # full | timeout
+)
+
+WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL = Counter(
+    "aurea_wallet_balance_debit_conflicts_total",
+    "Débitos otimistas de saldo que perderam para outra escrita (version mudou)",
+    ["outcome"],  # retried | exhausted
+)
+
+AUTH_IDENTITY_CACHE_TOTAL = Counter(
+    "aurea_auth_identity_cache_total",
+    "Resolução de identidade no get_current_user (cache em memória)",
+    ["result"],  # hit | miss
+)
+
+AUTH_PASSWORD_HASH_QUEUE_WAIT_SECONDS = Histogram(
+    "aurea_auth_password_hash_queue_wait_seconds",
+    "Espera na fila do pool de bcrypt até um worker pegar o hash",
+    ["operation"],  # verify | hash
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+AUTH_PASSWORD_HASH_DURATION_SECONDS = Histogram(
+    "aurea_auth_password_hash_duration_seconds",
+    "Duração do bcrypt no pool dedicado",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+AUTH_PASSWORD_HASH_REJECTED_TOTAL = Counter(
+    "aurea_auth_password_hash_rejected_total",
+    "Hashes recusados com o pool de bcrypt saturado",
+    ["operation"],
+)
+
+ASAAS_WEBHOOK_INBOX_DEPTH = Gauge(
+    "aurea_asaas_webhook_inbox_depth",
+    "Webhooks Asaas pendentes na inbox",
+)
+
+ASAAS_WEBHOOK_INBOX_LAG_SECONDS = Histogram(
+    "aurea_asaas_webhook_inbox_lag_seconds",
+    "Tempo entre o recebimento do webhook Asaas e o fim do processamento",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+
+ASAAS_WEBHOOK_INBOX_PROCESSED_TOTAL = Counter(
+    "aurea_asaas_webhook_inbox_processed_total",
+    "Itens da inbox Asaas processados pelos workers",
+    ["outcome"],  # processed | duplicate | conflict | retry | failed
+)
+
 HTTP_REQUESTS_TOTAL = Counter(
     "aurea_http_requests_total",
     "Total HTTP requests",
@@ -92,82 +154,188 @@ HTTP_REQUEST_DURATION_SECONDS = Histogram(
     ["method", "route"],
 )
 
+HTTP_DB_QUERIES_PER_REQUEST = Histogram(
+    "aurea_http_db_queries_per_request",
+    "Queries SQL executadas por request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+HTTP_DB_TIME_SECONDS = Histogram(
+    "aurea_http_db_time_seconds",
+    "Tempo total em queries SQL por request",
+    ["method", "route"],
+)
+
+HTTP_DB_SLOWEST_QUERY_SECONDS = Histogram(
+    "aurea_http_db_slowest_query_seconds",
+    "Query SQL mais lenta de cada request",
+    ["method", "route"],
+)
+
 
 def metrics_response() -> FastAPIResponse:
     return FastAPIResponse(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
-def _route_label(request: Request) -> str:
+def _route_label(scope) -> str:
     """
     Evita cardinalidade alta: tenta usar o path do router (ex: /api/v1/cases/{id})
     """
-    rt = request.scope.get("route")
+    rt = scope.get("route")
     path = getattr(rt, "path", None)
-    return path or request.url.path
-
-
-async def observability_middleware(request: Request, call_next):
-    rid = request.headers.get("X-Request-Id") or uuid.uuid4().hex[:12]
-    token = _request_id_ctx.set(rid)
-
-    start = time.perf_counter()
-    route = _route_label(request)
-    method = request.method
-
-    # Debug opcional: PIX balance trace (sem print, log estruturado)
-    if _env_bool("AUREA_MW_PIXBAL_TRACE", False) and request.url.path == "/api/v1/pix/balance":
-        auth = request.headers.get("authorization")
-        origin = request.headers.get("origin")
-        referer = request.headers.get("referer")
-        extra = {
-            "method": method,
-            "path": request.url.path,
-            "origin": origin,
-            "referer": referer,
-            "auth_present": bool(auth),
-        }
-        if _env_bool("AUREA_MW_PIXBAL_TRACE_SHOW_AUTH", False) and auth:
-            extra["auth_head"] = auth[:25] + "..."
-        logging.getLogger("aurea.pix.balance").info("pix_balance_trace", extra=extra)
-
-    log = logging.getLogger("aurea.http")
-    status = "500"
+    return path or scope.get("path") or "-"
 
-    try:
-        resp = await call_next(request)
-        # mantém compat: devolve X-Request-Id sempre
-        try:
-            resp.headers["X-Request-Id"] = rid
-        except Exception:
-            pass
-        status = str(getattr(resp, "status_code", 0))
-        return resp
-    finally:
-        dur = time.perf_counter() - start
-        ms = int(dur * 1000)
-
-        HTTP_REQUESTS_TOTAL.labels(method=method, route=route, status=status).inc()
-        HTTP_REQUEST_DURATION_SECONDS.labels(method=method, route=route).observe(dur)
-
-        # Business metric: rate limit do PIX (/api/v1/pix/send) vindo do slowapi (status 429)
-        try:
-            if status == "429" and (request.url.path == "/api/v1/pix/send" or route == "/api/v1/pix/send"):
-                PIX_SEND_TOTAL.labels(outcome="rate_limited").inc()
-        except Exception:
-            pass
-
-        log.info(
-            "request",
-            extra={
+
+# ---- DB por request (SQLAlchemy cursor hooks) ----
+class _DbStats:
+    __slots__ = ("queries", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.queries = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+
+
+_db_stats_ctx: contextvars.ContextVar[Optional[_DbStats]] = contextvars.ContextVar("db_stats", default=None)
+_SLOW_STATEMENT_MAX_CHARS = 200
+
+# 429 do slowapi por rota de envio PIX -> outcome de PIX_SEND_TOTAL
+_PIX_SEND_RATE_LIMITED_OUTCOMES = {
+    "/api/v1/pix/send": "rate_limited",
+    "/api/v1/pix/send/batch": "batch_rate_limited",
+}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _db_stats_ctx.get() is not None:
+        conn.info.setdefault("_aurea_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _db_stats_ctx.get()
+    starts = conn.info.get("_aurea_query_start")
+    if stats is None or not starts:
+        return
+
+    elapsed = time.perf_counter() - starts.pop()
+    stats.queries += 1
+    stats.total += elapsed
+    if elapsed >= stats.slowest:
+        stats.slowest = elapsed
+        # só o SQL com placeholders; valores dos parâmetros nunca vão pro log
+        stats.slowest_statement = " ".join(str(statement).split())[:_SLOW_STATEMENT_MAX_CHARS]
+
+
+def _handle_cursor_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("_aurea_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_sqlalchemy(target=None) -> None:
+    """
+    Liga os hooks before/after_cursor_execute (idempotente).
+    Sem target, instrumenta todas as Engines do processo.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    target = Engine if target is None else target
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_cursor_error)
+
+
+class ObservabilityMiddleware:
+    """
+    Middleware ASGI puro (sem BaseHTTPMiddleware): request_id, métricas por
+    rota, contagem/tempo de queries do request e log estruturado.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.log = logging.getLogger("aurea.http")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        rid = headers.get("x-request-id") or uuid.uuid4().hex[:12]
+        token = _request_id_ctx.set(rid)
+        stats = _DbStats()
+        stats_token = _db_stats_ctx.set(stats)
+        # mesmo dict de request.state nas rotas (marca envios PIX já contados)
+        state = scope.setdefault("state", {})
+
+        start = time.perf_counter()
+        method = scope.get("method", "GET")
+        path = scope.get("path", "")
+
+        # Debug opcional: PIX balance trace (sem print, log estruturado)
+        if _env_bool("AUREA_MW_PIXBAL_TRACE", False) and path == "/api/v1/pix/balance":
+            auth = headers.get("authorization")
+            extra = {
                 "method": method,
-                "route": route,
-                "path": request.url.path,
-                "status": int(status),
-                "duration_ms": ms,
-            },
-        )
+                "path": path,
+                "origin": headers.get("origin"),
+                "referer": headers.get("referer"),
+                "auth_present": bool(auth),
+            }
+            if _env_bool("AUREA_MW_PIXBAL_TRACE_SHOW_AUTH", False) and auth:
+                extra["auth_head"] = auth[:25] + "..."
+            logging.getLogger("aurea.pix.balance").info("pix_balance_trace", extra=extra)
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message.get("status", 0))
+                # mantém compat: devolve X-Request-Id sempre
+                MutableHeaders(scope=message)["X-Request-Id"] = rid
+            await send(message)
 
-        _request_id_ctx.reset(token)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            dur = time.perf_counter() - start
+            route = _route_label(scope)
+
+            HTTP_REQUESTS_TOTAL.labels(method=method, route=route, status=status).inc()
+            HTTP_REQUEST_DURATION_SECONDS.labels(method=method, route=route).observe(dur)
+            HTTP_DB_QUERIES_PER_REQUEST.labels(method=method, route=route).observe(stats.queries)
+            HTTP_DB_TIME_SECONDS.labels(method=method, route=route).observe(stats.total)
+            HTTP_DB_SLOWEST_QUERY_SECONDS.labels(method=method, route=route).observe(stats.slowest)
+
+            # Business metric: rate limit do PIX vindo do slowapi (status 429); o 429
+            # da fila por usuário sai da própria rota, que já contou como queue_busy
+            rate_limited = _PIX_SEND_RATE_LIMITED_OUTCOMES.get(route) or _PIX_SEND_RATE_LIMITED_OUTCOMES.get(path)
+            if status == "429" and rate_limited and not state.get("pix_send_counted"):
+                PIX_SEND_TOTAL.labels(outcome=rate_limited).inc()
+
+            self.log.info(
+                "request",
+                extra={
+                    "method": method,
+                    "route": route,
+                    "path": path,
+                    "status": int(status),
+                    "duration_ms": int(dur * 1000),
+                    "db_queries": stats.queries,
+                    "db_time_ms": round(stats.total * 1000, 2),
+                    "db_slowest_ms": round(stats.slowest * 1000, 2),
+                    "db_slowest_statement": stats.slowest_statement,
+                },
+            )
+
+            _db_stats_ctx.reset(stats_token)
+            _request_id_ctx.reset(token)
 
 
 def attach_request_id_header(response, request_id: str) -> None:
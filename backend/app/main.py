@@ -7,11 +7,26 @@ def _allow_dev_seed() -> bool:
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 import os
+from contextlib import asynccontextmanager
 
-from app.database import Base, engine
+from app.database import Base, engine, SessionLocal
 from app.core.rate_limit import init_rate_limiter
-from app.core.observability import setup_logging, observability_middleware, metrics_response
-from app.config import WALLET_MODE
+from app.core.json_codec import FastJSONResponse
+from app.core.observability import (
+    setup_logging,
+    ObservabilityMiddleware,
+    instrument_sqlalchemy,
+    metrics_response,
+)
+from app.config import (
+    WALLET_MODE,
+    ASAAS_WEBHOOK_INGEST_MODE,
+    ASAAS_WEBHOOK_INBOX_WORKERS,
+    ASAAS_WEBHOOK_INBOX_BATCH_SIZE,
+    IDEMPOTENCY_ARCHIVE_DIR,
+    IDEMPOTENCY_PURGE_INTERVAL_SEC,
+    REFRESH_TOKEN_PURGE_INTERVAL_SEC,
+)
 
 # Routers principais / legados
 from app.api.v1.routes import assist as assist_router_v1         # módulo com .router
@@ -29,6 +44,7 @@ from app.api.v1.routes import pix_history_get                    # módulo com .
 from app.api.v1.routes import pix_7d
 from app.api.v1.routes import pix_forecast_get                             # módulo com .router
 from app.routers import dev_seed
+from app.routers import export_csv
 
 
 
@@ -40,7 +56,22 @@ def _env_bool(name: str, default: bool) -> bool:
     return v.strip().lower() in {"1","true","yes","y","on"}
 
 DOCS_PUBLIC = _env_bool("DOCS_PUBLIC", True)
+
+_background_workers = []
+
+
+@asynccontextmanager
+async def _lifespan(_app):
+    _start_background_workers()
+    try:
+        yield
+    finally:
+        _stop_background_workers()
+
+
 app = FastAPI(title="Dils Wallet API", version="0.3.0",
+    lifespan=_lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs" if DOCS_PUBLIC else None,
     redoc_url="/redoc" if DOCS_PUBLIC else None,
     openapi_url="/openapi.json" if DOCS_PUBLIC else None,
@@ -60,9 +91,8 @@ register_auth(app)
 app.include_router(pix_router)
 
 # --- Observability (request_id + logs + metrics) ---
-@app.middleware("http")
-async def aurea_observability(request: Request, call_next):
-    return await observability_middleware(request, call_next)
+app.add_middleware(ObservabilityMiddleware)
+instrument_sqlalchemy(engine)
 # --- /Observability ---
 
 
@@ -75,9 +105,55 @@ app.include_router(whoami_router)
 app.include_router(wallet_router)
 app.include_router(admin_dbfix.router, prefix="/admin")
 app.include_router(dev_seed.router)
+app.include_router(export_csv.router)
 
 from app.api.v1.ai import chat_lab_router
 app.include_router(chat_lab_router, prefix="/api/v1/ai")
+
+# --- Workers em background (inbox Asaas, purge de idempotency_keys) ---
+def _start_background_workers():
+    if ASAAS_WEBHOOK_INGEST_MODE == "queue":
+        from app.api.v1.routes.wallet import process_asaas_sandbox_webhook_inbox_item
+        from app.services.asaas_webhook_inbox_service import AsaasWebhookInboxWorkerPool
+
+        _background_workers.append(
+            AsaasWebhookInboxWorkerPool(
+                session_factory=SessionLocal,
+                processor=process_asaas_sandbox_webhook_inbox_item,
+                workers=ASAAS_WEBHOOK_INBOX_WORKERS,
+                batch_size=ASAAS_WEBHOOK_INBOX_BATCH_SIZE,
+            )
+        )
+
+    if IDEMPOTENCY_PURGE_INTERVAL_SEC:
+        from app.services.idempotency_retention_service import IdempotencyPurgeScheduler
+
+        _background_workers.append(
+            IdempotencyPurgeScheduler(
+                session_factory=SessionLocal,
+                interval=IDEMPOTENCY_PURGE_INTERVAL_SEC,
+                archive_dir=IDEMPOTENCY_ARCHIVE_DIR,
+            )
+        )
+
+    if REFRESH_TOKEN_PURGE_INTERVAL_SEC:
+        from app.services.refresh_token_service import RefreshTokenPurgeScheduler
+
+        _background_workers.append(
+            RefreshTokenPurgeScheduler(
+                session_factory=SessionLocal,
+                interval=REFRESH_TOKEN_PURGE_INTERVAL_SEC,
+            )
+        )
+
+    for worker in _background_workers:
+        worker.start()
+
+
+def _stop_background_workers():
+    while _background_workers:
+        _background_workers.pop().stop()
+# --- /Workers em background ---
 # AUREA_ENV_CORS
 cors_env = os.getenv("CORS_ORIGINS", "").strip()
 origins = [o.strip() for o in cors_env.split(",") if o.strip()]
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, func, Index
+from app.database import Base
+
+
+class AsaasPaymentCorrelation(Base):
+    """
+    Correlação externalReference Asaas -> usuário, materializada.
+
+    Gravada na mesma transação do registro em idempotency_keys (contrato
+    da preparação), para que o webhook resolva o usuário por PK sem
+    decodificar response_json.
+    """
+
+    __tablename__ = "asaas_payment_correlations"
+
+    # "asaas-payment-correlation:<sha256>"; a referência crua nunca é gravada
+    correlation_key = Column(String(128), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False, default="registered")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_asaas_payment_correlations_user_id", "user_id"),
+    )
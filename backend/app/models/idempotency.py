@@ -1,6 +1,27 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, func, Index
+from app.core.compact_json import CompactJSONText
 from app.database import Base
 
+# namespace -> prefixo da key; o que não casa com nenhum é Idempotency-Key
+# de cliente (envio PIX)
+IDEMPOTENCY_NAMESPACE_PREFIXES = {
+    "sandbox_webhook": "wallet-sandbox-webhook:",
+    "asaas_webhook": "asaas-sandbox-webhook:",
+    "asaas_correlation": "asaas-payment-correlation:",
+}
+DEFAULT_IDEMPOTENCY_NAMESPACE = "pix_send"
+
+
+def idempotency_namespace(key: str) -> str:
+    for namespace, prefix in IDEMPOTENCY_NAMESPACE_PREFIXES.items():
+        if str(key or "").startswith(prefix):
+            return namespace
+    return DEFAULT_IDEMPOTENCY_NAMESPACE
+
+
+def _namespace_from_key(context) -> str:
+    return idempotency_namespace(context.get_current_parameters().get("key"))
+
 
 class IdempotencyKey(Base):
     __tablename__ = "idempotency_keys"
@@ -8,9 +29,26 @@ class IdempotencyKey(Base):
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String(128), unique=True, nullable=False, index=True)
 
+    # derivado do prefixo da key no INSERT; filtros de auditoria/retenção
+    # usam igualdade aqui em vez de LIKE na key
+    namespace = Column(
+        String(32),
+        nullable=False,
+        default=_namespace_from_key,
+        server_default=DEFAULT_IDEMPOTENCY_NAMESPACE,
+    )
+
     # hash do payload (anti-reuse fraud / anti-duplicação)
     request_hash = Column(String(64), nullable=True, index=True)
 
     status_code = Column(Integer, nullable=True)
-    response_json = Column(Text, nullable=True)
+    # JSON em texto no Python; no banco pode estar no formato compacto
+    response_json = Column(CompactJSONText, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # keyset das trilhas de auditoria: (created_at desc, id desc)
+        Index("ix_idempotency_keys_created_at_id", "created_at", "id"),
+        # newest-N por namespace: range scan (lido de trás pra frente)
+        Index("ix_idempotency_keys_namespace_created_at_id", "namespace", "created_at", "id"),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime, func
+from app.database import Base
+
+
+class PixDailyRollup(Base):
+    """
+    Totais PIX por usuário/dia (UTC), mantidos junto com cada lançamento
+    em pix_ledger. Telas de 7 dias e do mês leem no máximo 31 linhas.
+    """
+
+    __tablename__ = "pix_daily_rollup"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    day = Column(Date, primary_key=True)
+    entradas = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    saidas = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
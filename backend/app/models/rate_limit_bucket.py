@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Index
+from app.database import Base
+
+
+class RateLimitBucket(Base):
+    """
+    Janela deslizante (contador atual + anterior) por chave de rate limit.
+
+    Usada pelo backend "postgres" de app.utils.rate_limit, para que todos os
+    workers/instâncias compartilhem o mesmo limite de login.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)
+    window_index = Column(Integer, nullable=False)
+    curr_count = Column(Integer, nullable=False, default=0)
+    prev_count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(Integer, nullable=False)  # epoch (s); limpeza periódica
+
+    __table_args__ = (
+        Index("ix_rate_limit_buckets_expires_at", "expires_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from . import Base  # usa o mesmo Base central
@@ -9,10 +9,31 @@ class RefreshToken(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    token_hash = Column(String(128), nullable=False, index=True)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # lookup do refresh = uma sonda neste índice único
+    token_hash = Column(String(128), nullable=False, unique=True, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # preenchido na rotação / limite de sessões; a linha some no purge
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
 
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     # relacionamento reverso
     user = relationship("User", backref="refresh_tokens")
+
+    __table_args__ = (
+        # sessões ativas por usuário (limite de sessões), só linhas não revogadas
+        Index(
+            "ix_refresh_tokens_user_active",
+            "user_id",
+            "created_at",
+            postgresql_where=text("revoked_at IS NULL"),
+            sqlite_where=text("revoked_at IS NULL"),
+        ),
+        # purge dos revogados
+        Index(
+            "ix_refresh_tokens_revoked_at",
+            "revoked_at",
+            postgresql_where=text("revoked_at IS NOT NULL"),
+            sqlite_where=text("revoked_at IS NOT NULL"),
+        ),
+    )
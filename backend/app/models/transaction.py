@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
 from sqlalchemy.sql import func
@@ -18,3 +18,8 @@ class Transaction(Base):
     criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("User", backref="transactions")
+
+    __table_args__ = (
+        # keyset do histórico PIX: (user_id, criado_em desc, id desc)
+        Index("ix_transactions_user_id_criado_em_id", "user_id", "criado_em", "id"),
+    )
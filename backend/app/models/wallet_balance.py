@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Numeric, DateTime, func, CheckConstraint
+from app.database import Base
+
+
+class WalletBalance(Base):
+    """
+    Saldo materializado por usuário.
+
+    Atualizado na mesma transação de cada insert em pix_ledger; o envio PIX
+    trava só esta linha em vez de todo o histórico do ledger.
+    """
+
+    __tablename__ = "wallet_balances"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    available = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        CheckConstraint("version >= 0", name="ck_wallet_balances_version_nonneg"),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, func, Index
+from app.database import Base
+
+
+class WalletWebhookEvent(Base):
+    """
+    Projeção tipada dos webhooks sandbox/Asaas.
+
+    Gravada na mesma transação do registro em idempotency_keys, para que
+    extrato e reconciliação consultem colunas indexadas em vez de
+    decodificar response_json.
+    """
+
+    __tablename__ = "wallet_webhook_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(128), unique=True, nullable=False)
+
+    # NULL quando o evento não foi correlacionado a um usuário (ex: Asaas sem externalReference)
+    user_id = Column(Integer, nullable=True)
+    provider = Column(String(32), nullable=False)  # 'sandbox' | 'asaas'
+    provider_reference = Column(String(128), nullable=True)
+    event_type = Column(String(64), nullable=False)
+    status = Column(String(32), nullable=False)
+    amount = Column(Numeric(14, 2), nullable=True)
+
+    received_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_wallet_webhook_events_user_received", "user_id", "status", "received_at"),
+        Index("ix_wallet_webhook_events_provider_reference", "provider", "provider_reference"),
+        Index("ix_wallet_webhook_events_event_type", "event_type"),
+    )
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, func, Index
+from app.database import Base
+
+
+class WalletWebhookInbox(Base):
+    """
+    Inbox durável de webhooks Asaas (modo ASAAS_WEBHOOK_INGEST_MODE=queue).
+
+    O request só valida token/idempotência e grava aqui; workers drenam em
+    lote e geram os mesmos registros de auditoria/correlação do modo sync.
+    payload_json guarda só o recorte mínimo do pagamento e é apagado
+    depois do processamento.
+    """
+
+    __tablename__ = "wallet_webhook_inbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(128), unique=True, nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    provider = Column(String(32), nullable=False, default="asaas")
+    event_type = Column(String(64), nullable=False)
+    payload_json = Column(Text, nullable=True)
+
+    status = Column(String(16), nullable=False, default="pending")  # pending | processing | done | failed
+    outcome = Column(String(16), nullable=True)  # processed | duplicate | conflict
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(255), nullable=True)
+
+    received_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_wallet_webhook_inbox_status_id", "status", "id"),
+    )
@@ -5,13 +5,17 @@ import hashlib
 import json
 import re
 import secrets
-from typing import Any
+from typing import Any, Iterable
 
-from app.models.idempotency import IdempotencyKey
+from app.config import ASAAS_CORRELATION_CACHE_SIZE, ASAAS_CORRELATION_CACHE_TTL
+from app.core import json_codec
+from app.core.lru_cache import BoundedTTLCache
+from app.models.asaas_payment_correlation import AsaasPaymentCorrelation
+from app.models.idempotency import IDEMPOTENCY_NAMESPACE_PREFIXES, IdempotencyKey
 
 
 ASAAS_PAYMENT_EXTERNAL_REFERENCE_PREFIX = "agpay_"
-ASAAS_PAYMENT_CORRELATION_KEY_PREFIX = "asaas-payment-correlation:"
+ASAAS_PAYMENT_CORRELATION_KEY_PREFIX = IDEMPOTENCY_NAMESPACE_PREFIXES["asaas_correlation"]
 ASAAS_PAYMENT_CORRELATION_CONTRACT = (
     "asaas_payment_user_correlation_v1"
 )
@@ -121,33 +125,56 @@ def build_asaas_payment_user_correlation_record(
         key=correlation_key,
         request_hash=request_hash,
         status_code=201,
-        response_json=json.dumps(
+        response_json=json_codec.dumps(
             stored_contract,
-            ensure_ascii=False,
             sort_keys=True,
         ),
     )
 
 
-def resolve_asaas_payment_user_correlation(
-    db,
+def build_asaas_payment_correlation_row(
     *,
-    external_reference: str,
-) -> AsaasPaymentUserCorrelation | None:
-    correlation_key = asaas_payment_correlation_key(
-        external_reference
-    )
-    record = (
-        db.query(IdempotencyKey)
-        .filter_by(key=correlation_key)
-        .first()
+    correlation_key: str,
+    user_id: int,
+) -> AsaasPaymentCorrelation:
+    """Linha materializada; gravar junto com o registro em idempotency_keys."""
+    return AsaasPaymentCorrelation(
+        correlation_key=correlation_key,
+        user_id=_normalize_user_id(user_id),
+        status="registered",
     )
 
+
+# correlation_key -> user_id; só hits positivos entram. Correlação
+# registrada não muda de usuário, mas o purge de retenção pode apagá-la:
+# o worker que apaga invalida o próprio cache e os demais param de
+# resolvê-la quando a entrada expira (ASAAS_CORRELATION_CACHE_TTL).
+_correlation_cache = BoundedTTLCache(
+    max_entries=ASAAS_CORRELATION_CACHE_SIZE,
+    ttl=ASAAS_CORRELATION_CACHE_TTL,
+)
+
+
+def remember_asaas_payment_correlation(correlation_key: str, user_id: int) -> None:
+    """Aquece o cache; chamar só depois do commit da correlação."""
+    _correlation_cache.put(correlation_key, int(user_id))
+
+
+def forget_asaas_payment_correlation(correlation_key: str) -> None:
+    _correlation_cache.invalidate(correlation_key)
+
+
+def clear_asaas_payment_correlation_cache() -> None:
+    _correlation_cache.clear()
+
+
+def _user_id_from_record(record) -> int | None:
+    """user_id do contrato JSON em idempotency_keys (linhas antes da tabela)."""
     if not record or not getattr(record, "response_json", None):
         return None
 
     try:
-        stored_contract = json.loads(record.response_json)
+        stored_contract = json_codec.loads(record.response_json)
     except (TypeError, ValueError, json.JSONDecodeError):
         return None
 
@@ -158,18 +185,171 @@ def resolve_asaas_payment_user_correlation(
         return None
 
     try:
-        user_id = _normalize_user_id(
+        return _normalize_user_id(
             stored_contract.get("user_id")
         )
     except ValueError:
         return None
 
+
+def resolve_asaas_payment_user_correlation(
+    db,
+    *,
+    external_reference: str,
+) -> AsaasPaymentUserCorrelation | None:
+    """
+    Cache -> asaas_payment_correlations (PK) -> contrato em
+    idempotency_keys (correlações ainda não materializadas).
+    """
+    correlation_key = asaas_payment_correlation_key(
+        external_reference
+    )
+
+    user_id = _correlation_cache.get(correlation_key)
+    if user_id is None:
+        row = (
+            db.query(AsaasPaymentCorrelation)
+            .filter_by(correlation_key=correlation_key)
+            .first()
+        )
+        if row is not None and row.status == "registered":
+            user_id = row.user_id
+        else:
+            user_id = _user_id_from_record(
+                db.query(IdempotencyKey)
+                .filter_by(key=correlation_key)
+                .first()
+            )
+
+        if user_id is None:
+            return None
+        _correlation_cache.put(correlation_key, user_id)
+
     return AsaasPaymentUserCorrelation(
         user_id=user_id,
         correlation_key=correlation_key,
     )
 
 
+def resolve_asaas_payment_user_correlations(
+    db,
+    external_references: Iterable[str],
+    *,
+    chunk_size: int = 500,
+) -> dict[str, AsaasPaymentUserCorrelation]:
+    """
+    Resolução em lote (backfills/reprocessamento): um IN por bloco em vez
+    de uma consulta por referência. Referências inválidas ou sem
+    correlação ficam de fora do resultado.
+    """
+    key_by_reference: dict[str, str] = {}
+    for reference in external_references:
+        try:
+            key_by_reference[str(reference)] = asaas_payment_correlation_key(str(reference))
+        except ValueError:
+            continue
+
+    user_by_key: dict[str, int] = {}
+    missing: list[str] = []
+    for correlation_key in set(key_by_reference.values()):
+        user_id = _correlation_cache.get(correlation_key)
+        if user_id is None:
+            missing.append(correlation_key)
+        else:
+            user_by_key[correlation_key] = user_id
+
+    chunk_size = max(1, int(chunk_size))
+    for start in range(0, len(missing), chunk_size):
+        chunk = missing[start:start + chunk_size]
+
+        rows = (
+            db.query(AsaasPaymentCorrelation)
+            .filter(
+                AsaasPaymentCorrelation.correlation_key.in_(chunk),
+                AsaasPaymentCorrelation.status == "registered",
+            )
+            .all()
+        )
+        found = {row.correlation_key: row.user_id for row in rows}
+
+        legacy = [key for key in chunk if key not in found]
+        if legacy:
+            for record in db.query(IdempotencyKey).filter(IdempotencyKey.key.in_(legacy)).all():
+                user_id = _user_id_from_record(record)
+                if user_id is not None:
+                    found[record.key] = user_id
+
+        for correlation_key, user_id in found.items():
+            _correlation_cache.put(correlation_key, user_id)
+        user_by_key.update(found)
+
+    return {
+        reference: AsaasPaymentUserCorrelation(
+            user_id=user_by_key[correlation_key],
+            correlation_key=correlation_key,
+        )
+        for reference, correlation_key in key_by_reference.items()
+        if correlation_key in user_by_key
+    }
+
+
+def backfill_asaas_payment_correlations(
+    db,
+    *,
+    batch_size: int = 500,
+) -> int:
+    """
+    Materializa em asaas_payment_correlations as correlações que só
+    existem como contrato em idempotency_keys. Idempotente; lotes por id.
+    """
+    batch_size = max(1, int(batch_size))
+    last_id = 0
+    created = 0
+
+    while True:
+        records = (
+            db.query(IdempotencyKey)
+            .filter(
+                IdempotencyKey.namespace == "asaas_correlation",
+                IdempotencyKey.id > last_id,
+            )
+            .order_by(IdempotencyKey.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not records:
+            break
+        last_id = records[-1].id
+
+        keys = [record.key for record in records]
+        existing = {
+            row.correlation_key
+            for row in db.query(AsaasPaymentCorrelation.correlation_key)
+            .filter(AsaasPaymentCorrelation.correlation_key.in_(keys))
+            .all()
+        }
+
+        for record in records:
+            user_id = _user_id_from_record(record)
+            if user_id is None or record.key in existing:
+                continue
+            db.add(
+                build_asaas_payment_correlation_row(
+                    correlation_key=record.key,
+                    user_id=user_id,
+                )
+            )
+            created += 1
+
+        db.commit()
+        db.expunge_all()
+
+        if len(records) < batch_size:
+            break
+
+    return created
+
+
 def resolve_asaas_payment_user_correlation_from_payment(
     db,
     *,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 
 from app.partner.types import (
@@ -41,6 +42,14 @@ class PartnerAdapter(ABC):
     def get_statement(self, *, user_id: int, limit: int = 50) -> list[StatementItem]:
         raise NotImplementedError
 
+    # Variantes async: o padrão roda a chamada síncrona numa thread.
+    # Adapters reais com HTTP devem sobrescrever com cliente async.
+    async def aget_balance(self, *, user_id: int) -> PartnerBalance:
+        return await asyncio.to_thread(self.get_balance, user_id=user_id)
+
+    async def aget_statement(self, *, user_id: int, limit: int = 50) -> list[StatementItem]:
+        return await asyncio.to_thread(self.get_statement, user_id=user_id, limit=limit)
+
     @abstractmethod
     def handle_webhook(self, event: PartnerWebhookEvent) -> dict:
         raise NotImplementedError
@@ -79,6 +79,13 @@ class SandboxPartnerAdapter(PartnerAdapter):
     def get_statement(self, *, user_id: int, limit: int = 50) -> list[StatementItem]:
         return []
 
+    # em memória: sem thread extra
+    async def aget_balance(self, *, user_id: int) -> PartnerBalance:
+        return self.get_balance(user_id=user_id)
+
+    async def aget_statement(self, *, user_id: int, limit: int = 50) -> list[StatementItem]:
+        return self.get_statement(user_id=user_id, limit=limit)
+
     def handle_webhook(self, event: PartnerWebhookEvent) -> dict:
         return {
             "ok": True,
@@ -1,35 +1,229 @@
-from fastapi import APIRouter, Depends, Response
-from sqlalchemy.orm import Session
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
-from .database import get_db
-from .security import get_current_user  # ajuste se o caminho diferir
+
+from app.database import SessionLocal
+from app.utils.authz import require_customer
+
+# Parquet é opcional: só disponível com pyarrow instalado
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pq = None
 
 router = APIRouter(prefix="/api/v1/transactions", tags=["transactions"])
 
-@router.get("/export.csv")
-def export_csv(
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    # SQL simples pra evitar dependência de modelos
-    rows = db.execute(text("""
-        SELECT id, tipo, valor, COALESCE(referencia,'' ) AS referencia, criado_em, user_id
+EXPORT_COLUMNS = ("id", "criado_em", "tipo", "valor", "referencia", "user_id")
+EXPORT_CHUNK_ROWS = 1000
+
+_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _iter_export_rows(
+    user_id: int,
+    start: Optional[date],
+    end: Optional[date],
+) -> Iterator[dict]:
+    """
+    Itera as transações do usuário com cursor server-side (yield_per),
+    em sessão própria: o stream continua depois que o handler retorna.
+    """
+    sql = """
+        SELECT id, criado_em, tipo, valor, COALESCE(referencia, '') AS referencia, user_id
         FROM transactions
         WHERE user_id = :uid
-        ORDER BY criado_em
-    """), {"uid": current_user.id}).mappings().all()
-
-    # monta CSV
-    header = "id,criado_em,tipo,valor,referencia,user_id\n"
-    lines = [
-        f'{r["id"]},{r["criado_em"]},{r["tipo"]},{r["valor"]},"{r["referencia"]}",{r["user_id"]}'
-        for r in rows
-    ]
-    csv_data = header + "\n".join(lines)
-    return Response(
-        content=csv_data,
-        media_type="text/csv",
+    """
+    params: dict = {"uid": user_id}
+
+    if start is not None:
+        sql += " AND criado_em >= :start"
+        params["start"] = start
+    if end is not None:
+        # end é inclusivo (dia inteiro)
+        sql += " AND criado_em < :end"
+        params["end"] = end + timedelta(days=1)
+
+    sql += " ORDER BY criado_em, id"
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(sql).execution_options(yield_per=EXPORT_CHUNK_ROWS),
+            params,
+        )
+        for row in result.mappings():
+            yield dict(row)
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _stream_csv(rows: Iterator[dict]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([row.get(col) for col in EXPORT_COLUMNS])
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            pending = 0
+
+    yield buf.getvalue()
+
+
+def _stream_ndjson(rows: Iterator[dict]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=_json_default))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino do ParquetWriter que guarda só os bytes ainda não enviados."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("criado_em", pa.timestamp("us")),
+            ("tipo", pa.string()),
+            ("valor", pa.float64()),
+            ("referencia", pa.string()),
+            ("user_id", pa.int64()),
+        ]
+    )
+
+
+def _stream_parquet(rows: Iterator[dict]) -> Iterator[bytes]:
+    # um row group por lote; memória limitada a EXPORT_CHUNK_ROWS linhas
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def _flush(batch: list[dict]) -> None:
+        columns = {col: [row.get(col) for row in batch] for col in EXPORT_COLUMNS}
+        columns["valor"] = [float(v) if v is not None else None for v in columns["valor"]]
+        columns["criado_em"] = [
+            datetime.fromisoformat(v) if isinstance(v, str) else v
+            for v in columns["criado_em"]
+        ]
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+    try:
+        batch: list[dict] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= EXPORT_CHUNK_ROWS:
+                _flush(batch)
+                batch = []
+                yield sink.drain()
+        if batch:
+            _flush(batch)
+    finally:
+        writer.close()
+
+    yield sink.drain()
+
+
+def _export_response(
+    user_id: int,
+    fmt: str,
+    start: Optional[date],
+    end: Optional[date],
+) -> StreamingResponse:
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="start deve ser <= end.")
+
+    if fmt == "parquet" and pq is None:
+        raise HTTPException(
+            status_code=501,
+            detail="Exportação parquet indisponível (pyarrow não instalado).",
+        )
+
+    rows = _iter_export_rows(user_id, start, end)
+    streams = {
+        "csv": _stream_csv,
+        "ndjson": _stream_ndjson,
+        "parquet": _stream_parquet,
+    }
+
+    return StreamingResponse(
+        streams[fmt](rows),
+        media_type=_MEDIA_TYPES[fmt],
         headers={
-            "Content-Disposition": 'attachment; filename="transactions_export.csv"'
+            "Content-Disposition": f'attachment; filename="transactions_export.{fmt}"'
         },
     )
+
+
+@router.get("/export")
+def export_transactions(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    start: Optional[date] = Query(None, description="Data inicial (inclusiva)"),
+    end: Optional[date] = Query(None, description="Data final (inclusiva)"),
+    current_user=Depends(require_customer),
+):
+    """
+    Exporta as transações do usuário em streaming (CSV, NDJSON ou Parquet).
+    Memória constante: lê com cursor server-side e envia em lotes.
+    """
+    return _export_response(int(current_user.id), format, start, end)
+
+
+@router.get("/export.csv")
+def export_csv(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    current_user=Depends(require_customer),
+):
+    return _export_response(int(current_user.id), "csv", start, end)
@@ -1,7 +1,6 @@
 from decimal import Decimal
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from app.core.json_codec import FastJSONResponse
 
 try:
     from sqlalchemy.orm import Session
@@ -53,24 +52,24 @@ router = APIRouter()
 def get_balance(db: Session = Depends(get_db), user_id: int = 1):
     try:
         saldo_pix: Decimal = calcular_saldo(db, user_id)
-        return JSONResponse(
-            content=jsonable_encoder({"saldo_pix": saldo_pix}, custom_encoder={Decimal: float})
+        return FastJSONResponse(
+            content={"saldo_pix": saldo_pix}
         )
     except Exception as e:
         print("[AUREA PIX] fallback /balance:", e)
-        return JSONResponse(
-            content=jsonable_encoder({"saldo_pix": 0.0}, custom_encoder={Decimal: float})
+        return FastJSONResponse(
+            content={"saldo_pix": 0.0}
         )
 
 @router.get("/history")
 def get_history(db: Session = Depends(get_db), user_id: int = 1, limit: int = 50):
     try:
         history = listar_historico(db, user_id, limit)
-        return JSONResponse(
-            content=jsonable_encoder({"history": history}, custom_encoder={Decimal: float})
+        return FastJSONResponse(
+            content={"history": history}
         )
     except Exception as e:
         print("[AUREA PIX] fallback /history:", e)
-        return JSONResponse(
-            content=jsonable_encoder({"history": []}, custom_encoder={Decimal: float})
+        return FastJSONResponse(
+            content={"history": []}
         )
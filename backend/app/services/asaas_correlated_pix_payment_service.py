@@ -8,13 +8,16 @@ from typing import Any
 
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from app.core import json_codec
 from app.models.idempotency import IdempotencyKey
 from app.partner.asaas_client import (
     AsaasPreparedRequest,
     AsaasSandboxClient,
 )
 from app.partner.asaas_payment_correlation import (
+    build_asaas_payment_correlation_row,
     build_asaas_payment_user_correlation_record,
+    remember_asaas_payment_correlation,
     generate_asaas_payment_external_reference,
     validate_asaas_payment_external_reference,
 )
@@ -146,7 +149,7 @@ def _stored_preparation_contract(
     correlation_record: IdempotencyKey,
     preparation_hash: str,
 ) -> str:
-    stored_contract = json.loads(
+    stored_contract = json_codec.loads(
         correlation_record.response_json or "{}"
     )
     stored_contract.update(
@@ -165,9 +168,8 @@ def _stored_preparation_contract(
             "real_money_enabled": False,
         }
     )
-    return json.dumps(
+    return json_codec.dumps(
         stored_contract,
-        ensure_ascii=False,
         sort_keys=True,
     )
 
@@ -184,7 +186,7 @@ def _existing_preparation_matches(
         return False
 
     try:
-        stored_contract = json.loads(
+        stored_contract = json_codec.loads(
             existing.response_json or "{}"
         )
     except (TypeError, ValueError, json.JSONDecodeError):
@@ -246,7 +248,7 @@ def prepare_asaas_correlated_pix_payment(
             ),
         )
     )
-    stored_correlation = json.loads(
+    stored_correlation = json_codec.loads(
         correlation_record.response_json or "{}"
     )
     normalized_user_id = int(
@@ -284,6 +286,12 @@ def prepare_asaas_correlated_pix_payment(
 
     try:
         db.add(correlation_record)
+        db.add(
+            build_asaas_payment_correlation_row(
+                correlation_key=correlation_record.key,
+                user_id=normalized_user_id,
+            )
+        )
         db.flush()
         db.commit()
     except IntegrityError:
@@ -311,6 +319,11 @@ def prepare_asaas_correlated_pix_payment(
             "da cobrança Asaas Sandbox."
         ) from None
 
+    remember_asaas_payment_correlation(
+        correlation_record.key,
+        normalized_user_id,
+    )
+
     return AsaasCorrelatedPixPaymentPreparation(
         user_id=normalized_user_id,
         external_reference=(
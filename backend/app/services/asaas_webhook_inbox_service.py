@@ -0,0 +1,198 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.observability import (
+    ASAAS_WEBHOOK_INBOX_DEPTH,
+    ASAAS_WEBHOOK_INBOX_LAG_SECONDS,
+    ASAAS_WEBHOOK_INBOX_PROCESSED_TOTAL,
+)
+from app.models.wallet_webhook_inbox import WalletWebhookInbox
+
+logger = logging.getLogger("aurea.asaas_inbox")
+
+INBOX_MAX_ATTEMPTS = 5
+# item em "processing" há mais que isso volta para a fila (worker caiu)
+INBOX_STALE_CLAIM_SECONDS = 300
+
+InboxProcessor = Callable[[Session, WalletWebhookInbox], str]
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def claim_inbox_batch(db: Session, *, batch_size: int = 50) -> list[int]:
+    """
+    Reserva até batch_size itens pendentes (FOR UPDATE SKIP LOCKED) e os
+    marca como processing, para vários workers drenarem sem disputa.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=INBOX_STALE_CLAIM_SECONDS)
+
+    items = db.execute(
+        select(WalletWebhookInbox)
+        .where(
+            or_(
+                WalletWebhookInbox.status == "pending",
+                and_(
+                    WalletWebhookInbox.status == "processing",
+                    WalletWebhookInbox.claimed_at < stale,
+                ),
+            )
+        )
+        .order_by(WalletWebhookInbox.id)
+        .limit(max(1, int(batch_size)))
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    for item in items:
+        item.status = "processing"
+        item.claimed_at = now
+
+    ids = [item.id for item in items]
+    db.commit()
+    return ids
+
+
+def refresh_inbox_depth(db: Session) -> int:
+    depth = int(
+        db.query(func.count(WalletWebhookInbox.id))
+        .filter(WalletWebhookInbox.status.in_(("pending", "processing")))
+        .scalar()
+        or 0
+    )
+    ASAAS_WEBHOOK_INBOX_DEPTH.set(depth)
+    return depth
+
+
+def drain_asaas_webhook_inbox(
+    db: Session,
+    *,
+    processor: InboxProcessor,
+    batch_size: int = 50,
+) -> dict:
+    """
+    Drena um lote da inbox. Cada item é processado e commitado sozinho;
+    falhas voltam para pending até INBOX_MAX_ATTEMPTS e depois viram failed.
+    """
+    counts: dict[str, int] = {}
+
+    for item_id in claim_inbox_batch(db, batch_size=batch_size):
+        item = db.get(WalletWebhookInbox, item_id)
+        if item is None:
+            continue
+
+        try:
+            outcome = processor(db, item)
+            now = datetime.now(timezone.utc)
+            item.status = "done"
+            item.outcome = outcome
+            item.processed_at = now
+            item.payload_json = None
+            item.last_error = None
+            db.commit()
+
+            received_at = _as_utc(item.received_at)
+            if received_at is not None:
+                ASAAS_WEBHOOK_INBOX_LAG_SECONDS.observe(
+                    max(0.0, (now - received_at).total_seconds())
+                )
+        except Exception as exc:
+            db.rollback()
+            item = db.get(WalletWebhookInbox, item_id)
+            if item is None:
+                continue
+
+            item.attempts = int(item.attempts or 0) + 1
+            item.last_error = type(exc).__name__[:255]
+            item.claimed_at = None
+            if item.attempts >= INBOX_MAX_ATTEMPTS:
+                outcome = "failed"
+                item.status = "failed"
+                item.payload_json = None
+            else:
+                outcome = "retry"
+                item.status = "pending"
+            db.commit()
+            logger.warning(
+                "asaas inbox item falhou",
+                extra={"inbox_id": item_id, "error": item.last_error, "attempts": item.attempts},
+            )
+
+        ASAAS_WEBHOOK_INBOX_PROCESSED_TOTAL.labels(outcome=outcome).inc()
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    refresh_inbox_depth(db)
+    return counts
+
+
+class AsaasWebhookInboxWorkerPool:
+    """
+    Threads que drenam a inbox em loop; cada volta usa uma sessão nova.
+    Dorme poll_interval segundos quando a fila está vazia.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Session],
+        processor: InboxProcessor,
+        workers: int = 2,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.processor = processor
+        self.workers = max(1, int(workers))
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def run_once(self) -> dict:
+        db = self.session_factory()
+        try:
+            return drain_asaas_webhook_inbox(
+                db,
+                processor=self.processor,
+                batch_size=self.batch_size,
+            )
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                counts = self.run_once()
+            except Exception:
+                logger.exception("asaas inbox worker: erro ao drenar lote")
+                counts = {}
+
+            if not counts:
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._loop,
+                name=f"asaas-inbox-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads.clear()
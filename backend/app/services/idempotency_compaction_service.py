@@ -0,0 +1,60 @@
+from sqlalchemy import Text, or_, select, type_coerce
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.core import compact_json
+from app.models.idempotency import IdempotencyKey
+
+
+def compact_legacy_idempotency_responses(
+    db: Session,
+    *,
+    batch_size: int = 500,
+    max_batches: int | None = None,
+) -> int:
+    """
+    Migração em background: regrava no formato compacto as linhas de
+    idempotency_keys ainda em JSON puro. Lotes pequenos, commit por lote,
+    avançando por id; pode ser interrompida e retomada a qualquer momento.
+
+    Devolve quantas linhas foram compactadas.
+    """
+    if compact_json.IDEMPOTENCY_RESPONSE_STORAGE != "compact":
+        return 0
+
+    batch_size = max(1, int(batch_size))
+    # compara o texto cru do banco, sem passar pelo TypeDecorator
+    raw = type_coerce(IdempotencyKey.response_json, Text)
+    last_id = 0
+    batches = 0
+    compacted = 0
+
+    while max_batches is None or batches < max_batches:
+        rows = db.execute(
+            select(IdempotencyKey)
+            .where(
+                IdempotencyKey.id > last_id,
+                or_(raw.like("{%"), raw.like("[%")),
+            )
+            .order_by(IdempotencyKey.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not rows:
+            break
+
+        for row in rows:
+            # o valor em Python não muda; o UPDATE passa pelo bind compacto
+            flag_modified(row, "response_json")
+            if compact_json.is_compact(compact_json.encode_for_storage(row.response_json)):
+                compacted += 1
+
+        last_id = rows[-1].id
+        db.commit()
+        db.expunge_all()
+        batches += 1
+
+        if len(rows) < batch_size:
+            break
+
+    return compacted
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import IDEMPOTENCY_INFLIGHT_WAIT_SEC
+from app.models.idempotency import IdempotencyKey
+
+# Request duplicado de uma key ainda em processamento espera o original
+# terminar (até IDEMPOTENCY_INFLIGHT_WAIT_SEC) e devolve a resposta gravada,
+# em vez de mandar o cliente tentar de novo em 30s.
+#  - mesmo processo: threading.Event por key
+#  - outros workers (Postgres): advisory lock de transação por key
+#  - outros bancos: polling curto na linha de idempotency_keys
+
+_POLL_MIN_SEC = 0.05
+_POLL_MAX_SEC = 0.25
+
+
+class InflightRegistry:
+    def __init__(self):
+        self._events: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> None:
+        with self._lock:
+            self._events.setdefault(key, threading.Event())
+
+    def finish(self, key: str) -> None:
+        with self._lock:
+            event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def wait(self, key: str, timeout: float) -> bool | None:
+        """True/False se a key é deste processo; None se não é."""
+        with self._lock:
+            event = self._events.get(key)
+        if event is None:
+            return None
+        return event.wait(timeout)
+
+
+inflight_registry = InflightRegistry()
+
+
+def _advisory_lock_id(key: str) -> int:
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def _is_postgres(db: Session) -> bool:
+    try:
+        return db.get_bind().dialect.name == "postgresql"
+    except Exception:
+        return False
+
+
+@contextmanager
+def idempotency_inflight(db: Session, key: str):
+    """
+    Marca a key como em processamento por quem a inseriu. Envolver até o
+    commit: ao sair, quem estiver esperando é liberado.
+    """
+    inflight_registry.begin(key)
+    try:
+        if _is_postgres(db):
+            # liberado sozinho no commit/rollback da transação dona
+            db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _advisory_lock_id(key)})
+        yield
+    finally:
+        inflight_registry.finish(key)
+
+
+def _load_completed(db: Session, key: str) -> tuple[bool, IdempotencyKey | None]:
+    """(linha existe, linha concluída ou None)."""
+    row = (
+        db.query(IdempotencyKey)
+        .filter_by(key=key)
+        .execution_options(populate_existing=True)
+        .first()
+    )
+    if row is None:
+        return False, None
+    return True, row if row.response_json else None
+
+
+def _wait_postgres(db: Session, key: str, timeout: float) -> None:
+    try:
+        db.execute(text(f"SET LOCAL lock_timeout = '{max(1, int(timeout * 1000))}ms'"))
+        db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _advisory_lock_id(key)})
+    except SQLAlchemyError:
+        pass
+    finally:
+        db.rollback()
+
+
+def wait_for_idempotency_completion(
+    db: Session,
+    key: str,
+    *,
+    timeout: float | None = None,
+) -> IdempotencyKey | None:
+    """
+    Espera a requisição original da key terminar. Devolve a linha concluída
+    (com response_json) ou None se o prazo acabou ou a original falhou.
+    """
+    timeout = IDEMPOTENCY_INFLIGHT_WAIT_SEC if timeout is None else timeout
+    if timeout <= 0:
+        return None
+
+    deadline = time.monotonic() + timeout
+
+    local = inflight_registry.wait(key, timeout)
+    if local is not None:
+        return _load_completed(db, key)[1]
+
+    if _is_postgres(db):
+        _wait_postgres(db, key, timeout)
+        return _load_completed(db, key)[1]
+
+    delay = _POLL_MIN_SEC
+    while True:
+        exists, completed = _load_completed(db, key)
+        if completed is not None or not exists:
+            return completed
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+
+        db.rollback()  # solta o snapshot antes de dormir
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, _POLL_MAX_SEC)
@@ -0,0 +1,216 @@
+import sqlite3
+import time
+from threading import Lock
+from typing import Callable, NamedTuple, Optional
+
+from app.config import (
+    IDEMPOTENCY_REPLAY_CACHE,
+    IDEMPOTENCY_REPLAY_CACHE_SIZE,
+    IDEMPOTENCY_REPLAY_CACHE_SQLITE_PATH,
+    IDEMPOTENCY_REPLAY_CACHE_TTL,
+)
+from app.core.lru_cache import BoundedTTLCache
+
+# Cache na frente de idempotency_keys só para respostas concluídas: o
+# replay de uma key conhecida volta daqui sem INSERT, IntegrityError nem
+# rollback. Registros em andamento nunca entram.
+
+
+class CachedReplay(NamedTuple):
+    """Mesmos campos usados de IdempotencyKey nos caminhos de replay."""
+
+    request_hash: Optional[str]
+    status_code: Optional[int]
+    response_json: str
+
+
+class MemoryReplayCache(BoundedTTLCache):
+    """LRU limitada por processo, com TTL."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(max_entries=max_entries, ttl=ttl, clock=clock)
+
+
+class SqliteReplayCache:
+    """
+    Cache em arquivo SQLite local, compartilhado pelos workers do host.
+    Limitado por TTL e por max_entries (remove os mais antigos).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_entries: int = 10_000,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.clock = clock
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS idempotency_replay_cache (
+                    key TEXT PRIMARY KEY,
+                    request_hash TEXT,
+                    status_code INTEGER,
+                    response_json TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_replay_cache_expires "
+                "ON idempotency_replay_cache (expires_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+
+    def get(self, key: str) -> Optional[CachedReplay]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT request_hash, status_code, response_json FROM idempotency_replay_cache "
+                "WHERE key = ? AND expires_at > ?",
+                (key, self.clock()),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        return CachedReplay(*row) if row else None
+
+    def put(self, key: str, entry: CachedReplay) -> None:
+        now = self.clock()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency_replay_cache "
+                "(key, request_hash, status_code, response_json, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, entry.request_hash, entry.status_code, entry.response_json, now + self.ttl),
+            )
+            conn.execute("DELETE FROM idempotency_replay_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                """
+                DELETE FROM idempotency_replay_cache
+                 WHERE key IN (
+                    SELECT key FROM idempotency_replay_cache
+                     ORDER BY expires_at DESC
+                     LIMIT -1 OFFSET ?
+                 )
+                """,
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def invalidate(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM idempotency_replay_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM idempotency_replay_cache")
+
+
+class NullReplayCache:
+    def get(self, key: str) -> Optional[CachedReplay]:
+        return None
+
+    def put(self, key: str, entry: CachedReplay) -> None:
+        return None
+
+    def invalidate(self, key: str) -> None:
+        return None
+
+    def clear(self) -> None:
+        return None
+
+
+_CACHE = None
+_CACHE_LOCK = Lock()
+
+
+def _build_cache(name: str):
+    if name == "off":
+        return NullReplayCache()
+    if name == "sqlite":
+        return SqliteReplayCache(
+            IDEMPOTENCY_REPLAY_CACHE_SQLITE_PATH,
+            max_entries=IDEMPOTENCY_REPLAY_CACHE_SIZE,
+            ttl=IDEMPOTENCY_REPLAY_CACHE_TTL,
+        )
+    return MemoryReplayCache(
+        max_entries=IDEMPOTENCY_REPLAY_CACHE_SIZE,
+        ttl=IDEMPOTENCY_REPLAY_CACHE_TTL,
+    )
+
+
+def get_replay_cache():
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = _build_cache(IDEMPOTENCY_REPLAY_CACHE)
+    return _CACHE
+
+
+def set_replay_cache(cache) -> None:
+    """Troca o cache em runtime (testes / bootstrap)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = cache
+
+
+def cached_replay(key: str) -> Optional[CachedReplay]:
+    try:
+        return get_replay_cache().get(key)
+    except Exception:
+        # cache é só atalho: qualquer falha cai no caminho da tabela
+        return None
+
+
+def remember_replay(
+    key: str,
+    *,
+    request_hash: Optional[str],
+    response_json: Optional[str],
+    status_code: Optional[int] = 200,
+) -> None:
+    """Guarda a resposta concluída; chamar só depois do commit."""
+    if not key or not response_json:
+        return
+
+    try:
+        get_replay_cache().put(
+            key,
+            CachedReplay(
+                request_hash=request_hash,
+                status_code=status_code,
+                response_json=response_json,
+            ),
+        )
+    except Exception:
+        pass
+
+
+def forget_replay(key: str) -> None:
+    try:
+        get_replay_cache().invalidate(key)
+    except Exception:
+        pass
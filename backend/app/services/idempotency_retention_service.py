@@ -0,0 +1,195 @@
+import gzip
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import (
+    IDEMPOTENCY_RETENTION_CORRELATION_DAYS,
+    IDEMPOTENCY_RETENTION_PIX_SEND_DAYS,
+    IDEMPOTENCY_RETENTION_WEBHOOK_DAYS,
+)
+from app.core import json_codec
+from app.models.asaas_payment_correlation import AsaasPaymentCorrelation
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.models.idempotency import (  # noqa: F401  reexportados
+    DEFAULT_IDEMPOTENCY_NAMESPACE,
+    IDEMPOTENCY_NAMESPACE_PREFIXES,
+    IdempotencyKey,
+    idempotency_namespace,
+)
+from app.partner.asaas_payment_correlation import forget_asaas_payment_correlation
+from app.services.idempotency_replay_cache import forget_replay
+
+logger = logging.getLogger("aurea.idempotency_retention")
+
+# namespaces cujas keys têm projeção em wallet_webhook_events
+_WEBHOOK_NAMESPACES = ("sandbox_webhook", "asaas_webhook")
+
+def retention_policies() -> dict[str, int]:
+    """Dias de retenção por namespace; 0 = nunca expira."""
+    return {
+        DEFAULT_IDEMPOTENCY_NAMESPACE: IDEMPOTENCY_RETENTION_PIX_SEND_DAYS,
+        "sandbox_webhook": IDEMPOTENCY_RETENTION_WEBHOOK_DAYS,
+        "asaas_webhook": IDEMPOTENCY_RETENTION_WEBHOOK_DAYS,
+        "asaas_correlation": IDEMPOTENCY_RETENTION_CORRELATION_DAYS,
+    }
+
+
+def _archive_rows(archive_dir: str, namespace: str, now: datetime, rows: list) -> None:
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(
+        archive_dir,
+        f"idempotency_keys-{namespace}-{now.strftime('%Y%m%d')}.ndjson.gz",
+    )
+
+    # cada lote vira um membro gzip novo; o arquivo continua legível inteiro
+    with gzip.open(path, "at", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(
+                json_codec.dumps(
+                    {
+                        "id": row.id,
+                        "key": row.key,
+                        "request_hash": row.request_hash,
+                        "status_code": row.status_code,
+                        "response_json": row.response_json,
+                        "created_at": row.created_at.isoformat() if row.created_at else None,
+                    }
+                )
+                + "\n"
+            )
+
+
+def purge_expired_idempotency_keys(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    batch_size: int = 500,
+    archive_dir: str | None = None,
+    policies: dict[str, int] | None = None,
+) -> dict[str, int]:
+    """
+    Remove (e opcionalmente arquiva em NDJSON gzip) as idempotency_keys
+    vencidas de cada namespace, em lotes com commit próprio.
+
+    O arquivo é escrito antes do DELETE: se o commit falhar, o lote pode
+    aparecer de novo no próximo arquivo (at-least-once). Projeções derivadas
+    da key (wallet_webhook_events, asaas_payment_correlations) saem no mesmo
+    lote, para extrato e reconciliação não divergirem.
+    """
+    now = now or datetime.now(timezone.utc)
+    batch_size = max(1, int(batch_size))
+    policies = retention_policies() if policies is None else policies
+    purged: dict[str, int] = {}
+
+    for namespace, days in policies.items():
+        if not days:
+            continue
+
+        cutoff = now - timedelta(days=days)
+        total = 0
+
+        while True:
+            rows = db.execute(
+                select(IdempotencyKey)
+                .where(IdempotencyKey.namespace == namespace, IdempotencyKey.created_at < cutoff)
+                .order_by(IdempotencyKey.created_at, IdempotencyKey.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not rows:
+                break
+
+            if archive_dir:
+                _archive_rows(archive_dir, namespace, now, rows)
+
+            ids = [row.id for row in rows]
+            for row in rows:
+                forget_replay(row.key)
+            if namespace in _WEBHOOK_NAMESPACES:
+                # o extrato lê a projeção; a reconciliação faz JOIN com a key
+                db.query(WalletWebhookEvent).filter(
+                    WalletWebhookEvent.idempotency_key.in_([row.key for row in rows])
+                ).delete(synchronize_session=False)
+            elif namespace == "asaas_correlation":
+                # a correlação materializada expira junto com o contrato
+                keys = [row.key for row in rows]
+                db.query(AsaasPaymentCorrelation).filter(
+                    AsaasPaymentCorrelation.correlation_key.in_(keys)
+                ).delete(synchronize_session=False)
+                for key in keys:
+                    forget_asaas_payment_correlation(key)
+            db.query(IdempotencyKey).filter(IdempotencyKey.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            db.expunge_all()
+            total += len(ids)
+
+            if len(rows) < batch_size:
+                break
+
+        purged[namespace] = total
+
+    return purged
+
+
+class IdempotencyPurgeScheduler:
+    """Thread que roda purge_expired_idempotency_keys a cada interval segundos."""
+
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Session],
+        interval: float,
+        archive_dir: str | None = None,
+        batch_size: int = 500,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> dict[str, int]:
+        db = self.session_factory()
+        try:
+            return purge_expired_idempotency_keys(
+                db,
+                batch_size=self.batch_size,
+                archive_dir=self.archive_dir,
+            )
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                purged = self.run_once()
+                if any(purged.values()):
+                    logger.info("idempotency_keys purge", extra={"purged": purged})
+            except Exception:
+                logger.exception("idempotency_keys purge falhou")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            name="idempotency-purge",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
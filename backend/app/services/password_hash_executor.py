@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from app.config import PASSWORD_HASH_QUEUE_MAX, PASSWORD_HASH_WORKERS
+from app.core.observability import (
+    AUTH_PASSWORD_HASH_DURATION_SECONDS,
+    AUTH_PASSWORD_HASH_QUEUE_WAIT_SECONDS,
+    AUTH_PASSWORD_HASH_REJECTED_TOTAL,
+)
+from app.utils.security import hash_password, verify_password
+
+# Pool dedicado para bcrypt (login/cadastro). Cada verify custa dezenas de
+# ms de CPU; rodando direto no threadpool do anyio, uma rajada de login
+# ocupa as threads que atendem /pix/send e webhooks.
+#
+# Thread pool (não processo): o bcrypt solta o GIL durante o hash, então
+# os workers usam núcleos de verdade sem custo de pickle/fork. O número de
+# workers limita quantos núcleos o bcrypt pode tomar; o limite de fila
+# limita quantas threads do anyio ficam paradas esperando. Acima disso o
+# pedido é recusado na hora (PasswordHashPoolSaturated -> 503).
+
+T = TypeVar("T")
+
+
+class PasswordHashPoolSaturated(Exception):
+    """Pool de hash cheio (workers ocupados + fila no limite)."""
+
+
+class PasswordHashExecutor:
+    def __init__(self, *, workers: int, queue_max: int):
+        self.workers = max(1, int(workers))
+        self.queue_max = max(0, int(queue_max))
+        # vagas = em execução + esperando na fila
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_max)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="password-hash",
+                    )
+        return self._pool
+
+    def run(self, operation: str, fn: Callable[..., T], *args) -> T:
+        """
+        Executa fn no pool e espera o resultado. Lança
+        PasswordHashPoolSaturated sem enfileirar quando não há vaga.
+        """
+        if not self._slots.acquire(blocking=False):
+            AUTH_PASSWORD_HASH_REJECTED_TOTAL.labels(operation=operation).inc()
+            raise PasswordHashPoolSaturated(operation)
+
+        submitted_at = time.perf_counter()
+
+        def _job():
+            started_at = time.perf_counter()
+            AUTH_PASSWORD_HASH_QUEUE_WAIT_SECONDS.labels(operation=operation).observe(
+                started_at - submitted_at
+            )
+            try:
+                return fn(*args)
+            finally:
+                AUTH_PASSWORD_HASH_DURATION_SECONDS.labels(operation=operation).observe(
+                    time.perf_counter() - started_at
+                )
+
+        try:
+            future = self._executor().submit(_job)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future.result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self.run("verify", verify_password, plain_password, hashed_password)
+
+    def hash(self, password: str) -> str:
+        return self.run("hash", hash_password, password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+password_hash_executor = PasswordHashExecutor(
+    workers=PASSWORD_HASH_WORKERS,
+    queue_max=PASSWORD_HASH_QUEUE_MAX,
+)
@@ -0,0 +1,292 @@
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import PIX_SEND_BATCH_DEFAULT_MODE, PIX_SEND_BATCH_MAX_ITEMS
+from app.core import json_codec
+from app.models.idempotency import IdempotencyKey, idempotency_namespace
+from app.models.pix_ledger import PixLedger
+from app.models.transaction import Transaction
+from app.services.idempotency_replay_cache import cached_replay, remember_replay
+from app.services.pix_rollup_service import record_daily_rollup
+from app.services.pix_send_mailbox import user_send_slot
+from app.services.pix_service import _IDEMPOTENCY_CONFLICT, _idem_hash, _replay_response
+from app.services.wallet_balance_service import lock_wallet_balance
+
+# Envio PIX em lote (folha/pagamentos de conta PJ): um turno na fila do
+# usuário, um lock do saldo, INSERTs em lote de transactions/pix_ledger/
+# idempotency_keys e um único commit.
+#
+# Cada item tem a mesma idempotência do envio unitário (mesma key, mesmo
+# hash, mesma resposta gravada): um item enviado em lote pode ser
+# reenviado em /pix/send com a mesma key e vira replay, e vice-versa.
+
+BATCH_MODES = ("atomic", "partial")
+
+_ZERO = Decimal("0.00")
+
+
+class PixBatchValidationError(ValueError):
+    """Lote malformado (vazio, grande demais, keys repetidas, modo inválido)."""
+
+
+@dataclass(frozen=True)
+class PixBatchItem:
+    valor: Decimal
+    chave_pix: str
+    descricao: str = "PIX"
+    idempotency_key: str | None = None
+
+
+@dataclass(frozen=True)
+class _PreparedItem:
+    index: int
+    valor: Decimal
+    chave_pix: str
+    descricao: str
+    idempotency_key: str | None
+    request_hash: str | None
+
+
+def _round_money(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _failed(item: _PreparedItem, code: str, error: str) -> dict:
+    return {
+        "index": item.index,
+        "status": "failed",
+        "valor": str(item.valor),
+        "idempotency_key": item.idempotency_key,
+        "code": code,
+        "error": error,
+    }
+
+
+def _replayed(item: _PreparedItem, stored) -> dict:
+    body = _replay_response(stored, item.request_hash)
+    if body.get("code") == _IDEMPOTENCY_CONFLICT["code"]:
+        return _failed(item, body["code"], body["error"])
+    return {**body, "index": item.index, "idempotency_key": item.idempotency_key, "replayed": True}
+
+
+def _prepare(user_id: int, items: list[PixBatchItem]) -> list[_PreparedItem]:
+    if not items:
+        raise PixBatchValidationError("Lote vazio")
+    if len(items) > PIX_SEND_BATCH_MAX_ITEMS:
+        raise PixBatchValidationError(f"Lote acima do limite de {PIX_SEND_BATCH_MAX_ITEMS} itens")
+
+    prepared = []
+    seen_keys = set()
+    for index, item in enumerate(items):
+        valor = _round_money(Decimal(item.valor))
+        if valor <= 0:
+            raise PixBatchValidationError(f"Item {index}: valor deve ser positivo")
+
+        key = item.idempotency_key or None
+        if key is not None:
+            if key in seen_keys:
+                raise PixBatchValidationError(f"Item {index}: Idempotency-Key repetida no lote")
+            seen_keys.add(key)
+
+        descricao = item.descricao or "PIX"
+        prepared.append(
+            _PreparedItem(
+                index=index,
+                valor=valor,
+                chave_pix=item.chave_pix,
+                descricao=descricao,
+                idempotency_key=key,
+                request_hash=(
+                    _idem_hash(user_id=user_id, valor=valor, chave_pix=item.chave_pix, descricao=descricao)
+                    if key
+                    else None
+                ),
+            )
+        )
+    return prepared
+
+
+def send_pix_batch(
+    db: Session,
+    *,
+    user_id: int,
+    items: list[PixBatchItem],
+    mode: str | None = None,
+) -> dict:
+    """
+    Envia os itens do lote numa transação só.
+
+    mode=atomic: qualquer item com falha (saldo, conflito de key, key em
+    processamento) recusa o lote inteiro, sem nenhuma escrita.
+    mode=partial: envia os itens válidos, na ordem, até onde o saldo der.
+    Replays de keys já concluídas contam como sucesso e não debitam de novo.
+    """
+    mode = mode or PIX_SEND_BATCH_DEFAULT_MODE
+    if mode not in BATCH_MODES:
+        raise PixBatchValidationError("mode deve ser atomic ou partial")
+
+    prepared = _prepare(user_id, items)
+
+    with user_send_slot(db, user_id):
+        return _send_batch_in_turn(db, user_id, prepared, mode)
+
+
+def _lookup_idempotency(db: Session, prepared: list[_PreparedItem], results: dict[int, dict]) -> None:
+    """Replays/conflitos/em processamento das keys do lote (cache, depois um IN)."""
+    pending = {}
+    for item in prepared:
+        if not item.idempotency_key:
+            continue
+        cached = cached_replay(item.idempotency_key)
+        if cached is not None:
+            results[item.index] = _replayed(item, cached)
+        else:
+            pending[item.idempotency_key] = item
+
+    if not pending:
+        return
+
+    rows = db.query(IdempotencyKey).filter(IdempotencyKey.key.in_(list(pending))).all()
+    for row in rows:
+        item = pending[row.key]
+        if row.response_json:
+            remember_replay(
+                row.key,
+                request_hash=row.request_hash,
+                response_json=row.response_json,
+                status_code=row.status_code,
+            )
+            results[item.index] = _replayed(item, row)
+        elif row.request_hash and row.request_hash != item.request_hash:
+            results[item.index] = _failed(item, _IDEMPOTENCY_CONFLICT["code"], _IDEMPOTENCY_CONFLICT["error"])
+        else:
+            results[item.index] = _failed(
+                item,
+                "IDEMPOTENCY_IN_PROGRESS",
+                "Requisição com este Idempotency-Key ainda está em processamento",
+            )
+
+
+def _summary(mode: str, prepared: list[_PreparedItem], results: dict[int, dict], total: Decimal) -> dict:
+    items = [results[item.index] for item in prepared]
+    succeeded = sum(1 for item in items if item["status"] == "success")
+    failed = len(items) - succeeded
+    if not failed:
+        status = "success"
+    elif succeeded and mode == "partial":
+        status = "partial"
+    else:
+        status = "rejected"
+
+    return {
+        "status": status,
+        "mode": mode,
+        "count": len(items),
+        "succeeded": succeeded,
+        "failed": failed,
+        "valor_total": str(_round_money(total)),
+        "items": items,
+    }
+
+
+def _send_batch_in_turn(db: Session, user_id: int, prepared: list[_PreparedItem], mode: str) -> dict:
+    results: dict[int, dict] = {}
+    _lookup_idempotency(db, prepared, results)
+
+    # um lock do saldo para o lote inteiro
+    balance = lock_wallet_balance(db, user_id)
+    remaining = Decimal(balance.available or 0)
+
+    to_send: list[_PreparedItem] = []
+    for item in prepared:
+        if item.index in results:
+            continue
+        if item.valor > remaining:
+            results[item.index] = _failed(item, "SALDO_INSUFICIENTE", "Saldo insuficiente")
+            continue
+        remaining -= item.valor
+        to_send.append(item)
+
+    has_failure = any(result["status"] != "success" for result in results.values())
+    if mode == "atomic" and has_failure:
+        db.rollback()
+        for item in to_send:
+            results[item.index] = _failed(item, "BATCH_REJECTED", "Lote recusado: outro item falhou")
+        return _summary(mode, prepared, results, _ZERO)
+
+    total = sum((item.valor for item in to_send), _ZERO)
+    stored: list[tuple[str, str, str]] = []
+
+    if to_send:
+        tx_ids = db.execute(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "tipo": "saida",
+                    "valor": float(item.valor),  # coluna no Postgres é double precision
+                    "referencia": item.chave_pix,
+                }
+                for item in to_send
+            ],
+        ).scalars().all()
+
+        db.execute(
+            insert(PixLedger),
+            [
+                {
+                    "user_id": user_id,
+                    "kind": "debit",
+                    "amount": item.valor,
+                    "ref_tx_id": tx_id,
+                    "description": item.descricao,
+                }
+                for item, tx_id in zip(to_send, tx_ids)
+            ],
+        )
+
+        # mesmo efeito de len(to_send) chamadas de apply_ledger_entry
+        balance.available = _round_money(Decimal(balance.available or 0) - total)
+        balance.version = int(balance.version or 0) + len(to_send)
+        record_daily_rollup(db, user_id=user_id, kind="debit", amount=total, count=len(to_send))
+
+        idempotency_rows = []
+        for item, tx_id in zip(to_send, tx_ids):
+            body = {
+                "id": tx_id,
+                "valor": str(float(item.valor)),
+                "taxa_percentual": "0.0000",
+                "taxa_valor": "0.00",
+                "valor_liquido": str(item.valor),
+                "status": "success",
+            }
+            results[item.index] = {
+                **body,
+                "index": item.index,
+                "idempotency_key": item.idempotency_key,
+                "replayed": False,
+            }
+            if item.idempotency_key:
+                response_json = json_codec.dumps(body)
+                stored.append((item.idempotency_key, item.request_hash, response_json))
+                idempotency_rows.append(
+                    {
+                        "key": item.idempotency_key,
+                        "namespace": idempotency_namespace(item.idempotency_key),
+                        "request_hash": item.request_hash,
+                        "status_code": 200,
+                        "response_json": response_json,
+                    }
+                )
+
+        if idempotency_rows:
+            db.execute(insert(IdempotencyKey), idempotency_rows)
+
+    db.commit()
+    for key, request_hash, response_json in stored:
+        remember_replay(key, request_hash=request_hash, response_json=response_json, status_code=200)
+
+    return _summary(mode, prepared, results, total)
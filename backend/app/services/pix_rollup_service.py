@@ -0,0 +1,218 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.pix_daily_rollup import PixDailyRollup
+from app.models.pix_ledger import PixLedger
+from app.models.wallet_balance import WalletBalance
+
+
+def rollup_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def record_daily_rollup(
+    db: Session,
+    *,
+    user_id: int,
+    kind: str,
+    amount: Decimal,
+    day: date | None = None,
+    count: int = 1,
+) -> PixDailyRollup:
+    """
+    Soma um lançamento (ou count lançamentos totalizando amount) ao rollup do dia.
+
+    Chamado por apply_ledger_entry com a linha de wallet_balances já travada,
+    então escritas do mesmo usuário chegam aqui serializadas.
+    """
+    day = day or rollup_today()
+    row = db.get(PixDailyRollup, (user_id, day))
+
+    if row is None:
+        row = PixDailyRollup(
+            user_id=user_id,
+            day=day,
+            entradas=Decimal("0.00"),
+            saidas=Decimal("0.00"),
+            count=0,
+        )
+        db.add(row)
+
+    amount = Decimal(amount)
+    if kind == "credit":
+        row.entradas = Decimal(row.entradas or 0) + amount
+    else:
+        row.saidas = Decimal(row.saidas or 0) + amount
+    row.count = int(row.count or 0) + int(count)
+
+    # deixa a linha no identity map para o próximo lançamento do mesmo dia
+    db.flush()
+    return row
+
+
+def get_daily_rollups(
+    db: Session,
+    user_id: int,
+    *,
+    start: date,
+    end: date,
+) -> list[PixDailyRollup]:
+    """Linhas de rollup em [start, end], ordenadas por dia."""
+    return (
+        db.query(PixDailyRollup)
+        .filter(
+            PixDailyRollup.user_id == user_id,
+            PixDailyRollup.day >= start,
+            PixDailyRollup.day <= end,
+        )
+        .order_by(PixDailyRollup.day)
+        .all()
+    )
+
+
+def last_days_series(db: Session, user_id: int, days: int = 7) -> list[dict]:
+    """
+    Série diária dos últimos `days` dias (inclui hoje), com zeros nos dias
+    sem movimento. saldo_dia é o líquido do próprio dia.
+    """
+    hoje = rollup_today()
+    inicio = hoje - timedelta(days=days - 1)
+    by_day = {
+        row.day: row
+        for row in get_daily_rollups(db, user_id, start=inicio, end=hoje)
+    }
+
+    out: list[dict] = []
+    for i in range(days):
+        d = inicio + timedelta(days=i)
+        row = by_day.get(d)
+        entradas = float(row.entradas or 0) if row else 0.0
+        saidas = float(row.saidas or 0) if row else 0.0
+        out.append(
+            {
+                "dia": d.isoformat(),
+                "entradas": entradas,
+                "saidas": saidas,
+                "saldo_dia": entradas - saidas,
+            }
+        )
+
+    return out
+
+
+def month_totals(db: Session, user_id: int, today: date | None = None) -> dict:
+    """Entradas, saídas e quantidade de lançamentos do mês corrente (UTC)."""
+    today = today or rollup_today()
+    row = (
+        db.query(
+            func.coalesce(func.sum(PixDailyRollup.entradas), 0),
+            func.coalesce(func.sum(PixDailyRollup.saidas), 0),
+            func.coalesce(func.sum(PixDailyRollup.count), 0),
+        )
+        .filter(
+            PixDailyRollup.user_id == user_id,
+            PixDailyRollup.day >= today.replace(day=1),
+            PixDailyRollup.day <= today,
+        )
+        .one()
+    )
+
+    return {
+        "entradas": Decimal(row[0] or 0),
+        "saidas": Decimal(row[1] or 0),
+        "count": int(row[2] or 0),
+    }
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _ledger_utc_day(db: Session):
+    """Dia (UTC) do lançamento, o mesmo balde de rollup_today() nas escritas."""
+    if db.get_bind().dialect.name == "postgresql":
+        # func.date() usaria o timezone da sessão
+        return func.date(func.timezone("UTC", PixLedger.created_at))
+    # sqlite grava CURRENT_TIMESTAMP em UTC
+    return func.date(PixLedger.created_at)
+
+
+def rebuild_daily_rollups(db: Session, *, chunk_size: int = 500) -> dict:
+    """
+    Backfill de pix_daily_rollup a partir de pix_ledger, em lotes de usuários.
+
+    Cada lote trava as linhas de wallet_balances dos seus usuários (o mesmo
+    lock que serializa record_daily_rollup), apaga e regrava os rollups e faz
+    commit próprio; envios concorrentes só esperam pelo lote atual.
+    """
+    chunk_size = max(1, int(chunk_size))
+    last_user_id = None
+    users = 0
+    rows_written = 0
+    day_expr = _ledger_utc_day(db)
+
+    while True:
+        ids_query = db.query(PixLedger.user_id).distinct()
+        if last_user_id is not None:
+            ids_query = ids_query.filter(PixLedger.user_id > last_user_id)
+
+        user_ids = [
+            row[0]
+            for row in ids_query.order_by(PixLedger.user_id).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            break
+
+        db.execute(
+            select(WalletBalance.user_id)
+            .where(WalletBalance.user_id.in_(user_ids))
+            .with_for_update()
+        ).all()
+
+        totals = (
+            db.query(
+                PixLedger.user_id,
+                day_expr,
+                func.coalesce(
+                    func.sum(case((PixLedger.kind == "credit", PixLedger.amount), else_=0)),
+                    0,
+                ),
+                func.coalesce(
+                    func.sum(case((PixLedger.kind == "debit", PixLedger.amount), else_=0)),
+                    0,
+                ),
+                func.count(PixLedger.id),
+            )
+            .filter(PixLedger.user_id.in_(user_ids))
+            .group_by(PixLedger.user_id, day_expr)
+            .all()
+        )
+
+        db.query(PixDailyRollup).filter(
+            PixDailyRollup.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+
+        for user_id, day, entradas, saidas, count in totals:
+            db.add(
+                PixDailyRollup(
+                    user_id=user_id,
+                    day=_as_date(day),
+                    entradas=Decimal(entradas or 0),
+                    saidas=Decimal(saidas or 0),
+                    count=int(count or 0),
+                )
+            )
+            rows_written += 1
+
+        db.commit()
+        users += len(user_ids)
+        last_user_id = user_ids[-1]
+
+    return {"users": users, "rows": rows_written}
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import PIX_SEND_MAILBOX_MAX_PENDING, PIX_SEND_MAILBOX_WAIT_SEC
+from app.core.observability import (
+    PIX_SEND_QUEUE_REJECTED_TOTAL,
+    PIX_SEND_QUEUE_WAIT_SECONDS,
+)
+
+# Envios PIX do mesmo usuário em fila (mailbox por user_id), antes de
+# chegar no banco. Sem isso, um lote de pagamentos do mesmo usuário (folha
+# de uma conta PJ) fica preso no FOR UPDATE de wallet_balances e cada
+# request parado segura uma conexão do pool (pool_size=5, max_overflow=10).
+#
+# - no processo: fila FIFO por usuário; quem espera não tem conexão aberta
+#   (a sessão devolve a conexão ao pool antes de entrar na fila);
+# - entre workers/processos (Postgres): pg_try_advisory_xact_lock por
+#   usuário, tentado com backoff e rollback entre tentativas, para não
+#   ficar bloqueado no banco segurando conexão. O lock cai no commit/
+#   rollback da transação do envio.
+
+# espaço (classid) dos advisory locks de envio: chave (int4, int4) não
+# colide com os locks de chave única bigint (idempotency_inflight)
+_ADVISORY_LOCK_CLASS = 0x50495853  # "PIXS"
+
+_RETRY_MIN_SEC = 0.01
+_RETRY_MAX_SEC = 0.2
+
+
+class PixSendQueueBusy(Exception):
+    """Fila de envios do usuário cheia ou espera acima do limite."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason  # full | timeout
+
+
+def _is_postgres(db: Session) -> bool:
+    try:
+        return db.get_bind().dialect.name == "postgresql"
+    except Exception:
+        return False
+
+
+def release_idle_connection(db: Session) -> None:
+    """
+    Devolve a conexão ao pool se a sessão só leu até aqui (ex: auth).
+    Com escrita pendente não mexe: rollback perderia a escrita.
+    """
+    try:
+        if not db.in_transaction() or db.new or db.dirty or db.deleted:
+            return
+    except AttributeError:  # sessões fake de teste
+        return
+    db.rollback()
+
+
+class UserSendMailbox:
+    def __init__(self, *, max_pending: int, wait_timeout: float):
+        self.max_pending = max(1, int(max_pending))
+        self.wait_timeout = max(0.0, float(wait_timeout))
+        self._lock = threading.Lock()
+        # user_id -> fila de Events; a cabeça é quem está enviando
+        self._queues: dict[int, deque] = {}
+
+    def pending(self, user_id: int) -> int:
+        with self._lock:
+            return len(self._queues.get(user_id, ()))
+
+    def _enqueue(self, user_id: int) -> threading.Event:
+        turn = threading.Event()
+        with self._lock:
+            queue = self._queues.setdefault(user_id, deque())
+            if len(queue) >= self.max_pending:
+                raise PixSendQueueBusy("full")
+            queue.append(turn)
+            if len(queue) == 1:
+                turn.set()
+        return turn
+
+    def _leave(self, user_id: int, turn: threading.Event) -> None:
+        with self._lock:
+            queue = self._queues.get(user_id)
+            if queue is None:
+                return
+            was_head = bool(queue) and queue[0] is turn
+            try:
+                queue.remove(turn)
+            except ValueError:
+                pass
+            if not queue:
+                del self._queues[user_id]
+            elif was_head:
+                queue[0].set()
+
+    @contextmanager
+    def turn(self, user_id: int, *, timeout: Optional[float] = None):
+        """Espera a vez do usuário (FIFO). Lança PixSendQueueBusy."""
+        timeout = self.wait_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        try:
+            turn = self._enqueue(user_id)
+        except PixSendQueueBusy:
+            PIX_SEND_QUEUE_REJECTED_TOTAL.labels(reason="full").inc()
+            raise
+
+        if not turn.wait(timeout):
+            with self._lock:
+                # a vez pode ter chegado entre o timeout e o lock
+                got_turn = turn.is_set()
+            if not got_turn:
+                self._leave(user_id, turn)
+                PIX_SEND_QUEUE_REJECTED_TOTAL.labels(reason="timeout").inc()
+                raise PixSendQueueBusy("timeout")
+
+        PIX_SEND_QUEUE_WAIT_SECONDS.labels(scope="local").observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._leave(user_id, turn)
+
+
+def acquire_user_send_lock(db: Session, user_id: int, *, deadline: float) -> None:
+    """
+    Postgres: trava os envios do usuário entre workers até o fim da
+    transação atual. Em outros bancos não faz nada.
+    """
+    if not _is_postgres(db):
+        return
+
+    started = time.perf_counter()
+    delay = _RETRY_MIN_SEC
+    while True:
+        acquired = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:cls, :uid)"),
+            {"cls": _ADVISORY_LOCK_CLASS, "uid": int(user_id)},
+        ).scalar()
+        if acquired:
+            PIX_SEND_QUEUE_WAIT_SECONDS.labels(scope="advisory").observe(time.perf_counter() - started)
+            return
+
+        # outro worker está enviando para este usuário: solta a conexão e tenta de novo
+        db.rollback()
+        if time.monotonic() + delay > deadline:
+            PIX_SEND_QUEUE_REJECTED_TOTAL.labels(reason="timeout").inc()
+            raise PixSendQueueBusy("timeout")
+        time.sleep(delay)
+        delay = min(delay * 2, _RETRY_MAX_SEC)
+
+
+@contextmanager
+def user_send_slot(db: Session, user_id: int, *, mailbox: Optional[UserSendMailbox] = None):
+    """
+    Vez exclusiva de envio do usuário: fila no processo + advisory lock
+    entre workers. O lock do banco é liberado pelo commit do envio.
+    """
+    mailbox = mailbox or pix_send_mailbox
+    release_idle_connection(db)
+    deadline = time.monotonic() + mailbox.wait_timeout
+    with mailbox.turn(user_id):
+        acquire_user_send_lock(db, user_id, deadline=deadline)
+        yield
+
+
+pix_send_mailbox = UserSendMailbox(
+    max_pending=PIX_SEND_MAILBOX_MAX_PENDING,
+    wait_timeout=PIX_SEND_MAILBOX_WAIT_SEC,
+)
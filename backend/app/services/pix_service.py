@@ -1,12 +1,23 @@
 from sqlalchemy.exc import IntegrityError
 import hashlib
-import json
+from contextlib import nullcontext
 from decimal import Decimal, ROUND_HALF_UP
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
 
+from app.config import WALLET_BALANCE_LOCK_MODE
+from app.core import json_codec
 from app.models.transaction import Transaction
-from app.models.pix_ledger import PixLedger
+from app.services.idempotency_inflight import (
+    idempotency_inflight,
+    wait_for_idempotency_completion,
+)
+from app.services.idempotency_replay_cache import cached_replay, remember_replay
+from app.services.pix_send_mailbox import user_send_slot
+from app.services.wallet_balance_service import (
+    apply_ledger_entry,
+    debit_wallet_balance_optimistic,
+    lock_wallet_balance,
+)
 
 
 def _round_money(value: Decimal) -> Decimal:
@@ -19,24 +30,18 @@ def _idem_hash(user_id: int, valor: Decimal, chave_pix: str, descricao: str) ->
     return hashlib.sha256(msg).hexdigest()
 
 
-def _get_user_balance(db: Session, user_id: int) -> Decimal:
-    result = (
-        db.query(
-            func.coalesce(
-                func.sum(
-                    case(
-                        (PixLedger.kind == "credit", PixLedger.amount),
-                        else_=-PixLedger.amount,
-                    )
-                ),
-                0,
-            )
-        )
-        .filter(PixLedger.user_id == user_id)
-        .scalar()
-    )
+_IDEMPOTENCY_CONFLICT = {
+    "status": "conflict",
+    "error": "Idempotency-Key reuse com payload diferente",
+    "code": "IDEMPOTENCY_KEY_REUSE_DIFFERENT_PAYLOAD",
+}
 
-    return Decimal(result or 0)
+
+def _replay_response(stored, req_hash: str) -> dict:
+    """Replay de resposta concluída (linha da tabela ou entrada do cache)."""
+    if getattr(stored, "request_hash", None) and stored.request_hash != req_hash:
+        return dict(_IDEMPOTENCY_CONFLICT)
+    return json_codec.loads(stored.response_json)
 
 
 def send_pix(
@@ -54,11 +59,36 @@ def send_pix(
     # - replay se mesma key+payload
     # - 409 se mesma key com payload diferente
     # -----------------------------
+    req_hash = None
     if idempotency_key:
-        from app.models.idempotency import IdempotencyKey
-
         req_hash = _idem_hash(user_id=user_id, valor=valor, chave_pix=chave_pix, descricao=descricao)
 
+        # replay quente: key concluída responde do cache, sem INSERT/rollback
+        cached = cached_replay(idempotency_key)
+        if cached is not None:
+            return _replay_response(cached, req_hash)
+
+    # pessimistic: um envio por vez por usuário; quem espera não segura conexão
+    # do pool. PixSendQueueBusy sobe para a rota (429).
+    # optimistic: sem fila nem advisory lock; envios concorrentes disputam o
+    # UPDATE por version e quem perde tenta de novo (debit_wallet_balance_optimistic)
+    slot = nullcontext() if WALLET_BALANCE_LOCK_MODE == "optimistic" else user_send_slot(db, user_id)
+    with slot:
+        return _send_pix_in_turn(db, user_id, valor, chave_pix, descricao, idempotency_key, req_hash)
+
+
+def _send_pix_in_turn(
+    db: Session,
+    user_id: int,
+    valor: Decimal,
+    chave_pix: str,
+    descricao: str,
+    idempotency_key: str | None,
+    req_hash: str | None,
+):
+    if idempotency_key:
+        from app.models.idempotency import IdempotencyKey
+
         try:
             record = IdempotencyKey(key=idempotency_key, request_hash=req_hash)
             db.add(record)
@@ -69,19 +99,31 @@ def send_pix(
             if not existing:
                 raise
 
+            # replay (já concluído) ou conflito de payload
+            if existing.response_json:
+                remember_replay(
+                    idempotency_key,
+                    request_hash=existing.request_hash,
+                    response_json=existing.response_json,
+                    status_code=existing.status_code,
+                )
+                return _replay_response(existing, req_hash)
+
             # reuso com payload diferente = conflito
             if getattr(existing, "request_hash", None) and existing.request_hash != req_hash:
-                return {
-                    "status": "conflict",
-                    "error": "Idempotency-Key reuse com payload diferente",
-                    "code": "IDEMPOTENCY_KEY_REUSE_DIFFERENT_PAYLOAD",
-                }
-
-            # replay (já concluído)
-            if existing.response_json:
-                return json.loads(existing.response_json)
+                return dict(_IDEMPOTENCY_CONFLICT)
+
+            # ainda em processamento (concorrência): espera a original terminar
+            completed = wait_for_idempotency_completion(db, idempotency_key)
+            if completed is not None:
+                remember_replay(
+                    idempotency_key,
+                    request_hash=completed.request_hash,
+                    response_json=completed.response_json,
+                    status_code=completed.status_code,
+                )
+                return _replay_response(completed, req_hash)
 
-            # ainda em processamento (concorrência)
             return {
                 "status": "in_progress",
                 "error": "Requisição com este Idempotency-Key ainda está em processamento",
@@ -90,24 +132,37 @@ def send_pix(
 
     # -----------------------------
 
+    # duplicados concorrentes esperam este bloco terminar (commit incluso)
+    inflight = idempotency_inflight(db, idempotency_key) if idempotency_key else nullcontext()
+    with inflight:
+        return _debit_pix(db, user_id, valor, chave_pix, descricao, idempotency_key)
 
+
+def _debit_pix(
+    db: Session,
+    user_id: int,
+    valor: Decimal,
+    chave_pix: str,
+    descricao: str,
+    idempotency_key: str | None,
+):
     taxa_percentual = Decimal("0.0000")
     taxa_valor = Decimal("0.00")
     valor_liquido = valor
 
-    from sqlalchemy import select
-    from app.models.pix_ledger import PixLedger
-
-    db.execute(
-        select(PixLedger)
-        .where(PixLedger.user_id == user_id)
-        .with_for_update()
-    )
+    optimistic = WALLET_BALANCE_LOCK_MODE == "optimistic"
+    if optimistic:
+        # UPDATE condicional por version, sem esperar lock na leitura.
+        # WalletBalanceConflict sobe para a rota (409).
+        debit_wallet_balance_optimistic(db, user_id=user_id, amount=valor)
+        balance = None
+    else:
+        # trava só a linha materializada de saldo (O(1), independe do histórico)
+        balance = lock_wallet_balance(db, user_id)
+        saldo_atual = Decimal(balance.available or 0)
 
-    saldo_atual = _get_user_balance(db, user_id)
-
-    if saldo_atual < valor:
-        raise ValueError("Saldo insuficiente")
+        if saldo_atual < valor:
+            raise ValueError("Saldo insuficiente")
 
     tx = Transaction(
         user_id=user_id,
@@ -119,23 +174,23 @@ def send_pix(
     db.add(tx)
     db.flush()
 
-    ledger_entry = PixLedger(
+    apply_ledger_entry(
+        db,
         user_id=user_id,
         kind="debit",
         amount=valor,
         ref_tx_id=tx.id,
         description=descricao,
+        balance=balance,
+        balance_applied=optimistic,
     )
 
-    db.add(ledger_entry)
-
     if idempotency_key:
         from app.models.idempotency import IdempotencyKey
-        # import json (module-level)
         record = db.query(IdempotencyKey).filter_by(key=idempotency_key).first()
         if record:
             record.status_code = 200
-            record.response_json = json.dumps({
+            record.response_json = json_codec.dumps({
                 "id": tx.id,
                 "valor": str(tx.valor),
                 "taxa_percentual": str(taxa_percentual),
@@ -143,8 +198,17 @@ def send_pix(
                 "valor_liquido": str(valor_liquido),
                 "status": "success"
             })
+    else:
+        record = None
 
     db.commit()
+    if record is not None:
+        remember_replay(
+            idempotency_key,
+            request_hash=record.request_hash,
+            response_json=record.response_json,
+            status_code=record.status_code,
+        )
     db.refresh(tx)
 
     tx.valor = valor
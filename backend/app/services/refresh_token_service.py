@@ -0,0 +1,216 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    REFRESH_TOKEN_MAX_ACTIVE_PER_USER,
+    REFRESH_TOKEN_REVOKED_RETENTION_HOURS,
+)
+from app.models.refresh_token import RefreshToken
+from app.utils.security import (
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    generate_refresh_token,
+    hash_refresh_token,
+)
+
+logger = logging.getLogger("aurea.refresh_tokens")
+
+# Refresh tokens opacos: o cliente guarda o valor cru, o banco só o sha256.
+# - lookup/rotação: um UPDATE ... RETURNING pelo índice único de
+#   token_hash, que revoga o token antigo e devolve o dono no mesmo
+#   comando (dois refresh concorrentes com o mesmo token: só um ganha);
+# - limite de sessões ativas por usuário: as mais antigas são revogadas;
+# - purge em lotes de expirados e revogados (índices de expires_at e
+#   parcial de revoked_at).
+
+
+def issue_refresh_token(
+    db: Session,
+    *,
+    user_id: int,
+    now: Optional[datetime] = None,
+    max_active: Optional[int] = None,
+) -> str:
+    """Cria a sessão e devolve o token cru. Commit fica com o chamador."""
+    now = now or datetime.now(timezone.utc)
+    raw_token = generate_refresh_token()
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            token_hash=hash_refresh_token(raw_token),
+            expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            created_at=now,
+        )
+    )
+    db.flush()
+    revoke_excess_refresh_tokens(
+        db,
+        user_id=user_id,
+        now=now,
+        max_active=REFRESH_TOKEN_MAX_ACTIVE_PER_USER if max_active is None else max_active,
+    )
+    return raw_token
+
+
+def revoke_excess_refresh_tokens(
+    db: Session,
+    *,
+    user_id: int,
+    max_active: int,
+    now: Optional[datetime] = None,
+) -> int:
+    """Revoga as sessões ativas do usuário além das max_active mais novas."""
+    now = now or datetime.now(timezone.utc)
+    newest = (
+        select(RefreshToken.id)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .order_by(RefreshToken.created_at.desc(), RefreshToken.id.desc())
+        .limit(max(1, int(max_active)))
+    )
+    result = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.id.not_in(newest.scalar_subquery()),
+        )
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
+
+
+def rotate_refresh_token(
+    db: Session,
+    raw_token: str,
+    *,
+    now: Optional[datetime] = None,
+) -> Optional[Tuple[int, str]]:
+    """
+    Revoga o token apresentado e emite outro para o mesmo usuário.
+    Devolve (user_id, novo token cru), ou None se o token não existe, já
+    foi usado/revogado ou expirou. Commit fica com o chamador.
+    """
+    now = now or datetime.now(timezone.utc)
+    user_id = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == hash_refresh_token(raw_token),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+
+    if user_id is None:
+        return None
+
+    return user_id, issue_refresh_token(db, user_id=user_id, now=now)
+
+
+def purge_refresh_tokens(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    batch_size: int = 1000,
+    revoked_retention_hours: Optional[int] = None,
+) -> dict[str, int]:
+    """
+    Apaga, em lotes com commit próprio, refresh tokens expirados e os
+    revogados há mais de revoked_retention_hours.
+    """
+    now = now or datetime.now(timezone.utc)
+    batch_size = max(1, int(batch_size))
+    if revoked_retention_hours is None:
+        revoked_retention_hours = REFRESH_TOKEN_REVOKED_RETENTION_HOURS
+
+    # uma passada por índice em vez de um OR que não usa nenhum dos dois
+    conditions = {
+        "expired": RefreshToken.expires_at < now,
+        "revoked": RefreshToken.revoked_at < now - timedelta(hours=revoked_retention_hours),
+    }
+    purged: dict[str, int] = {}
+
+    for reason, condition in conditions.items():
+        total = 0
+        while True:
+            ids = db.execute(
+                select(RefreshToken.id).where(condition).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            db.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            total += len(ids)
+
+            if len(ids) < batch_size:
+                break
+
+        purged[reason] = total
+
+    return purged
+
+
+class RefreshTokenPurgeScheduler:
+    """Thread que roda purge_refresh_tokens a cada interval segundos."""
+
+    def __init__(
+        self,
+        *,
+        session_factory: Callable[[], Session],
+        interval: float,
+        batch_size: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> dict[str, int]:
+        db = self.session_factory()
+        try:
+            return purge_refresh_tokens(db, batch_size=self.batch_size)
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                purged = self.run_once()
+                if any(purged.values()):
+                    logger.info("refresh_tokens purge", extra={"purged": purged})
+            except Exception:
+                logger.exception("refresh_tokens purge falhou")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            name="refresh-token-purge",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
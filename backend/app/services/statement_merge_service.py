@@ -0,0 +1,91 @@
+import base64
+import heapq
+import json
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
+
+from app.partner.types import StatementItem
+
+# Extrato de várias fontes (parceiro, webhooks sandbox/Asaas) em ordem de
+# created_at desc. Cada fonte é um iterador preguiçoso já ordenado pela
+# mesma chave; heapq.merge só puxa o próximo item da fonte que vai sair,
+# então cada fonte busca apenas o que a página consome (mais o lote em
+# andamento), em vez de limit itens por fonte.
+
+# (created_at, fonte, provider_reference): ordem total, estável entre páginas
+StatementPosition = Tuple[datetime, str, str]
+
+_NO_DATE = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def statement_created_at(item: StatementItem) -> datetime:
+    """created_at do item como datetime UTC; sem data vai para o fim."""
+    raw = getattr(item, "created_at", None)
+    if not raw:
+        return _NO_DATE
+
+    try:
+        value = raw if isinstance(raw, datetime) else datetime.fromisoformat(str(raw))
+    except ValueError:
+        return _NO_DATE
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def statement_position(source: str, item: StatementItem) -> StatementPosition:
+    return (statement_created_at(item), source, str(item.provider_reference or ""))
+
+
+def encode_statement_cursor(position: StatementPosition) -> str:
+    created_at, source, reference = position
+    raw = json.dumps([created_at.isoformat(), source, reference], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_statement_cursor(cursor: str) -> StatementPosition:
+    """Lança ValueError se o cursor não foi gerado por encode_statement_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, source, reference = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = datetime.fromisoformat(created_raw)
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return created_at, str(source), str(reference)
+    except Exception:
+        raise ValueError("cursor de extrato inválido") from None
+
+
+def sorted_statement_source(source: str, items: Iterable[StatementItem]) -> Iterator[StatementItem]:
+    """Para fontes sem paginação/ordem garantida (ex: adapter do parceiro)."""
+    return iter(sorted(items, key=lambda item: statement_position(source, item), reverse=True))
+
+
+def _tagged(source: str, items: Iterable[StatementItem]):
+    for item in items:
+        yield statement_position(source, item), item
+
+
+def merge_statement_sources(
+    sources: dict[str, Iterable[StatementItem]],
+    *,
+    limit: int,
+    after: Optional[StatementPosition] = None,
+) -> Tuple[list[StatementItem], Optional[str]]:
+    """
+    k-way merge das fontes (cada uma já em ordem desc de posição) e devolve
+    a página e o next_cursor; None quando nenhuma fonte tem mais itens.
+    """
+    merged = heapq.merge(
+        *(_tagged(source, items) for source, items in sources.items()),
+        key=lambda entry: entry[0],
+        reverse=True,
+    )
+    if after is not None:
+        merged = (entry for entry in merged if entry[0] < after)
+
+    page = list(islice(merged, limit + 1))
+    next_cursor = encode_statement_cursor(page[limit - 1][0]) if len(page) > limit else None
+    return [item for _position, item in page[:limit]], next_cursor
@@ -0,0 +1,290 @@
+import random
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import case, exists, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import WALLET_BALANCE_OPTIMISTIC_ATTEMPTS, WALLET_BALANCE_OPTIMISTIC_BACKOFF_MS
+from app.core.observability import WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL
+from app.models.pix_ledger import PixLedger
+from app.models.wallet_balance import WalletBalance
+from app.services.pix_rollup_service import record_daily_rollup
+
+
+def _round_money(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _signed_ledger_amount():
+    return case(
+        (PixLedger.kind == "credit", PixLedger.amount),
+        else_=-PixLedger.amount,
+    )
+
+
+def ledger_balance(db: Session, user_id: int) -> Decimal:
+    """SUM completo do ledger; usado só para materializar/reconstruir o saldo."""
+    result = (
+        db.query(func.coalesce(func.sum(_signed_ledger_amount()), 0))
+        .filter(PixLedger.user_id == user_id)
+        .scalar()
+    )
+
+    return Decimal(result or 0)
+
+
+def _select_balance_for_update(db: Session, user_id: int) -> WalletBalance | None:
+    return db.execute(
+        select(WalletBalance)
+        .where(WalletBalance.user_id == user_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+
+
+def lock_wallet_balance(db: Session, user_id: int) -> WalletBalance:
+    """
+    Trava (FOR UPDATE) a linha de saldo do usuário.
+
+    Contas sem linha ainda (primeira movimentação ou anteriores à tabela)
+    são materializadas a partir do ledger dentro de um savepoint; se outra
+    transação criar a linha antes, reaproveita a dela.
+    """
+    balance = _select_balance_for_update(db, user_id)
+    if balance is not None:
+        return balance
+
+    try:
+        with db.begin_nested():
+            db.add(
+                WalletBalance(
+                    user_id=user_id,
+                    available=_round_money(ledger_balance(db, user_id)),
+                    version=0,
+                )
+            )
+    except IntegrityError:
+        pass
+
+    return _select_balance_for_update(db, user_id)
+
+
+class WalletBalanceConflict(Exception):
+    """Débito otimista perdeu para escritas concorrentes em todas as tentativas."""
+
+
+def _read_balance_version(db: Session, user_id: int) -> tuple[Decimal, int] | None:
+    row = db.execute(
+        select(WalletBalance.available, WalletBalance.version)
+        .where(WalletBalance.user_id == user_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    return Decimal(row.available or 0), int(row.version or 0)
+
+
+def debit_wallet_balance_optimistic(
+    db: Session,
+    *,
+    user_id: int,
+    amount: Decimal,
+    max_attempts: int | None = None,
+    backoff_ms: float | None = None,
+) -> int:
+    """
+    Debita o saldo sem SELECT ... FOR UPDATE: lê (available, version) e faz
+
+        UPDATE wallet_balances SET available = available - :v, version = version + 1
+        WHERE user_id = :u AND version = :ver AND available >= :v
+
+    Se outra escrita mudou a version entre a leitura e o UPDATE, relê e tenta
+    de novo (até max_attempts, com backoff exponencial e jitter). Devolve a
+    nova version. Lança ValueError com saldo insuficiente e
+    WalletBalanceConflict quando as tentativas acabam.
+
+    A linha fica travada só do UPDATE até o commit de quem chama, então o
+    ledger e o rollup gravados depois continuam serializados por usuário.
+    """
+    amount = _round_money(Decimal(amount))
+    attempts = WALLET_BALANCE_OPTIMISTIC_ATTEMPTS if max_attempts is None else max(1, int(max_attempts))
+    backoff = (WALLET_BALANCE_OPTIMISTIC_BACKOFF_MS if backoff_ms is None else max(0.0, float(backoff_ms))) / 1000
+
+    for attempt in range(attempts):
+        current = _read_balance_version(db, user_id)
+        if current is None:
+            # primeira movimentação: materializa a linha (caminho pessimista, uma vez)
+            lock_wallet_balance(db, user_id)
+            current = _read_balance_version(db, user_id)
+
+        available, version = current
+        if available < amount:
+            raise ValueError("Saldo insuficiente")
+
+        new_version = db.execute(
+            update(WalletBalance)
+            .where(
+                WalletBalance.user_id == user_id,
+                WalletBalance.version == version,
+                WalletBalance.available >= amount,
+            )
+            .values(
+                available=WalletBalance.available - amount,
+                version=WalletBalance.version + 1,
+            )
+            .returning(WalletBalance.version)
+            .execution_options(synchronize_session="fetch")
+        ).scalar_one_or_none()
+        if new_version is not None:
+            return int(new_version)
+
+        if attempt + 1 < attempts:
+            WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL.labels(outcome="retried").inc()
+            if backoff:
+                time.sleep(random.uniform(0, backoff * (2 ** attempt)))
+
+    WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL.labels(outcome="exhausted").inc()
+    raise WalletBalanceConflict(f"saldo do usuário {user_id} mudou em {attempts} tentativas")
+
+
+def apply_ledger_entry(
+    db: Session,
+    *,
+    user_id: int,
+    kind: str,
+    amount: Decimal,
+    ref_tx_id: int | None = None,
+    description: str | None = None,
+    balance: WalletBalance | None = None,
+    balance_applied: bool = False,
+) -> PixLedger:
+    """
+    Insere um lançamento em pix_ledger e atualiza wallet_balances junto.
+
+    Único caminho de escrita no ledger pelo ORM (saldo e pix_daily_rollup
+    andam juntos); o commit fica com quem chama. balance_applied=True quando
+    o saldo já foi debitado por debit_wallet_balance_optimistic na mesma
+    transação: grava só o lançamento e o rollup.
+    """
+    if kind not in ("credit", "debit"):
+        raise ValueError("kind inválido para ledger")
+
+    amount = _round_money(Decimal(amount))
+    if balance is None and not balance_applied:
+        balance = lock_wallet_balance(db, user_id)
+
+    entry = PixLedger(
+        user_id=user_id,
+        kind=kind,
+        amount=amount,
+        ref_tx_id=ref_tx_id,
+        description=description,
+    )
+    db.add(entry)
+
+    if not balance_applied:
+        delta = amount if kind == "credit" else -amount
+        balance.available = _round_money(Decimal(balance.available or 0) + delta)
+        balance.version = int(balance.version or 0) + 1
+
+    record_daily_rollup(db, user_id=user_id, kind=kind, amount=amount)
+
+    return entry
+
+
+def get_available_balance(db: Session, user_id: int) -> Decimal:
+    """Leitura O(1) do saldo; cai no SUM do ledger se a linha ainda não existe."""
+    available = (
+        db.query(WalletBalance.available)
+        .filter(WalletBalance.user_id == user_id)
+        .scalar()
+    )
+
+    if available is None:
+        return ledger_balance(db, user_id)
+
+    return Decimal(available)
+
+
+def rebuild_wallet_balances(db: Session, *, chunk_size: int = 500) -> dict:
+    """
+    Recalcula wallet_balances a partir de pix_ledger, em lotes de usuários.
+
+    Cada lote trava as linhas de saldo existentes antes de somar o ledger
+    e faz commit próprio, então envios concorrentes só esperam pelo lote atual.
+    """
+    chunk_size = max(1, int(chunk_size))
+    last_user_id = None
+    users = 0
+    updated = 0
+
+    while True:
+        ids_query = db.query(PixLedger.user_id).distinct()
+        if last_user_id is not None:
+            ids_query = ids_query.filter(PixLedger.user_id > last_user_id)
+
+        user_ids = [
+            row[0]
+            for row in ids_query.order_by(PixLedger.user_id).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            break
+
+        existing = {
+            row.user_id: row
+            for row in db.execute(
+                select(WalletBalance)
+                .where(WalletBalance.user_id.in_(user_ids))
+                .with_for_update()
+            ).scalars()
+        }
+
+        totals = dict(
+            db.query(
+                PixLedger.user_id,
+                func.coalesce(func.sum(_signed_ledger_amount()), 0),
+            )
+            .filter(PixLedger.user_id.in_(user_ids))
+            .group_by(PixLedger.user_id)
+            .all()
+        )
+
+        for user_id in user_ids:
+            available = _round_money(Decimal(totals.get(user_id) or 0))
+            balance = existing.get(user_id)
+
+            if balance is None:
+                db.add(WalletBalance(user_id=user_id, available=available, version=0))
+                updated += 1
+            elif Decimal(balance.available or 0) != available:
+                balance.available = available
+                balance.version = int(balance.version or 0) + 1
+                updated += 1
+
+        db.commit()
+        users += len(user_ids)
+        last_user_id = user_ids[-1]
+
+    # saldos sem nenhum lançamento no ledger voltam a zero
+    while True:
+        orphans = db.execute(
+            select(WalletBalance)
+            .where(
+                WalletBalance.available != 0,
+                ~exists().where(PixLedger.user_id == WalletBalance.user_id),
+            )
+            .order_by(WalletBalance.user_id)
+            .limit(chunk_size)
+            .with_for_update()
+        ).scalars().all()
+        if not orphans:
+            break
+
+        for balance in orphans:
+            balance.available = Decimal("0.00")
+            balance.version = int(balance.version or 0) + 1
+            updated += 1
+
+        db.commit()
+
+    return {"users": users, "updated": updated}
@@ -19,6 +19,11 @@ def get_wallet_balance(*, user_id: int) -> PartnerBalance:
     return adapter.get_balance(user_id=user_id)
 
 
+async def aget_wallet_balance(*, user_id: int) -> PartnerBalance:
+    adapter = get_partner_adapter()
+    return await adapter.aget_balance(user_id=user_id)
+
+
 def create_wallet_pix_payment(
     *,
     user_id: int,
@@ -62,6 +67,11 @@ def get_wallet_statement(*, user_id: int, limit: int = 50) -> list[StatementItem
     return adapter.get_statement(user_id=user_id, limit=limit)
 
 
+async def aget_wallet_statement(*, user_id: int, limit: int = 50) -> list[StatementItem]:
+    adapter = get_partner_adapter()
+    return await adapter.aget_statement(user_id=user_id, limit=limit)
+
+
 def handle_wallet_webhook(event: PartnerWebhookEvent) -> dict:
     adapter = get_partner_adapter()
     return adapter.handle_webhook(event)
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models.pix_transaction import PixTransaction
+from app.services.pix_rollup_service import last_days_series, month_totals
+from app.services.wallet_balance_service import get_available_balance
+from app.utils.pagination import Cursor, apply_keyset, keyset_page
+
+
+class WalletReadService:
+    """
+    Leituras de carteira (saldo e histórico PIX) chamadas in-process.
+
+    Usado pelas rotas PIX e pelas rotas de IA com a sessão do próprio
+    request, então um chat consulta o banco sem voltar pela API via HTTP.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_balance(self, user_id: int) -> dict:
+        saldo = float(get_available_balance(self.db, user_id))
+        totais_mes = month_totals(self.db, user_id)
+
+        return {
+            "saldo": saldo,
+            "saldo_atual": saldo,  # compat painel/IA
+            "entradas_mes": float(totais_mes["entradas"]),
+            "saidas_mes": float(totais_mes["saidas"]),
+            "ultimos_7d": last_days_series(self.db, user_id, days=7),
+            "updated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "source": "real",
+        }
+
+    def get_history(self, user_id: int, *, limit: int = 50) -> list[dict]:
+        items, _next_cursor = self.get_history_page(user_id, limit=limit)
+        return items
+
+    def get_history_page(
+        self,
+        user_id: int,
+        *,
+        limit: int = 50,
+        cursor: Cursor | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Página de histórico por keyset (criado_em, id); devolve (itens, next_cursor)."""
+        safe_limit = max(1, min(int(limit or 50), 100))
+
+        query = self.db.query(PixTransaction).filter(PixTransaction.user_id == user_id)
+        txs = (
+            apply_keyset(query, PixTransaction.criado_em, PixTransaction.id, cursor)
+            .limit(safe_limit + 1)
+            .all()
+        )
+        txs, next_cursor = keyset_page(txs, safe_limit, created_attr="criado_em")
+
+        items = [
+            {
+                "id": t.id,
+                "tipo": t.tipo,
+                "valor": float(getattr(t, "valor", 0) or 0),
+                "descricao": getattr(t, "descricao", None) or "",
+                "taxa_percentual": float(getattr(t, "taxa_percentual", 0) or 0),
+                "taxa_valor": float(getattr(t, "taxa_valor", 0) or 0),
+                "valor_liquido": float(
+                    getattr(t, "valor_liquido", getattr(t, "valor", 0)) or 0
+                ),
+                "criado_em": getattr(t, "criado_em", None),
+            }
+            for t in txs
+        ]
+
+        return items, next_cursor
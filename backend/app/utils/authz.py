@@ -1,15 +1,81 @@
 from fastapi import Depends, HTTPException, status, Request
+from sqlalchemy import event, inspect as sa_inspect
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 import jwt
 JWTError = jwt.InvalidTokenError
 import os
+import time
 
+from app.core.lru_cache import BoundedTTLCache
+from app.core.observability import AUTH_IDENTITY_CACHE_TOTAL
 from app.database import get_db
 from app.models.user_main import User
 from app.utils.security import SECRET_KEY, ALGORITHM
 
 
+# ---- Cache de identidade (sub, exp) -> snapshot do usuário ----
+# TTL curto e tamanho limitado; 0 em AUTH_IDENTITY_CACHE_TTL desliga.
+IDENTITY_CACHE_TTL = float(os.getenv("AUTH_IDENTITY_CACHE_TTL", "60") or 0)
+IDENTITY_CACHE_SIZE = int(os.getenv("AUTH_IDENTITY_CACHE_SIZE", "1024") or 0)
+
+_SNAPSHOT_FIELDS = ("id", "email", "full_name", "role")
+
+_identity_cache = BoundedTTLCache(max_entries=max(1, IDENTITY_CACHE_SIZE), ttl=IDENTITY_CACHE_TTL)
+
+
+def _identity_get(key: tuple) -> dict | None:
+    return _identity_cache.get(key)
+
+
+def _identity_put(key: tuple, snapshot: dict, token_exp) -> None:
+    if IDENTITY_CACHE_TTL <= 0 or IDENTITY_CACHE_SIZE <= 0:
+        return
+
+    ttl = IDENTITY_CACHE_TTL
+    if token_exp is not None:
+        try:
+            ttl = min(ttl, float(token_exp) - time.time())
+        except (TypeError, ValueError):
+            pass
+    if ttl <= 0:
+        return
+
+    _identity_cache.put(key, snapshot, ttl=ttl)
+
+
+def _user_from_snapshot(snapshot: dict) -> User:
+    # instância transiente (fora de sessão); cada request recebe a sua
+    return User(**snapshot)
+
+
+def invalidate_identity(*, user_id: int | None = None, sub: str | None = None) -> int:
+    """
+    Remove do cache as identidades de um usuário (por id e/ou sub).
+    Chamar quando email/role mudarem fora do ORM; updates via ORM já disparam.
+    """
+    return _identity_cache.invalidate_where(
+        lambda key, snapshot: (user_id is not None and snapshot.get("id") == user_id)
+        or (sub is not None and key[0] == sub)
+    )
+
+
+def clear_identity_cache() -> None:
+    _identity_cache.clear()
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_identity_on_update(_mapper, _connection, target) -> None:
+    state = sa_inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("email", "role")):
+        invalidate_identity(user_id=target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_identity_on_delete(_mapper, _connection, target) -> None:
+    invalidate_identity(user_id=target.id)
+
+
 def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,6 +96,14 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     except JWTError:
         raise credentials_exception
 
+    cache_key = (username, payload.get("exp"))
+    snapshot = _identity_get(cache_key)
+    if snapshot is not None:
+        AUTH_IDENTITY_CACHE_TOTAL.labels(result="hit").inc()
+        return _user_from_snapshot(snapshot)
+
+    AUTH_IDENTITY_CACHE_TOTAL.labels(result="miss").inc()
+
     user = db.query(User).filter(
         or_(User.username == username, User.email == username)
     ).first()
@@ -37,6 +111,12 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     if user is None:
         raise credentials_exception
 
+    _identity_put(
+        cache_key,
+        {name: getattr(user, name) for name in _SNAPSHOT_FIELDS},
+        payload.get("exp"),
+    )
+
     return user
 
 
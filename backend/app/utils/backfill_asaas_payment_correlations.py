@@ -0,0 +1,25 @@
+import argparse
+
+from app.database import SessionLocal
+from app.partner.asaas_payment_correlation import backfill_asaas_payment_correlations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Materializa em asaas_payment_correlations as correlações gravadas só em idempotency_keys.",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = backfill_asaas_payment_correlations(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"✅ asaas_payment_correlations: {result} correlações materializadas")
+    return result
+
+
+if __name__ == "__main__":
+    main()
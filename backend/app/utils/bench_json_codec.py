@@ -0,0 +1,107 @@
+import argparse
+import json
+import timeit
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import json_codec
+
+
+def _sample_webhook_response() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "ok": True,
+        "service": "aurea-wallet",
+        "duplicated": False,
+        "event": {
+            "provider": "asaas",
+            "event_type": "PAYMENT_RECEIVED",
+            "status": "confirmed",
+            "amount": Decimal("1234.56"),
+            "received_at": now,
+        },
+        "idempotency": {"key": "asaas-sandbox-webhook:" + "a" * 64, "replayed": False},
+        "audit": {
+            "correlation": {"user_id": 42, "correlation_status": "resolved"},
+            "notice": "Evento Asaas Sandbox auditado. Nenhum dinheiro real foi movimentado.",
+        },
+        "limitations": ["Não credita saldo real."] * 6,
+    }
+
+
+def _sample_history() -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": i,
+            "tipo": "envio" if i % 2 else "recebimento",
+            "valor": Decimal("10.50") * i,
+            "descricao": "PIX",
+            "taxa_percentual": Decimal("0.0000"),
+            "taxa_valor": Decimal("0.00"),
+            "valor_liquido": Decimal("10.50") * i,
+            "created_at": now,
+        }
+        for i in range(50)
+    ]
+
+
+def _webhook_stdlib(response: dict) -> str:
+    # caminho antigo: normaliza duas vezes e serializa de novo para gravar
+    stored = json.loads(json.dumps(response, ensure_ascii=False, default=str))
+    public = json.loads(json.dumps(stored, ensure_ascii=False, default=str))
+    json.dumps(public, ensure_ascii=False, default=str)
+    return json.dumps(stored, ensure_ascii=False, default=str)
+
+
+def _webhook_codec(response: dict) -> str:
+    stored = json_codec.normalize(response)
+    json_codec.normalize(stored)
+    return json_codec.dumps(stored)
+
+
+def _history_stdlib(history: list) -> bytes:
+    return JSONResponse(content=jsonable_encoder(history, custom_encoder={Decimal: float})).body
+
+
+def _history_codec(history: list) -> bytes:
+    return json_codec.FastJSONResponse(content=history).body
+
+
+def run(iterations: int = 2000) -> dict:
+    """Custo médio por request (µs) de cada caminho de serialização."""
+    response = _sample_webhook_response()
+    history = _sample_history()
+    cases = {
+        "webhook_stdlib": lambda: _webhook_stdlib(response),
+        "webhook_codec": lambda: _webhook_codec(response),
+        "history_stdlib": lambda: _history_stdlib(history),
+        "history_codec": lambda: _history_codec(history),
+    }
+    return {
+        name: timeit.timeit(fn, number=iterations) / iterations * 1_000_000
+        for name, fn in cases.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mede o custo de serialização JSON por request (stdlib x json_codec).",
+    )
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    result = run(max(1, args.iterations))
+
+    backend = "orjson" if json_codec.HAS_ORJSON else "json (stdlib, orjson ausente)"
+    print(f"codec: {backend}")
+    for name, micros in result.items():
+        print(f"{name:<16} {micros:10.1f} µs/request")
+    return result
+
+
+if __name__ == "__main__":
+    main()
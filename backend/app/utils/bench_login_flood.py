@@ -0,0 +1,101 @@
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.services.password_hash_executor import (
+    PasswordHashExecutor,
+    PasswordHashPoolSaturated,
+)
+
+# Simula o threadpool do anyio (40 threads por padrão) atendendo uma rajada
+# de logins junto com requests leves (ex: /pix/send). Compara bcrypt direto
+# na thread do request com bcrypt no pool dedicado com fila limitada.
+
+
+def _light_request() -> None:
+    # trabalho de uma rota comum: pouca CPU
+    sum(i * i for i in range(2_000))
+
+
+def _run(mode: str, *, logins: int, requests: int, threads: int, rounds: int, workers: int, queue_max: int) -> dict:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("senha-bench")
+    executor = PasswordHashExecutor(workers=workers, queue_max=queue_max)
+    rejected = 0
+    rejected_lock = threading.Lock()
+
+    def login():
+        nonlocal rejected
+        if mode == "direct":
+            context.verify("senha-bench", hashed)
+            return
+        try:
+            executor.run("verify", context.verify, "senha-bench", hashed)
+        except PasswordHashPoolSaturated:
+            with rejected_lock:
+                rejected += 1
+
+    latencies = []
+
+    def light(enqueued_at: float):
+        _light_request()
+        latencies.append(time.perf_counter() - enqueued_at)
+
+    with ThreadPoolExecutor(max_workers=threads) as anyio_pool:
+        for _ in range(logins):
+            anyio_pool.submit(login)
+        # requests leves chegam no meio da rajada
+        for _ in range(requests):
+            anyio_pool.submit(light, time.perf_counter())
+            time.sleep(0.002)
+
+    executor.shutdown()
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+        "rejected_logins": rejected,
+    }
+
+
+def run(*, logins: int = 400, requests: int = 200, threads: int = 40, rounds: int = 10, workers: int = 2, queue_max: int = 16) -> dict:
+    """Latência dos requests leves durante a rajada de login, por modo."""
+    options = dict(logins=logins, requests=requests, threads=threads, rounds=rounds, workers=workers, queue_max=queue_max)
+    return {mode: _run(mode, **options) for mode in ("direct", "pool")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Latência de rotas leves durante rajada de login (bcrypt direto x pool dedicado).",
+    )
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=40, help="tamanho do threadpool simulado do anyio")
+    parser.add_argument("--rounds", type=int, default=10, help="custo do bcrypt")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-max", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    result = run(
+        logins=max(1, args.logins),
+        requests=max(1, args.requests),
+        threads=max(1, args.threads),
+        rounds=min(max(4, args.rounds), 16),
+        workers=max(1, args.workers),
+        queue_max=max(0, args.queue_max),
+    )
+
+    for mode, stats in result.items():
+        print(
+            f"{mode:<7} p50={stats['p50_ms']:8.1f} ms  p99={stats['p99_ms']:8.1f} ms  "
+            f"logins recusados={stats['rejected_logins']}"
+        )
+    return result
+
+
+if __name__ == "__main__":
+    main()
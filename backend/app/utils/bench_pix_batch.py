@@ -0,0 +1,96 @@
+import argparse
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  registra todas as tabelas
+from app.database import Base
+from app.services.pix_batch_service import PixBatchItem, send_pix_batch
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import apply_ledger_entry
+
+# Compara N envios unitários (um lock/commit por envio, como N chamadas de
+# /pix/send) com um lote de N itens (um lock, INSERTs em lote, um commit).
+# Banco sqlite em arquivo temporário, com as tabelas do app.
+
+
+def _session_factory(path: Path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def _fund(db, user_id: int, items: int) -> None:
+    apply_ledger_entry(db, user_id=user_id, kind="credit", amount=Decimal(items) * Decimal("10.00"))
+    db.commit()
+
+
+def _run_single(db, *, user_id: int, items: int) -> float:
+    started = time.perf_counter()
+    for index in range(items):
+        send_pix(
+            db,
+            user_id=user_id,
+            valor=Decimal("1.00"),
+            chave_pix=f"dest-{index}@pix",
+            idempotency_key=f"bench-single-{index}",
+        )
+    return time.perf_counter() - started
+
+
+def _run_batch(db, *, user_id: int, items: int) -> float:
+    batch = [
+        PixBatchItem(valor=Decimal("1.00"), chave_pix=f"dest-{index}@pix", idempotency_key=f"bench-batch-{index}")
+        for index in range(items)
+    ]
+    started = time.perf_counter()
+    result = send_pix_batch(db, user_id=user_id, items=batch, mode="atomic")
+    elapsed = time.perf_counter() - started
+    if result["succeeded"] != items:
+        raise RuntimeError(f"lote falhou: {result['failed']} itens")
+    return elapsed
+
+
+def run(*, items: int = 100) -> dict:
+    """Tempo de N envios unitários x um lote de N itens."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session = _session_factory(Path(tmp) / "bench_pix_batch.db")
+        db = Session()
+        try:
+            _fund(db, 1, items)
+            _fund(db, 2, items)
+            single = _run_single(db, user_id=1, items=items)
+            batch = _run_batch(db, user_id=2, items=items)
+        finally:
+            db.close()
+            engine.dispose()
+
+    return {
+        "single_ms": single * 1000,
+        "batch_ms": batch * 1000,
+        "speedup": single / batch if batch else float("inf"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Tempo de N envios PIX unitários x um envio em lote de N itens (sqlite temporário).",
+    )
+    parser.add_argument("--items", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    items = max(1, args.items)
+    result = run(items=items)
+
+    print(f"unitário {items:>4}x  {result['single_ms']:9.1f} ms")
+    print(f"lote     {items:>4}   {result['batch_ms']:9.1f} ms")
+    print(f"speedup  {result['speedup']:.1f}x")
+    return result
+
+
+if __name__ == "__main__":
+    main()
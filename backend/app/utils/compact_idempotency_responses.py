@@ -0,0 +1,35 @@
+import argparse
+
+from app.database import SessionLocal
+from app.services.idempotency_compaction_service import compact_legacy_idempotency_responses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Regrava idempotency_keys.response_json legado (JSON puro) no formato compacto, em lotes.",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--max-batches",
+        type=int,
+        default=None,
+        help="Para depois de N lotes (rodar de novo continua de onde parou).",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = compact_legacy_idempotency_responses(
+            db,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+        )
+    finally:
+        db.close()
+
+    print(f"✅ idempotency_keys compactadas: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
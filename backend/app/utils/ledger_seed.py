@@ -1,29 +1,37 @@
 import os
 from decimal import Decimal, InvalidOperation
 
-from sqlalchemy import inspect, text
-from app.database import engine
+from sqlalchemy import exists, inspect, text
+from app.database import SessionLocal, engine
+from app.models import User
+from app.models.pix_ledger import PixLedger
+from app.services.wallet_balance_service import apply_ledger_entry
 
-DDL_USER_MAIN = """
-INSERT INTO pix_ledger (user_id, kind, amount, ref_tx_id, description, created_at)
-SELECT u.id, 'credit', u.saldo, NULL, 'seed saldo inicial', CURRENT_TIMESTAMP
+SELECT_USER_MAIN = """
+SELECT u.id, u.saldo
 FROM user_main u
 WHERE u.saldo IS NOT NULL
   AND u.saldo > 0
   AND NOT EXISTS (
     SELECT 1 FROM pix_ledger l WHERE l.user_id = u.id
-  );
+  )
+ORDER BY u.id;
 """
 
-DDL_ADMIN_USERS = """
-INSERT INTO pix_ledger (user_id, kind, amount, ref_tx_id, description, created_at)
-SELECT u.id, 'credit', :amount, NULL, :description, CURRENT_TIMESTAMP
-FROM users u
-WHERE u.role = 'admin'
-  AND NOT EXISTS (
-    SELECT 1 FROM pix_ledger l WHERE l.user_id = u.id
-  );
-"""
+
+def _seed_credits(db, credits) -> int:
+    # apply_ledger_entry: wallet_balances e pix_daily_rollup andam junto com o ledger
+    for user_id, amount, description in credits:
+        apply_ledger_entry(
+            db,
+            user_id=int(user_id),
+            kind="credit",
+            amount=Decimal(amount),
+            description=description,
+        )
+    db.commit()
+    return len(credits)
+
 
 def seed_ledger_from_users():
     """Seed idempotente.
@@ -33,12 +41,16 @@ def seed_ledger_from_users():
     insp = inspect(engine)
     tables = set(insp.get_table_names())
 
-    with engine.begin() as conn:
+    db = SessionLocal()
+    try:
         if "user_main" in tables:
             cols = {c.get("name") for c in insp.get_columns("user_main")}
             if "saldo" in cols:
-                conn.execute(text(DDL_USER_MAIN))
-                return {"mode": "user_main.saldo"}
+                rows = db.execute(text(SELECT_USER_MAIN)).all()
+                seeded = _seed_credits(
+                    db, [(user_id, saldo, "seed saldo inicial") for user_id, saldo in rows]
+                )
+                return {"mode": "user_main.saldo", "users": seeded}
 
         amount_raw = os.getenv("SEED_ADMIN_CREDIT", "").strip()
         if not amount_raw:
@@ -50,8 +62,15 @@ def seed_ledger_from_users():
         if amount <= 0:
             raise RuntimeError("SEED_ADMIN_CREDIT deve ser > 0.")
 
-        conn.execute(
-            text(DDL_ADMIN_USERS),
-            {"amount": amount, "description": f"seed admin initial credit ({amount})"},
+        # pelo ORM: a coluna de users é "type" (User.role)
+        rows = (
+            db.query(User.id)
+            .filter(User.role == "admin", ~exists().where(PixLedger.user_id == User.id))
+            .order_by(User.id)
+            .all()
         )
-        return {"mode": "users.role=admin", "amount": str(amount)}
+        description = f"seed admin initial credit ({amount})"
+        seeded = _seed_credits(db, [(row[0], amount, description) for row in rows])
+        return {"mode": "users.role=admin", "amount": str(amount), "users": seeded}
+    finally:
+        db.close()
@@ -0,0 +1,73 @@
+import base64
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Paginação keyset por (created_at, id) desc: cada página custa o mesmo,
+# não importa a profundidade. O cursor é opaco para o cliente.
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{int(row_id)}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Lança ValueError se o cursor não foi gerado por encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_raw, id_raw = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_raw), int(id_raw)
+    except Exception:
+        raise ValueError("cursor inválido") from None
+
+
+def parse_cursor_param(cursor: Optional[str]) -> Optional[Cursor]:
+    if not cursor:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Cursor de paginação inválido.") from None
+
+
+def apply_keyset(query, created_col, id_col, cursor: Optional[Cursor]):
+    """Filtra após o cursor e ordena por (created_at desc, id desc)."""
+    if cursor is not None:
+        created_at, row_id = cursor
+        query = query.filter(
+            or_(
+                created_col < created_at,
+                and_(created_col == created_at, id_col < row_id),
+            )
+        )
+
+    return query.order_by(created_col.desc(), id_col.desc())
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    limit: int,
+    *,
+    created_attr: str = "created_at",
+) -> Tuple[list, Optional[str]]:
+    """
+    Recebe até limit + 1 linhas (já ordenadas) e devolve a página e o
+    next_cursor; None quando não há mais registros.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+
+    last = page[-1]
+    created_at = getattr(last, created_attr, None)
+    if created_at is None:
+        return page, None
+
+    return page, encode_cursor(created_at, last.id)
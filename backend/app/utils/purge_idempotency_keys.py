@@ -0,0 +1,36 @@
+import argparse
+
+from app.config import IDEMPOTENCY_ARCHIVE_DIR
+from app.database import SessionLocal
+from app.services.idempotency_retention_service import purge_expired_idempotency_keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Remove idempotency_keys vencidas por namespace, arquivando em NDJSON gzip.",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--archive-dir",
+        default=IDEMPOTENCY_ARCHIVE_DIR,
+        help="Diretório dos arquivos .ndjson.gz (sem ele, só apaga).",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = purge_expired_idempotency_keys(
+            db,
+            batch_size=args.batch_size,
+            archive_dir=args.archive_dir,
+        )
+    finally:
+        db.close()
+
+    resumo = ", ".join(f"{ns}={count}" for ns, count in result.items()) or "nada a fazer"
+    print(f"✅ idempotency_keys purge: {resumo}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+
+from app.config import REFRESH_TOKEN_REVOKED_RETENTION_HOURS
+from app.database import SessionLocal
+from app.services.refresh_token_service import purge_refresh_tokens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Remove refresh tokens expirados e revogados, em lotes.",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--revoked-retention-hours",
+        type=int,
+        default=REFRESH_TOKEN_REVOKED_RETENTION_HOURS,
+        help="Horas que um token revogado fica antes de ser apagado.",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = purge_refresh_tokens(
+            db,
+            batch_size=args.batch_size,
+            revoked_retention_hours=max(0, args.revoked_retention_hours),
+        )
+    finally:
+        db.close()
+
+    print(f"✅ refresh_tokens purge: expirados={result['expired']}, revogados={result['revoked']}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,299 @@
+import math
+import sqlite3
 import time
-from collections import deque
+from collections import OrderedDict
 from threading import Lock
-from typing import Deque, Dict, Tuple
+from typing import Callable, Optional, Tuple
 
-_BUCKETS: Dict[str, Deque[float]] = {}
-_LOCK = Lock()
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
 
-def rl_check(key: str, max_hits: int, window_sec: int) -> Tuple[bool, int]:
-    """Retorna (allowed, retry_after_seconds)."""
-    now = time.monotonic()
-    if max_hits <= 0 or window_sec <= 0:
-        return True, 0
+from app.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_SQLITE_PATH,
+)
+from app.models.rate_limit_bucket import RateLimitBucket
+
+# Contador de janela deslizante: guarda só (janela atual, contagem atual,
+# contagem anterior) por chave e estima os hits dos últimos window_sec
+# ponderando a janela anterior. Memória O(1) por chave, sem deque.
+
+_EVICT_INTERVAL_SEC = 60.0
+
+State = Tuple[int, int, int]  # (window_index, curr_count, prev_count)
+
+
+def _roll(state: Optional[State], window_index: int) -> Tuple[int, int]:
+    """Traz o estado salvo para a janela atual; devolve (curr, prev)."""
+    if state is None:
+        return 0, 0
 
-    with _LOCK:
-        q = _BUCKETS.get(key)
-        if q is None:
-            q = deque()
-            _BUCKETS[key] = q
+    saved_index, curr, prev = state
+    if saved_index == window_index:
+        return curr, prev
+    if saved_index == window_index - 1:
+        return 0, curr
+    return 0, 0
 
-        cutoff = now - window_sec
-        while q and q[0] <= cutoff:
-            q.popleft()
 
-        if len(q) >= max_hits:
-            retry_after = int(max(1, window_sec - (now - q[0])))
-            return False, retry_after
+def _evaluate(
+    curr: int,
+    prev: int,
+    now: float,
+    max_hits: int,
+    window_sec: int,
+) -> Tuple[bool, int]:
+    elapsed = now % window_sec
+    estimated = prev * (1 - elapsed / window_sec) + curr
 
-        q.append(now)
+    if estimated < max_hits:
         return True, 0
 
+    if curr >= max_hits:
+        # só libera na próxima janela, depois que o peso desta cair
+        wait = (window_sec - elapsed) + (1 - max_hits / curr) * window_sec
+    else:
+        wait = (1 - (max_hits - curr) / prev) * window_sec - elapsed
 
-def rl_peek(key: str, max_hits: int, window_sec: int) -> Tuple[bool, int]:
-    """Checa se está bloqueado SEM consumir tentativa."""
-    now = time.monotonic()
+    return False, int(max(1, math.ceil(wait)))
+
+
+class MemoryRateLimitBackend:
+    """
+    Backend em memória do processo (padrão). Limite vale por worker.
+
+    Chaves expiradas são varridas a cada _EVICT_INTERVAL_SEC e o total
+    de chaves é limitado (descarta as menos recentes).
+    """
+
+    def __init__(self, *, max_keys: int = 100_000, clock: Callable[[], float] = time.time):
+        self.max_keys = max(1, int(max_keys))
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[int, int, int, float]]" = OrderedDict()
+        self._lock = Lock()
+        self._next_evict = 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        if now >= self._next_evict:
+            expired = [k for k, v in self._buckets.items() if v[3] <= now]
+            for key in expired:
+                del self._buckets[key]
+            self._next_evict = now + _EVICT_INTERVAL_SEC
+
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def hit(self, key: str, max_hits: int, window_sec: int, *, consume: bool) -> Tuple[bool, int]:
+        now = self.clock()
+        window_index = int(now // window_sec)
+
+        with self._lock:
+            self._evict(now)
+
+            saved = self._buckets.get(key)
+            curr, prev = _roll(saved[:3] if saved else None, window_index)
+            allowed, retry_after = _evaluate(curr, prev, now, max_hits, window_sec)
+
+            if allowed and consume:
+                expires_at = (window_index + 2) * window_sec
+                self._buckets[key] = (window_index, curr + 1, prev, expires_at)
+                self._buckets.move_to_end(key)
+                self._evict(now)
+
+            return allowed, retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SqliteRateLimitBackend:
+    """
+    Backend em arquivo SQLite local: todos os workers do mesmo host
+    compartilham o limite. BEGIN IMMEDIATE serializa as escritas.
+    """
+
+    def __init__(self, path: str, *, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._next_evict = 0.0
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    key TEXT PRIMARY KEY,
+                    window_index INTEGER NOT NULL,
+                    curr_count INTEGER NOT NULL,
+                    prev_count INTEGER NOT NULL,
+                    expires_at INTEGER NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+
+    def hit(self, key: str, max_hits: int, window_sec: int, *, consume: bool) -> Tuple[bool, int]:
+        now = self.clock()
+        window_index = int(now // window_sec)
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if consume else "BEGIN")
+
+            if consume and now >= self._next_evict:
+                conn.execute("DELETE FROM rate_limit_buckets WHERE expires_at <= ?", (int(now),))
+                self._next_evict = now + _EVICT_INTERVAL_SEC
+
+            saved = conn.execute(
+                "SELECT window_index, curr_count, prev_count FROM rate_limit_buckets WHERE key = ?",
+                (key,),
+            ).fetchone()
+            curr, prev = _roll(tuple(saved) if saved else None, window_index)
+            allowed, retry_after = _evaluate(curr, prev, now, max_hits, window_sec)
+
+            if allowed and consume:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO rate_limit_buckets
+                        (key, window_index, curr_count, prev_count, expires_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (key, window_index, curr + 1, prev, (window_index + 2) * window_sec),
+                )
+
+            conn.execute("COMMIT")
+            return allowed, retry_after
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reset(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rate_limit_buckets")
+
+
+class DatabaseRateLimitBackend:
+    """
+    Backend na tabela rate_limit_buckets do banco principal (Postgres em
+    produção): limite único entre hosts. Trava só a linha da chave.
+    """
+
+    def __init__(self, session_factory=None, *, clock: Callable[[], float] = time.time):
+        if session_factory is None:
+            from app.database import SessionLocal
+
+            session_factory = SessionLocal
+
+        self.session_factory = session_factory
+        self.clock = clock
+        self._next_evict = 0.0
+
+    def hit(self, key: str, max_hits: int, window_sec: int, *, consume: bool) -> Tuple[bool, int]:
+        now = self.clock()
+        window_index = int(now // window_sec)
+        expires_at = (window_index + 2) * window_sec
+
+        db = self.session_factory()
+        try:
+            if consume and now >= self._next_evict:
+                db.execute(delete(RateLimitBucket).where(RateLimitBucket.expires_at <= int(now)))
+                db.commit()
+                self._next_evict = now + _EVICT_INTERVAL_SEC
+
+            for _attempt in range(2):
+                query = select(RateLimitBucket).where(RateLimitBucket.key == key)
+                if consume:
+                    query = query.with_for_update()
+                row = db.execute(query).scalar_one_or_none()
+
+                saved = (row.window_index, row.curr_count, row.prev_count) if row else None
+                curr, prev = _roll(saved, window_index)
+                allowed, retry_after = _evaluate(curr, prev, now, max_hits, window_sec)
+
+                if not (allowed and consume):
+                    db.rollback()
+                    return allowed, retry_after
+
+                if row is None:
+                    row = RateLimitBucket(key=key)
+                    db.add(row)
+                row.window_index = window_index
+                row.curr_count = curr + 1
+                row.prev_count = prev
+                row.expires_at = expires_at
+
+                try:
+                    db.commit()
+                    return allowed, retry_after
+                except IntegrityError:
+                    # outro worker criou a chave antes; relê com lock
+                    db.rollback()
+
+            raise RuntimeError("rate limit: conflito persistente ao gravar chave")
+        finally:
+            db.close()
+
+    def reset(self) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(delete(RateLimitBucket))
+            db.commit()
+        finally:
+            db.close()
+
+
+_BACKEND = None
+_BACKEND_LOCK = Lock()
+
+
+def _build_backend(name: str):
+    if name == "sqlite":
+        return SqliteRateLimitBackend(RATE_LIMIT_SQLITE_PATH)
+    if name == "postgres":
+        return DatabaseRateLimitBackend()
+    return MemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_KEYS)
+
+
+def get_rate_limit_backend():
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = _build_backend(RATE_LIMIT_BACKEND)
+    return _BACKEND
+
+
+def set_rate_limit_backend(backend) -> None:
+    """Troca o backend em runtime (testes / bootstrap)."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        _BACKEND = backend
+
+
+def rl_check(key: str, max_hits: int, window_sec: int) -> Tuple[bool, int]:
+    """Retorna (allowed, retry_after_seconds)."""
     if max_hits <= 0 or window_sec <= 0:
         return True, 0
 
-    with _LOCK:
-        q = _BUCKETS.get(key)
-        if q is None:
-            return True, 0
-
-        cutoff = now - window_sec
-        while q and q[0] <= cutoff:
-            q.popleft()
+    return get_rate_limit_backend().hit(key, max_hits, window_sec, consume=True)
 
-        if len(q) >= max_hits:
-            retry_after = int(max(1, window_sec - (now - q[0])))
-            return False, retry_after
 
+def rl_peek(key: str, max_hits: int, window_sec: int) -> Tuple[bool, int]:
+    """Checa se está bloqueado SEM consumir tentativa."""
+    if max_hits <= 0 or window_sec <= 0:
         return True, 0
 
+    return get_rate_limit_backend().hit(key, max_hits, window_sec, consume=False)
+
 def rl_client_ip(request) -> str:
     # Railway/proxy normalmente manda X-Forwarded-For
     try:
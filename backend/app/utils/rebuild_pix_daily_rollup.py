@@ -0,0 +1,25 @@
+import argparse
+
+from app.database import SessionLocal
+from app.services.pix_rollup_service import rebuild_daily_rollups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Backfill de pix_daily_rollup a partir de pix_ledger, em lotes.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = rebuild_daily_rollups(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    print(f"✅ pix_daily_rollup reconstruído: {result['users']} usuários, {result['rows']} dias")
+    return result
+
+
+if __name__ == "__main__":
+    main()
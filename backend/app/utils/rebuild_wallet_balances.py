@@ -0,0 +1,25 @@
+import argparse
+
+from app.database import SessionLocal
+from app.services.wallet_balance_service import rebuild_wallet_balances
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recalcula wallet_balances a partir de pix_ledger, em lotes.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        result = rebuild_wallet_balances(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    print(f"✅ wallet_balances reconstruído: {result['users']} usuários, {result['updated']} atualizados")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""create rate_limit_buckets
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-18 13:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b8c9d0e1f2a3"
+down_revision: Union[str, Sequence[str], None] = "a7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(length=255), primary_key=True),
+        sa.Column("window_index", sa.Integer(), nullable=False),
+        sa.Column("curr_count", sa.Integer(), nullable=False),
+        sa.Column("prev_count", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_rate_limit_buckets_expires_at",
+        "rate_limit_buckets",
+        ["expires_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rate_limit_buckets_expires_at", table_name="rate_limit_buckets")
+    op.drop_table("rate_limit_buckets")
@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-18 14:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, Sequence[str], None] = "b8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_user_id_criado_em_id",
+        "transactions",
+        ["user_id", "criado_em", "id"],
+    )
+    op.create_index(
+        "ix_idempotency_keys_created_at_id",
+        "idempotency_keys",
+        ["created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotency_keys_created_at_id", table_name="idempotency_keys")
+    op.drop_index("ix_transactions_user_id_criado_em_id", table_name="transactions")
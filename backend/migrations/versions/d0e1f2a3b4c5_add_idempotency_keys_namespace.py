@@ -0,0 +1,57 @@
+"""add idempotency_keys.namespace
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-18 15:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d0e1f2a3b4c5"
+down_revision: Union[str, Sequence[str], None] = "c9d0e1f2a3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# mesmo mapa de app.models.idempotency.IDEMPOTENCY_NAMESPACE_PREFIXES,
+# congelado aqui para a migração não mudar se o modelo mudar
+_PREFIXES = {
+    "sandbox_webhook": "wallet-sandbox-webhook:",
+    "asaas_webhook": "asaas-sandbox-webhook:",
+    "asaas_correlation": "asaas-payment-correlation:",
+}
+
+
+def upgrade() -> None:
+    # server_default preenche as linhas existentes com o namespace padrão
+    op.add_column(
+        "idempotency_keys",
+        sa.Column("namespace", sa.String(length=32), nullable=False, server_default="pix_send"),
+    )
+
+    # backfill dos prefixos conhecidos (uma vez; daqui em diante o INSERT já grava)
+    idempotency_keys = sa.table(
+        "idempotency_keys",
+        sa.column("key", sa.String),
+        sa.column("namespace", sa.String),
+    )
+    for namespace, prefix in _PREFIXES.items():
+        op.execute(
+            idempotency_keys.update()
+            .where(idempotency_keys.c.key.like(f"{prefix}%"))
+            .values(namespace=namespace)
+        )
+
+    op.create_index(
+        "ix_idempotency_keys_namespace_created_at_id",
+        "idempotency_keys",
+        ["namespace", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotency_keys_namespace_created_at_id", table_name="idempotency_keys")
+    op.drop_column("idempotency_keys", "namespace")
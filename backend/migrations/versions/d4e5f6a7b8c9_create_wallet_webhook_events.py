@@ -0,0 +1,182 @@
+"""create wallet_webhook_events
+
+Revision ID: d4e5f6a7b8c9
+Revises: c9f4a1b2d3e4
+Create Date: 2026-10-18 09:00:00
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d4e5f6a7b8c9"
+down_revision: Union[str, Sequence[str], None] = "c9f4a1b2d3e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _safe_reference(value) -> str | None:
+    raw = str(value or "").strip()
+    if not raw:
+        return None
+    safe = "".join(ch if ch.isalnum() or ch in {"-", "_"} else "-" for ch in raw)
+    return safe[:80] or None
+
+
+def _amount(value) -> Decimal | None:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def _received_at(value, fallback) -> datetime:
+    if value:
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            pass
+    return fallback or datetime.now(timezone.utc)
+
+
+def _sandbox_row(key, response, created_at) -> dict:
+    event = response.get("event") or {}
+    return {
+        "idempotency_key": key,
+        "user_id": response.get("user_id"),
+        "provider": "sandbox",
+        "provider_reference": _safe_reference(event.get("provider_reference")),
+        "event_type": str(event.get("event_type") or "").strip()[:64],
+        "status": str(event.get("status") or "").strip().lower()[:32],
+        "amount": _amount(event.get("amount")),
+        "received_at": _received_at(event.get("received_at"), created_at),
+    }
+
+
+def _asaas_row(key, response, created_at) -> dict:
+    event = response.get("event") or {}
+    audit = response.get("audit") or {}
+    storage = audit.get("correlation_storage") or {}
+    correlated = storage.get("contract") == "asaas_payment_received_user_correlation_v1"
+
+    reference = None
+    correlation_key = str(storage.get("correlation_key") or "").strip()
+    if correlated and correlation_key.startswith("asaas-payment-correlation:"):
+        digest = hashlib.sha256(correlation_key.encode("utf-8")).hexdigest()
+        reference = f"asaas-sandbox-payment-{digest[:24]}"
+
+    return {
+        "idempotency_key": key,
+        "user_id": storage.get("user_id") if correlated else None,
+        "provider": "asaas",
+        "provider_reference": reference,
+        "event_type": str(event.get("event_type") or "").strip()[:64],
+        "status": "confirmed" if event.get("accepted") is True else "ignored",
+        "amount": _amount(storage.get("amount")) if correlated else None,
+        "received_at": _received_at(
+            event.get("received_at") or audit.get("received_at"),
+            created_at,
+        ),
+    }
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_webhook_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("idempotency_key", sa.String(length=128), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("provider", sa.String(length=32), nullable=False),
+        sa.Column("provider_reference", sa.String(length=128), nullable=True),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=True),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.UniqueConstraint("idempotency_key", name="uq_wallet_webhook_events_idempotency_key"),
+    )
+    op.create_index("ix_wallet_webhook_events_id", "wallet_webhook_events", ["id"])
+    op.create_index(
+        "ix_wallet_webhook_events_user_received",
+        "wallet_webhook_events",
+        ["user_id", "status", "received_at"],
+    )
+    op.create_index(
+        "ix_wallet_webhook_events_provider_reference",
+        "wallet_webhook_events",
+        ["provider", "provider_reference"],
+    )
+    op.create_index(
+        "ix_wallet_webhook_events_event_type",
+        "wallet_webhook_events",
+        ["event_type"],
+    )
+
+    # Backfill a partir dos JSONs já gravados em idempotency_keys.
+    bind = op.get_bind()
+    if "idempotency_keys" not in sa.inspect(bind).get_table_names():
+        return
+
+    rows = bind.execute(
+        sa.text(
+            """
+            SELECT key, response_json, created_at
+              FROM idempotency_keys
+             WHERE response_json IS NOT NULL
+               AND (key LIKE 'wallet-sandbox-webhook:%'
+                    OR key LIKE 'asaas-sandbox-webhook:%')
+            """
+        )
+    ).fetchall()
+
+    events = sa.table(
+        "wallet_webhook_events",
+        sa.column("idempotency_key", sa.String),
+        sa.column("user_id", sa.Integer),
+        sa.column("provider", sa.String),
+        sa.column("provider_reference", sa.String),
+        sa.column("event_type", sa.String),
+        sa.column("status", sa.String),
+        sa.column("amount", sa.Numeric(14, 2)),
+        sa.column("received_at", sa.DateTime(timezone=True)),
+    )
+
+    payload = []
+    for key, response_json, created_at in rows:
+        try:
+            response = json.loads(response_json)
+        except (TypeError, ValueError):
+            continue
+
+        if key.startswith("wallet-sandbox-webhook:"):
+            row = _sandbox_row(key, response, created_at)
+        else:
+            row = _asaas_row(key, response, created_at)
+
+        if row["event_type"]:
+            payload.append(row)
+
+    if payload:
+        op.bulk_insert(events, payload)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallet_webhook_events_event_type", table_name="wallet_webhook_events")
+    op.drop_index("ix_wallet_webhook_events_provider_reference", table_name="wallet_webhook_events")
+    op.drop_index("ix_wallet_webhook_events_user_received", table_name="wallet_webhook_events")
+    op.drop_index("ix_wallet_webhook_events_id", table_name="wallet_webhook_events")
+    op.drop_table("wallet_webhook_events")
@@ -0,0 +1,44 @@
+"""create asaas_payment_correlations
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-18 16:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, Sequence[str], None] = "d0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # backfill das correlações já gravadas em idempotency_keys:
+    # python -m app.utils.backfill_asaas_payment_correlations
+    op.create_table(
+        "asaas_payment_correlations",
+        sa.Column("correlation_key", sa.String(length=128), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_asaas_payment_correlations_user_id",
+        "asaas_payment_correlations",
+        ["user_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_asaas_payment_correlations_user_id", table_name="asaas_payment_correlations")
+    op.drop_table("asaas_payment_correlations")
@@ -0,0 +1,55 @@
+"""create wallet_balances
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 10:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e5f6a7b8c9d0"
+down_revision: Union[str, Sequence[str], None] = "d4e5f6a7b8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_balances",
+        sa.Column("user_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("available", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.CheckConstraint("version >= 0", name="ck_wallet_balances_version_nonneg"),
+    )
+
+    bind = op.get_bind()
+    if "pix_ledger" not in sa.inspect(bind).get_table_names():
+        return
+
+    # carga inicial; depois disso use app.utils.rebuild_wallet_balances
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO wallet_balances (user_id, available, version)
+            SELECT user_id,
+                   COALESCE(SUM(CASE WHEN kind = 'credit' THEN amount ELSE -amount END), 0),
+                   0
+              FROM pix_ledger
+             GROUP BY user_id
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("wallet_balances")
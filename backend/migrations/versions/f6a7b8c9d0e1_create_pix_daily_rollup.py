@@ -0,0 +1,58 @@
+"""create pix_daily_rollup
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 11:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f6a7b8c9d0e1"
+down_revision: Union[str, Sequence[str], None] = "e5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pix_daily_rollup",
+        sa.Column("user_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("entradas", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("saidas", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+
+    bind = op.get_bind()
+    if "pix_ledger" not in sa.inspect(bind).get_table_names():
+        return
+
+    # carga inicial; depois disso use app.utils.rebuild_pix_daily_rollup
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO pix_daily_rollup (user_id, day, entradas, saidas, count)
+            SELECT user_id,
+                   CAST(created_at AS DATE),
+                   COALESCE(SUM(CASE WHEN kind = 'credit' THEN amount ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN kind = 'debit' THEN amount ELSE 0 END), 0),
+                   COUNT(*)
+              FROM pix_ledger
+             GROUP BY user_id, CAST(created_at AS DATE)
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pix_daily_rollup")
@@ -1,2 +1,74 @@
 import os, sys
 sys.path.insert(0, os.path.abspath("."))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_idempotency_replay_cache():
+    # caches globais ao processo (replay, correlação Asaas); cada teste começa vazio
+    from app.partner.asaas_payment_correlation import clear_asaas_payment_correlation_cache
+    from app.services.idempotency_replay_cache import get_replay_cache
+
+    get_replay_cache().clear()
+    clear_asaas_payment_correlation_cache()
+    yield
+    get_replay_cache().clear()
+    clear_asaas_payment_correlation_cache()
+
+
+@pytest.fixture()
+def engine():
+    # SQLite em memória, uma conexão compartilhada (StaticPool), com todas as tabelas
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    import app.models  # noqa: F401  registra todas as tabelas
+    from app.database import Base
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture()
+def memory_session_factory(engine):
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+@pytest.fixture()
+def db(memory_session_factory):
+    session = memory_session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    # arquivo: cada sessão tem sua conexão, como requests/workers concorrentes
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import app.models  # noqa: F401  registra todas as tabelas
+    from app.database import Base
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'session_factory.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    finally:
+        engine.dispose()
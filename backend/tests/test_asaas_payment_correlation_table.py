@@ -0,0 +1,102 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from sqlalchemy import event
+
+from app.models.asaas_payment_correlation import AsaasPaymentCorrelation
+from app.models.idempotency import IdempotencyKey
+from app.partner import asaas_payment_correlation as correlation_module
+from app.partner.asaas_payment_correlation import (
+    backfill_asaas_payment_correlations,
+    build_asaas_payment_correlation_row,
+    build_asaas_payment_user_correlation_record,
+    resolve_asaas_payment_user_correlation,
+    resolve_asaas_payment_user_correlations,
+)
+
+
+def _ref(character: str) -> str:
+    return f"agpay_{character * 32}"
+
+
+def _register(db, character, user_id, *, materialized=True):
+    record = build_asaas_payment_user_correlation_record(
+        user_id=user_id,
+        external_reference=_ref(character),
+    )
+    db.add(record)
+    if materialized:
+        db.add(build_asaas_payment_correlation_row(correlation_key=record.key, user_id=user_id))
+    db.commit()
+    return record
+
+
+def _count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_resolve_reads_table_then_serves_from_cache(db, engine):
+    _register(db, "a", 321)
+    statements = _count_queries(engine)
+
+    first = resolve_asaas_payment_user_correlation(db, external_reference=_ref("a"))
+    queries_after_first = len(statements)
+    second = resolve_asaas_payment_user_correlation(db, external_reference=_ref("a"))
+
+    assert first.user_id == second.user_id == 321
+    assert queries_after_first == 1
+    assert "asaas_payment_correlations" in statements[0]
+    assert len(statements) == queries_after_first
+
+
+def test_resolve_falls_back_to_legacy_contract(db):
+    _register(db, "b", 77, materialized=False)
+
+    resolved = resolve_asaas_payment_user_correlation(db, external_reference=_ref("b"))
+
+    assert resolved.user_id == 77
+    assert resolve_asaas_payment_user_correlation(db, external_reference=_ref("c")) is None
+
+
+def test_bulk_resolution_mixes_table_legacy_and_unknown(db):
+    _register(db, "a", 1)
+    _register(db, "b", 2, materialized=False)
+
+    resolved = resolve_asaas_payment_user_correlations(
+        db,
+        [_ref("a"), _ref("b"), _ref("c"), "not-a-reference"],
+        chunk_size=1,
+    )
+
+    assert {ref: item.user_id for ref, item in resolved.items()} == {_ref("a"): 1, _ref("b"): 2}
+
+
+def test_backfill_materializes_legacy_correlations_once(db):
+    _register(db, "a", 1)
+    _register(db, "b", 2, materialized=False)
+    _register(db, "c", 3, materialized=False)
+
+    assert backfill_asaas_payment_correlations(db, batch_size=1) == 2
+    assert backfill_asaas_payment_correlations(db, batch_size=1) == 0
+
+    rows = {row.correlation_key: row.user_id for row in db.query(AsaasPaymentCorrelation).all()}
+    assert sorted(rows.values()) == [1, 2, 3]
+
+
+def test_cached_correlation_expires_after_purge_in_another_worker(db, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(correlation_module._correlation_cache, "clock", lambda: now[0])
+    record = _register(db, "d", 55)
+    assert resolve_asaas_payment_user_correlation(db, external_reference=_ref("d")).user_id == 55
+
+    # purge feito por outro worker: este processo não recebe a invalidação
+    db.query(AsaasPaymentCorrelation).delete()
+    db.query(IdempotencyKey).filter_by(key=record.key).delete()
+    db.commit()
+
+    assert resolve_asaas_payment_user_correlation(db, external_reference=_ref("d")).user_id == 55
+    now[0] += correlation_module._correlation_cache.ttl
+    assert resolve_asaas_payment_user_correlation(db, external_reference=_ref("d")) is None
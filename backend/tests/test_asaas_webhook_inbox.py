@@ -0,0 +1,182 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret")
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.v1.routes import wallet as wallet_routes
+from app.models.idempotency import IdempotencyKey
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.models.wallet_webhook_inbox import WalletWebhookInbox
+from app.partner.asaas_payment_correlation import (
+    build_asaas_payment_user_correlation_record,
+)
+from app.services.asaas_webhook_inbox_service import (
+    INBOX_MAX_ATTEMPTS,
+    AsaasWebhookInboxWorkerPool,
+    drain_asaas_webhook_inbox,
+)
+
+
+@pytest.fixture()
+def session_factory(memory_session_factory):
+    # mesma base em memória do fixture db (workers e request enxergam os mesmos dados)
+    return memory_session_factory
+
+
+@pytest.fixture(autouse=True)
+def queue_mode(monkeypatch):
+    monkeypatch.setattr(
+        wallet_routes,
+        "load_asaas_sandbox_config",
+        lambda: SimpleNamespace(webhook_token="secret-token", env="sandbox"),
+    )
+    monkeypatch.setattr(wallet_routes, "ASAAS_WEBHOOK_INGEST_MODE", "queue")
+
+
+def _payload(event_id="evt_inbox_001", external_reference=None):
+    payload = {
+        "id": event_id,
+        "event": "PAYMENT_RECEIVED",
+        "payment": {
+            "id": "pay_inbox_must_not_leak",
+            "status": "RECEIVED",
+            "billingType": "PIX",
+            "value": 25.5,
+        },
+    }
+    if external_reference:
+        payload["payment"]["externalReference"] = external_reference
+    return payload
+
+
+def _post(db, payload):
+    return wallet_routes.handle_asaas_sandbox_webhook_receiver(
+        payload=payload,
+        db=db,
+        asaas_access_token="secret-token",
+    )
+
+
+def test_queue_mode_enqueues_without_audit_records(db):
+    response = _post(db, _payload())
+
+    assert response["queued"] is True
+    assert response["duplicated"] is False
+    assert response["idempotency"]["state"] == "queued"
+    assert response["can_credit_balance"] is False
+
+    item = db.query(WalletWebhookInbox).one()
+    assert item.status == "pending"
+    assert "pay_inbox_must_not_leak" not in item.payload_json
+    assert db.query(IdempotencyKey).count() == 0
+    assert db.query(WalletWebhookEvent).count() == 0
+
+
+def test_queue_mode_duplicate_returns_queued_replay(db):
+    _post(db, _payload())
+    again = _post(db, _payload())
+
+    assert again["queued"] is True
+    assert again["duplicated"] is True
+    assert db.query(WalletWebhookInbox).count() == 1
+
+
+def test_queue_mode_conflicting_duplicate_returns_409(db):
+    _post(db, _payload())
+    changed = _payload()
+    changed["payment"]["status"] = "CONFIRMED"
+
+    with pytest.raises(wallet_routes.HTTPException) as exc:
+        _post(db, changed)
+
+    assert exc.value.status_code == 409
+
+
+def test_drain_produces_same_records_as_sync_mode(db, session_factory, monkeypatch):
+    external_reference = f"agpay_{'b' * 32}"
+    db.add(
+        build_asaas_payment_user_correlation_record(
+            user_id=77,
+            external_reference=external_reference,
+        )
+    )
+    db.commit()
+
+    _post(db, _payload(external_reference=external_reference))
+
+    counts = drain_asaas_webhook_inbox(
+        db,
+        processor=wallet_routes.process_asaas_sandbox_webhook_inbox_item,
+    )
+    assert counts == {"processed": 1}
+
+    item = db.query(WalletWebhookInbox).one()
+    assert item.status == "done"
+    assert item.outcome == "processed"
+    assert item.payload_json is None
+
+    key = wallet_routes._asaas_sandbox_webhook_idempotency_key("evt_inbox_001")
+    record = db.query(IdempotencyKey).filter_by(key=key).one()
+    stored = json.loads(record.response_json)
+    assert record.status_code == 200
+    assert stored["audit"]["correlation_storage"]["user_id"] == 77
+    assert external_reference not in record.response_json
+
+    event_row = db.query(WalletWebhookEvent).filter_by(idempotency_key=key).one()
+    assert event_row.user_id == 77
+    assert event_row.status == "confirmed"
+    assert float(event_row.amount) == 25.5
+
+    # depois de processado, o replay é o mesmo do modo sync
+    replay = _post(db, _payload(external_reference=external_reference))
+    assert replay["duplicated"] is True
+    assert "queued" not in replay
+
+    monkeypatch.setattr(wallet_routes, "ASAAS_WEBHOOK_INGEST_MODE", "sync")
+    sync_db = session_factory()
+    try:
+        sync_replay = _post(sync_db, _payload(external_reference=external_reference))
+    finally:
+        sync_db.close()
+    assert sync_replay == replay
+
+
+def test_drain_retries_then_marks_failed(db):
+    _post(db, _payload())
+
+    def broken(_db, _item):
+        raise RuntimeError("boom")
+
+    for _ in range(INBOX_MAX_ATTEMPTS - 1):
+        assert drain_asaas_webhook_inbox(db, processor=broken) == {"retry": 1}
+
+    assert drain_asaas_webhook_inbox(db, processor=broken) == {"failed": 1}
+
+    item = db.query(WalletWebhookInbox).one()
+    assert item.status == "failed"
+    assert item.attempts == INBOX_MAX_ATTEMPTS
+    assert item.last_error == "RuntimeError"
+    assert item.payload_json is None
+    assert drain_asaas_webhook_inbox(db, processor=broken) == {}
+
+
+def test_worker_pool_run_once_uses_fresh_session(db, session_factory):
+    _post(db, _payload("evt_inbox_pool_1"))
+    _post(db, _payload("evt_inbox_pool_2"))
+
+    pool = AsaasWebhookInboxWorkerPool(
+        session_factory=session_factory,
+        processor=wallet_routes.process_asaas_sandbox_webhook_inbox_item,
+        workers=1,
+        batch_size=1,
+    )
+
+    assert pool.run_once() == {"processed": 1}
+    assert pool.run_once() == {"processed": 1}
+    assert pool.run_once() == {}
+    assert db.query(WalletWebhookEvent).count() == 2
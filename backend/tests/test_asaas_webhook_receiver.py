@@ -11,6 +11,8 @@ from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from app.api.v1.routes import wallet as wallet_routes
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.services import idempotency_inflight
 from app.partner.asaas_payment_correlation import (
     asaas_payment_correlation_key,
     build_asaas_payment_user_correlation_record,
@@ -33,6 +35,9 @@ class FakeQuery:
     def order_by(self, *_args, **_kwargs):
         return self
 
+    def execution_options(self, **_kwargs):
+        return self
+
     def limit(self, value):
         self.row_limit = int(value)
         return self
@@ -57,8 +62,14 @@ class FakeDb:
         self.rolled_back = False
         self.fail_commit = fail_commit
         self.transaction_inserted_keys = []
+        self.events = []
+        self.pending_events = []
 
     def add(self, record):
+        if isinstance(record, WalletWebhookEvent):
+            self.pending_events.append(record)
+            return
+
         self.pending = record
 
     def flush(self):
@@ -72,6 +83,7 @@ class FakeDb:
     def rollback(self):
         self.rolled_back = True
         self.pending = None
+        self.pending_events.clear()
         for key in self.transaction_inserted_keys:
             self.records.pop(key, None)
         self.transaction_inserted_keys.clear()
@@ -82,6 +94,8 @@ class FakeDb:
                 "database commit failure with secret test value"
             )
         self.committed = True
+        self.events.extend(self.pending_events)
+        self.pending_events.clear()
         self.transaction_inserted_keys.clear()
 
     def query(self, _model):
@@ -201,7 +215,9 @@ def test_asaas_sandbox_webhook_is_idempotent_for_same_event():
     assert "secret-token" not in encoded
     assert "pay_real_sandbox_must_not_leak" not in encoded
     assert "evt_test_unique_001" not in encoded
-    assert db.rolled_back is True
+    # replay de key concluída vem do cache: sem INSERT nem rollback
+    assert db.rolled_back is False
+    assert len(db.events) == 1
 
 
 def test_asaas_sandbox_webhook_ignores_non_payment_received_events_safely():
@@ -338,7 +354,9 @@ def test_asaas_sandbox_webhook_audit_history_ignores_malformed_or_non_asaas_reco
 
 
 
-def test_asaas_sandbox_webhook_returns_503_for_incomplete_duplicate():
+def test_asaas_sandbox_webhook_returns_503_for_incomplete_duplicate(monkeypatch):
+    # a original nunca termina: espera o limite e só então devolve 503
+    monkeypatch.setattr(idempotency_inflight, "IDEMPOTENCY_INFLIGHT_WAIT_SEC", 0.1)
     db = FakeDb()
     payload = _valid_payload()
     event_id = wallet_routes._asaas_sandbox_webhook_event_id(payload)
@@ -403,6 +421,7 @@ def test_asaas_sandbox_webhook_commit_failure_rolls_back_and_returns_503():
     assert db.rolled_back is True
     assert db.committed is False
     assert db.records == {}
+    assert db.events == []
     assert "database commit failure" not in rendered
     assert "secret test value" not in rendered
     assert "secret-token" not in rendered
@@ -483,6 +502,17 @@ def test_payment_received_resolves_pre_registered_user_without_public_leak():
     assert correlation_storage["can_credit_balance"] is False
     assert external_reference not in db.records[event_key].response_json
 
+    event_row = db.events[0]
+
+    assert event_row.idempotency_key == event_key
+    assert event_row.provider == "asaas"
+    assert event_row.user_id == 321
+    assert event_row.status == "confirmed"
+    assert event_row.provider_reference.startswith(
+        "asaas-sandbox-payment-"
+    )
+    assert external_reference not in event_row.provider_reference
+
 
 def test_payment_received_with_unknown_reference_remains_unresolved():
     db = FakeDb()
@@ -525,6 +555,8 @@ def test_payment_received_with_unknown_reference_remains_unresolved():
         not in stored_response["audit"]
     )
     assert external_reference not in db.records[event_key].response_json
+    assert db.events[0].user_id is None
+    assert db.events[0].provider_reference is None
 
 
 def test_correlated_payment_received_replay_remains_sanitized():
@@ -0,0 +1,84 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.models.user_main import User
+from app.utils import authz
+from app.utils.security import create_access_token
+
+
+@pytest.fixture()
+def db(db):
+    db.add(User(email="cache@local", hashed_password="x", role="customer"))
+    db.commit()
+    authz.clear_identity_cache()
+    try:
+        yield db
+    finally:
+        authz.clear_identity_cache()
+
+
+def _request(token):
+    return SimpleNamespace(headers={"authorization": f"Bearer {token}"})
+
+
+def _cache_count(result):
+    return REGISTRY.get_sample_value(
+        "aurea_auth_identity_cache_total", {"result": result}
+    ) or 0.0
+
+
+def test_second_request_skips_user_query(db):
+    token = create_access_token({"sub": "cache@local"})
+    hits_before = _cache_count("hit")
+
+    first = authz.get_current_user(_request(token), db)
+
+    # muda o email sem passar pelo ORM: o cache não deve consultar o banco
+    db.execute(text("UPDATE users SET email = 'other@local'"))
+    db.commit()
+
+    second = authz.get_current_user(_request(token), db)
+
+    assert second.id == first.id
+    assert second.email == "cache@local"
+    assert second.role == "customer"
+    assert second.hashed_password is None
+    assert _cache_count("hit") == hits_before + 1
+
+    assert authz.invalidate_identity(user_id=first.id) == 1
+    with pytest.raises(HTTPException) as exc:
+        authz.get_current_user(_request(token), db)
+    assert exc.value.status_code == 401
+
+
+def test_orm_role_change_invalidates_cached_identity(db):
+    token = create_access_token({"sub": "cache@local"})
+    user = authz.get_current_user(_request(token), db)
+
+    user.role = "admin"
+    db.commit()
+
+    misses_before = _cache_count("miss")
+    refreshed = authz.get_current_user(_request(token), db)
+
+    assert refreshed.role == "admin"
+    assert _cache_count("miss") == misses_before + 1
+
+
+def test_cache_is_bounded(db, monkeypatch):
+    monkeypatch.setattr(authz._identity_cache, "max_entries", 2)
+
+    for minutes in (5, 6, 7):
+        token = create_access_token({"sub": "cache@local"}, timedelta(minutes=minutes))
+        authz.get_current_user(_request(token), db)
+
+    assert len(authz._identity_cache) == 2
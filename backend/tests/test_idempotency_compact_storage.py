@@ -0,0 +1,97 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import json
+
+from sqlalchemy import text
+
+from app.core import compact_json
+from app.models.idempotency import IdempotencyKey
+from app.services.idempotency_compaction_service import compact_legacy_idempotency_responses
+
+
+def _asaas_response(key: str) -> str:
+    return json.dumps(
+        {
+            "ok": True,
+            "service": "aurea-wallet",
+            "duplicated": False,
+            "event": {"provider": "asaas", "environment": "sandbox", "event_type": "PAYMENT_RECEIVED"},
+            "audit": {
+                "source": "asaas_sandbox_webhook_receiver",
+                "audit_status": "asaas_sandbox_webhook_recorded",
+                "storage": {"source": "idempotency_keys", "raw_payload_stored": False},
+                "idempotency": {"key": key, "state": "stored"},
+            },
+            "idempotency": {"key": key, "replayed": False, "state": "stored"},
+            "can_credit_balance": False,
+            "can_generate_real_receipt": False,
+            "can_mark_real_paid": False,
+            "notice": (
+                "Webhook Asaas Sandbox recebido com segurança. "
+                "Nenhum saldo real, comprovante real ou pagamento real foi gerado."
+            ),
+            "limitations": ["Não credita saldo real.", "Não salva payload bruto."],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _raw(db, key):
+    return db.execute(
+        text("SELECT response_json FROM idempotency_keys WHERE key = :k"), {"k": key}
+    ).scalar_one()
+
+
+def test_pack_roundtrip_and_legacy_passthrough():
+    body = _asaas_response("asaas-sandbox-webhook:abc")
+
+    packed = compact_json.pack(body)
+
+    assert compact_json.is_compact(packed)
+    assert compact_json.unpack(packed) == body
+    assert compact_json.unpack(body) == body
+    assert compact_json.unpack(None) is None
+    assert len(packed) < len(body) / 3
+
+
+def test_orm_writes_compact_and_reads_json(db):
+    key = "asaas-sandbox-webhook:abc"
+    body = _asaas_response(key)
+    db.add(IdempotencyKey(key=key, request_hash="h", status_code=200, response_json=body))
+    db.commit()
+    db.expunge_all()
+
+    assert compact_json.is_compact(_raw(db, key))
+    assert db.query(IdempotencyKey).filter_by(key=key).one().response_json == body
+
+
+def test_json_mode_keeps_plain_json(db, monkeypatch):
+    monkeypatch.setattr(compact_json, "IDEMPOTENCY_RESPONSE_STORAGE", "json")
+    body = _asaas_response("k")
+    db.add(IdempotencyKey(key="k", request_hash="h", response_json=body))
+    db.commit()
+
+    assert _raw(db, "k") == body
+
+
+def test_background_migration_compacts_legacy_rows(db):
+    bodies = {f"asaas-sandbox-webhook:{i}": _asaas_response(f"asaas-sandbox-webhook:{i}") for i in range(5)}
+    for key, body in bodies.items():
+        # linhas legadas: JSON puro gravado por fora do ORM
+        db.execute(
+            text("INSERT INTO idempotency_keys (key, request_hash, response_json) VALUES (:k, 'h', :r)"),
+            {"k": key, "r": body},
+        )
+    db.execute(text("INSERT INTO idempotency_keys (key, request_hash) VALUES ('pending', 'h')"))
+    db.commit()
+
+    assert compact_legacy_idempotency_responses(db, batch_size=2) == 5
+    assert compact_legacy_idempotency_responses(db, batch_size=2) == 0
+
+    for key, body in bodies.items():
+        assert compact_json.is_compact(_raw(db, key))
+        assert db.query(IdempotencyKey).filter_by(key=key).one().response_json == body
+    assert _raw(db, "pending") is None
@@ -0,0 +1,101 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import json
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from app.models.idempotency import IdempotencyKey
+from app.services.idempotency_inflight import (
+    inflight_registry,
+    wait_for_idempotency_completion,
+)
+from app.services.pix_service import _idem_hash, send_pix
+
+
+def _insert_pending(factory, key, request_hash="h"):
+    db = factory()
+    try:
+        db.add(IdempotencyKey(key=key, request_hash=request_hash))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _complete_later(factory, key, body, *, delay=0.2, local=False):
+    def run():
+        time.sleep(delay)
+        db = factory()
+        try:
+            row = db.query(IdempotencyKey).filter_by(key=key).first()
+            row.status_code = 200
+            row.response_json = json.dumps(body)
+            db.commit()
+        finally:
+            db.close()
+            if local:
+                inflight_registry.finish(key)
+
+    if local:
+        inflight_registry.begin(key)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("local", [True, False])
+def test_duplicate_waits_for_original_and_gets_stored_response(session_factory, local):
+    _insert_pending(session_factory, "k-wait")
+    thread = _complete_later(session_factory, "k-wait", {"status": "success"}, local=local)
+
+    db = session_factory()
+    try:
+        started = time.monotonic()
+        row = wait_for_idempotency_completion(db, "k-wait", timeout=5)
+        elapsed = time.monotonic() - started
+    finally:
+        db.close()
+        thread.join()
+
+    assert row is not None
+    assert json.loads(row.response_json) == {"status": "success"}
+    assert elapsed < 2
+
+
+def test_wait_gives_up_after_bound(session_factory):
+    _insert_pending(session_factory, "k-stuck")
+
+    db = session_factory()
+    try:
+        started = time.monotonic()
+        assert wait_for_idempotency_completion(db, "k-stuck", timeout=0.2) is None
+        assert time.monotonic() - started >= 0.2
+    finally:
+        db.close()
+
+
+def test_send_pix_duplicate_in_progress_replays_original(session_factory):
+    key = "idem-inflight-1"
+    req_hash = _idem_hash(user_id=1, valor=Decimal("10.00"), chave_pix="x@pix", descricao="PIX")
+    _insert_pending(session_factory, key, request_hash=req_hash)
+    body = {"id": 7, "valor": "10.0", "status": "success"}
+    thread = _complete_later(session_factory, key, body, local=True)
+
+    db = session_factory()
+    try:
+        result = send_pix(
+            db,
+            user_id=1,
+            valor=Decimal("10.00"),
+            chave_pix="x@pix",
+            idempotency_key=key,
+        )
+    finally:
+        db.close()
+        thread.join()
+
+    assert result == body
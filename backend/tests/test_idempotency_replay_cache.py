@@ -0,0 +1,111 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from decimal import Decimal
+
+import pytest
+
+from app.models.pix_ledger import PixLedger
+from app.services.idempotency_replay_cache import (
+    CachedReplay,
+    MemoryReplayCache,
+    SqliteReplayCache,
+    cached_replay,
+)
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import apply_ledger_entry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _entry(body="{}"):
+    return CachedReplay(request_hash="h", status_code=200, response_json=body)
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_cache_is_bounded_and_expires(kind, tmp_path):
+    clock = FakeClock()
+    if kind == "memory":
+        cache = MemoryReplayCache(max_entries=2, ttl=60, clock=clock)
+    else:
+        cache = SqliteReplayCache(str(tmp_path / "c.sqlite3"), max_entries=2, ttl=60, clock=clock)
+
+    cache.put("a", _entry('{"a": 1}'))
+    clock.now += 1
+    cache.put("b", _entry())
+    clock.now += 1
+    cache.put("c", _entry())
+
+    assert cache.get("a") is None
+    assert cache.get("c").response_json == "{}"
+
+    clock.now += 61
+    assert cache.get("c") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    SqliteReplayCache(path).put("k", _entry('{"ok": true}'))
+
+    assert SqliteReplayCache(path).get("k").response_json == '{"ok": true}'
+
+
+def test_send_pix_replay_is_served_without_write_or_rollback(db, monkeypatch):
+    apply_ledger_entry(db, user_id=3, kind="credit", amount=Decimal("50.00"))
+    db.commit()
+
+    first = send_pix(
+        db,
+        user_id=3,
+        valor=Decimal("10.00"),
+        chave_pix="chave@pix",
+        idempotency_key="mobile-retry-1",
+    )
+    assert cached_replay("mobile-retry-1") is not None
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("replay não deveria tocar a sessão")
+
+    monkeypatch.setattr(db, "rollback", _fail)
+    monkeypatch.setattr(db, "flush", _fail)
+
+    replay = send_pix(
+        db,
+        user_id=3,
+        valor=Decimal("10.00"),
+        chave_pix="chave@pix",
+        idempotency_key="mobile-retry-1",
+    )
+    conflict = send_pix(
+        db,
+        user_id=3,
+        valor=Decimal("11.00"),
+        chave_pix="chave@pix",
+        idempotency_key="mobile-retry-1",
+    )
+
+    assert replay["id"] == first.id
+    assert replay["status"] == "success"
+    assert conflict["code"] == "IDEMPOTENCY_KEY_REUSE_DIFFERENT_PAYLOAD"
+    assert db.query(PixLedger).filter_by(kind="debit").count() == 1
+
+
+def test_table_replay_warms_cache(db):
+    apply_ledger_entry(db, user_id=4, kind="credit", amount=Decimal("50.00"))
+    db.commit()
+    send_pix(db, user_id=4, valor=Decimal("5.00"), chave_pix="k", idempotency_key="warm-1")
+
+    from app.services.idempotency_replay_cache import get_replay_cache
+
+    get_replay_cache().clear()
+    replay = send_pix(db, user_id=4, valor=Decimal("5.00"), chave_pix="k", idempotency_key="warm-1")
+
+    assert replay["status"] == "success"
+    assert cached_replay("warm-1") is not None
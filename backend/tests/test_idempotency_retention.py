@@ -0,0 +1,124 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.models.idempotency import IdempotencyKey
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.services.idempotency_retention_service import (
+    idempotency_namespace,
+    purge_expired_idempotency_keys,
+)
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+POLICIES = {
+    "pix_send": 7,
+    "sandbox_webhook": 180,
+    "asaas_webhook": 180,
+    "asaas_correlation": 0,
+}
+
+
+def _key(db, key, days_ago):
+    db.add(
+        IdempotencyKey(
+            key=key,
+            request_hash="h",
+            status_code=200,
+            response_json='{"ok": true}',
+            created_at=NOW - timedelta(days=days_ago),
+        )
+    )
+
+
+def _remaining(db):
+    return sorted(row.key for row in db.query(IdempotencyKey).all())
+
+
+def test_namespace_by_prefix():
+    assert idempotency_namespace("wallet-sandbox-webhook:abc") == "sandbox_webhook"
+    assert idempotency_namespace("asaas-sandbox-webhook:abc") == "asaas_webhook"
+    assert idempotency_namespace("asaas-payment-correlation:abc") == "asaas_correlation"
+    assert idempotency_namespace("cliente-123") == "pix_send"
+
+
+def test_namespace_column_is_filled_on_insert(db):
+    _key(db, "asaas-sandbox-webhook:1", 1)
+    _key(db, "cliente-1", 1)
+    db.commit()
+
+    namespaces = {row.key: row.namespace for row in db.query(IdempotencyKey).all()}
+
+    assert namespaces == {
+        "asaas-sandbox-webhook:1": "asaas_webhook",
+        "cliente-1": "pix_send",
+    }
+
+
+def test_purge_applies_per_namespace_retention(db):
+    for index in range(5):
+        _key(db, f"pix-old-{index}", days_ago=8)
+    _key(db, "pix-recent", days_ago=2)
+    _key(db, "wallet-sandbox-webhook:recent", days_ago=30)
+    _key(db, "wallet-sandbox-webhook:old", days_ago=200)
+    _key(db, "asaas-sandbox-webhook:old", days_ago=181)
+    _key(db, "asaas-payment-correlation:forever", days_ago=900)
+    db.commit()
+
+    purged = purge_expired_idempotency_keys(db, now=NOW, batch_size=2, policies=POLICIES)
+
+    assert purged == {"pix_send": 5, "sandbox_webhook": 1, "asaas_webhook": 1}
+    assert _remaining(db) == [
+        "asaas-payment-correlation:forever",
+        "pix-recent",
+        "wallet-sandbox-webhook:recent",
+    ]
+
+
+def test_purge_archives_expired_rows_as_gzip_ndjson(db, tmp_path):
+    for index in range(3):
+        _key(db, f"pix-old-{index}", days_ago=10)
+    db.commit()
+
+    purge_expired_idempotency_keys(
+        db,
+        now=NOW,
+        batch_size=2,
+        archive_dir=str(tmp_path),
+        policies=POLICIES,
+    )
+
+    archive = tmp_path / "idempotency_keys-pix_send-20261018.ndjson.gz"
+    with gzip.open(archive, "rt", encoding="utf-8") as fh:
+        lines = [json.loads(line) for line in fh]
+
+    assert sorted(line["key"] for line in lines) == ["pix-old-0", "pix-old-1", "pix-old-2"]
+    assert lines[0]["response_json"] == '{"ok": true}'
+    assert _remaining(db) == []
+
+
+def test_purge_removes_webhook_projection_with_its_key(db):
+    for key, days_ago in (("wallet-sandbox-webhook:old", 200), ("wallet-sandbox-webhook:recent", 30)):
+        _key(db, key, days_ago=days_ago)
+        db.add(
+            WalletWebhookEvent(
+                idempotency_key=key,
+                user_id=1,
+                provider="sandbox",
+                provider_reference=key.split(":")[1],
+                event_type="pix.received",
+                status="confirmed",
+                received_at=NOW - timedelta(days=days_ago),
+            )
+        )
+    db.commit()
+
+    purge_expired_idempotency_keys(db, now=NOW, policies=POLICIES)
+
+    # extrato (projeção) e reconciliação (JOIN com a key) veem o mesmo conjunto
+    remaining = sorted(row.idempotency_key for row in db.query(WalletWebhookEvent).all())
+    assert remaining == ["wallet-sandbox-webhook:recent"]
+    assert _remaining(db) == ["wallet-sandbox-webhook:recent"]
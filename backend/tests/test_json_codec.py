@@ -0,0 +1,57 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.core import json_codec
+from app.utils import bench_json_codec
+
+
+def _payload():
+    return {
+        "valor": Decimal("10.50"),
+        "created_at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "nome": "João",
+        "itens": [1, None, True],
+    }
+
+
+def test_storage_matches_previous_default_str_format():
+    payload = _payload()
+    legacy = json.loads(json.dumps(payload, ensure_ascii=False, default=str))
+
+    assert json_codec.normalize(payload) == legacy
+    assert json_codec.loads(json_codec.dumps(payload)) == legacy
+    assert "João" in json_codec.dumps(payload)
+
+
+def test_sort_keys_is_stable():
+    assert json_codec.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'
+
+
+def test_response_matches_jsonable_encoder_with_decimal_as_float():
+    payload = _payload()
+    expected = jsonable_encoder(payload, custom_encoder={Decimal: float})
+
+    body = json_codec.FastJSONResponse(content=payload).body
+
+    assert json.loads(body) == expected
+
+
+def test_loads_rejects_invalid_json():
+    with pytest.raises(ValueError):
+        json_codec.loads("{not-json")
+
+
+def test_benchmark_reports_per_request_cost(capsys):
+    result = bench_json_codec.main(["--iterations", "3"])
+
+    assert set(result) == {"webhook_stdlib", "webhook_codec", "history_stdlib", "history_codec"}
+    assert all(value > 0 for value in result.values())
+    assert "µs/request" in capsys.readouterr().out
@@ -0,0 +1,118 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routes import wallet as wallet_routes
+from app.models.idempotency import IdempotencyKey
+from app.models.transaction import Transaction
+from app.models.user_main import User
+from app.services.wallet_read_service import WalletReadService
+from app.utils.pagination import decode_cursor, encode_cursor, parse_cursor_param
+
+BASE_TIME = datetime(2026, 10, 1, 12, 0, 0)
+
+
+def _walk(fetch):
+    seen, cursor, pages = [], None, 0
+    while True:
+        items, cursor = fetch(cursor)
+        seen.extend(items)
+        pages += 1
+        if cursor is None:
+            return seen, pages
+        assert pages < 50
+
+
+def test_cursor_roundtrip_and_invalid_cursor():
+    cursor = encode_cursor(BASE_TIME, 42)
+
+    assert decode_cursor(cursor) == (BASE_TIME, 42)
+    assert parse_cursor_param(None) is None
+
+    with pytest.raises(HTTPException) as exc:
+        parse_cursor_param("not-a-cursor")
+    assert exc.value.status_code == 422
+
+
+def test_pix_history_walks_full_history_with_ties(db):
+    db.add(User(id=5, email="keyset@example.com", hashed_password="x"))
+    # três transações por timestamp para exercitar o desempate por id
+    for index in range(21):
+        db.add(
+            Transaction(
+                user_id=5,
+                tipo="saida",
+                valor=float(index + 1),
+                criado_em=BASE_TIME + timedelta(minutes=index // 3),
+            )
+        )
+    db.commit()
+
+    service = WalletReadService(db)
+    after = lambda cursor: decode_cursor(cursor) if cursor else None
+    items, pages = _walk(
+        lambda cursor: service.get_history_page(5, limit=4, cursor=after(cursor))
+    )
+
+    assert pages == 6
+    ids = [item["id"] for item in items]
+    assert len(ids) == 21
+    assert len(set(ids)) == 21
+    keys = [(item["criado_em"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_asaas_audit_history_pages_past_fixed_window(db, monkeypatch):
+    for index in range(7):
+        db.add(
+            IdempotencyKey(
+                key=f"asaas-sandbox-webhook:evt-{index}",
+                request_hash="h",
+                status_code=200,
+                response_json=json.dumps(
+                    {
+                        "audit": {
+                            "provider": "asaas",
+                            "environment": "sandbox",
+                            "event_type": "PAYMENT_RECEIVED",
+                        }
+                    }
+                ),
+                created_at=BASE_TIME + timedelta(seconds=index),
+            )
+        )
+    db.add(IdempotencyKey(key="other:1", created_at=BASE_TIME))
+    db.commit()
+
+    items, pages = _walk(
+        lambda cursor: wallet_routes._list_asaas_sandbox_webhook_audit_events_page(
+            db,
+            3,
+            decode_cursor(cursor) if cursor else None,
+        )
+    )
+
+    assert pages == 3
+    assert [item["idempotency"]["key"] for item in items] == [
+        f"asaas-sandbox-webhook:evt-{index}" for index in range(6, -1, -1)
+    ]
+
+    monkeypatch.setattr(
+        wallet_routes,
+        "_asaas_sandbox_webhook_config",
+        lambda: type("Cfg", (), {"env": "sandbox"})(),
+    )
+    response = wallet_routes.get_asaas_sandbox_webhook_audit_history(
+        limit=5,
+        cursor=None,
+        current_user=User(id=1),
+        db=db,
+    )
+    assert response["history"]["total_returned"] == 5
+    assert response["history"]["next_cursor"] is not None
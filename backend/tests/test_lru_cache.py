@@ -0,0 +1,41 @@
+from app.core.lru_cache import BoundedTTLCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = BoundedTTLCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_ttl_default_and_per_entry_override():
+    now = [0.0]
+    cache = BoundedTTLCache(max_entries=10, ttl=10, clock=lambda: now[0])
+    cache.put("default", "x")
+    cache.put("short", "y", ttl=1)
+    never = BoundedTTLCache(max_entries=10, clock=lambda: now[0])
+    never.put("forever", "z")
+
+    now[0] = 5
+    assert cache.get("short") is None
+    assert cache.get("default") == "x"
+    now[0] = 1_000_000
+    assert cache.get("default") is None
+    assert never.get("forever") == "z"
+
+
+def test_invalidate_where_removes_matching_entries():
+    cache = BoundedTTLCache(max_entries=10)
+    for key, user_id in (("t1", 1), ("t2", 1), ("t3", 2)):
+        cache.put(key, {"id": user_id})
+
+    removed = cache.invalidate_where(lambda key, value: value["id"] == 1)
+
+    assert removed == 2
+    assert cache.get("t3") == {"id": 2}
+    assert len(cache) == 1
@@ -0,0 +1,99 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import logging
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.observability import (
+    HTTP_DB_QUERIES_PER_REQUEST,
+    HTTP_REQUESTS_TOTAL,
+    PIX_SEND_TOTAL,
+    ObservabilityMiddleware,
+    get_request_id,
+    instrument_sqlalchemy,
+)
+
+
+def _sample(metric, suffix, **labels):
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name.endswith(suffix) and all(
+                sample.labels.get(k) == v for k, v in labels.items()
+            ):
+                return sample.value
+    return 0.0
+
+
+def _build_app():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    instrument_sqlalchemy(engine)
+
+    app = FastAPI()
+    app.add_middleware(ObservabilityMiddleware)
+
+    @app.get("/obs-test/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT :v"), {"v": item_id}).scalar()
+        return {"rid": get_request_id()}
+
+    @app.post("/api/v1/pix/send")
+    def limited():
+        raise HTTPException(status_code=429, detail="limit")
+
+    return app
+
+
+def test_request_id_route_label_and_db_stats(caplog):
+    client = TestClient(_build_app())
+    route = "/obs-test/items/{item_id}"
+    before_total = _sample(HTTP_REQUESTS_TOTAL, "_total", route=route, status="200")
+    before_count = _sample(HTTP_DB_QUERIES_PER_REQUEST, "_count", route=route)
+    before_sum = _sample(HTTP_DB_QUERIES_PER_REQUEST, "_sum", route=route)
+
+    with caplog.at_level(logging.INFO, logger="aurea.http"):
+        response = client.get("/obs-test/items/7", headers={"X-Request-Id": "rid-abc"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-Id"] == "rid-abc"
+    assert response.json() == {"rid": "rid-abc"}
+
+    assert _sample(HTTP_REQUESTS_TOTAL, "_total", route=route, status="200") == before_total + 1
+    assert _sample(HTTP_DB_QUERIES_PER_REQUEST, "_count", route=route) == before_count + 1
+    assert _sample(HTTP_DB_QUERIES_PER_REQUEST, "_sum", route=route) == before_sum + 3
+
+    record = [r for r in caplog.records if r.getMessage() == "request"][-1]
+    assert record.route == route
+    assert record.db_queries == 3
+    assert record.db_time_ms >= 0
+    assert record.db_slowest_statement == "SELECT ?"
+
+
+def test_generates_request_id_and_counts_pix_rate_limit():
+    client = TestClient(_build_app())
+    before = _sample(PIX_SEND_TOTAL, "_total", outcome="rate_limited")
+
+    response = client.post("/api/v1/pix/send")
+
+    assert response.status_code == 429
+    assert response.headers["X-Request-Id"]
+    assert _sample(PIX_SEND_TOTAL, "_total", outcome="rate_limited") == before + 1
+
+
+def test_queries_outside_requests_are_not_tracked():
+    engine = create_engine("sqlite://")
+    instrument_sqlalchemy(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert "_aurea_query_start" not in conn.info
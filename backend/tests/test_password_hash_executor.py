@@ -0,0 +1,99 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.api.v1.routes import auth as auth_routes
+from app.core.observability import AUTH_PASSWORD_HASH_REJECTED_TOTAL
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.services.password_hash_executor import (
+    PasswordHashExecutor,
+    PasswordHashPoolSaturated,
+)
+from app.utils.security import hash_password
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def login_user():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = db.query(models.User).filter(models.User.email == "hashpool@local").first()
+    if not user:
+        user = models.User(username="hashpool", email="hashpool@local", role="user")
+        db.add(user)
+    user.hashed_password = hash_password("hashpool123")
+    db.commit()
+    db.close()
+    yield
+
+
+def _hold_only_slot(executor: PasswordHashExecutor):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return True
+
+    holder = threading.Thread(target=executor.run, args=("verify", blocked))
+    holder.start()
+    assert started.wait(5)
+    return release, holder
+
+
+def test_run_returns_result_from_pool_thread():
+    executor = PasswordHashExecutor(workers=2, queue_max=2)
+    try:
+        assert executor.run("verify", lambda: threading.current_thread().name).startswith("password-hash")
+    finally:
+        executor.shutdown()
+
+
+def test_saturated_pool_rejects_immediately_and_counts():
+    executor = PasswordHashExecutor(workers=1, queue_max=0)
+    release, holder = _hold_only_slot(executor)
+    rejected = AUTH_PASSWORD_HASH_REJECTED_TOTAL.labels(operation="verify")
+    before = rejected._value.get()
+    try:
+        with pytest.raises(PasswordHashPoolSaturated):
+            executor.run("verify", lambda: True)
+        assert rejected._value.get() == before + 1
+    finally:
+        release.set()
+        holder.join(5)
+
+    # vaga liberada: volta a aceitar
+    assert executor.run("verify", lambda: "ok") == "ok"
+    executor.shutdown()
+
+
+def test_login_answers_503_when_pool_is_saturated(monkeypatch):
+    monkeypatch.setenv("LOGIN_RL_ENABLED", "0")
+    executor = PasswordHashExecutor(workers=1, queue_max=0)
+    monkeypatch.setattr(auth_routes, "password_hash_executor", executor)
+    release, holder = _hold_only_slot(executor)
+    try:
+        resp = client.post("/api/v1/auth/login", json={"username": "hashpool@local", "password": "hashpool123"})
+    finally:
+        release.set()
+        holder.join(5)
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+    resp = client.post("/api/v1/auth/login", json={"username": "hashpool@local", "password": "hashpool123"})
+    assert resp.status_code == 200
+    assert resp.json()["access_token"]
+
+    resp = client.post("/api/v1/auth/login", json={"username": "hashpool@local", "password": "errada"})
+    assert resp.status_code == 401
+    executor.shutdown()
@@ -0,0 +1,120 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from app.models.pix_daily_rollup import PixDailyRollup
+from app.models.pix_ledger import PixLedger
+from app.services.pix_rollup_service import (
+    _ledger_utc_day,
+    last_days_series,
+    month_totals,
+    rebuild_daily_rollups,
+    rollup_today,
+)
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import apply_ledger_entry
+
+
+def test_ledger_writes_update_today_rollup(db):
+    apply_ledger_entry(db, user_id=5, kind="credit", amount=Decimal("100.00"))
+    apply_ledger_entry(db, user_id=5, kind="credit", amount=Decimal("20.00"))
+    db.commit()
+
+    send_pix(db, user_id=5, valor=Decimal("45.50"), chave_pix="chave@pix")
+
+    row = db.get(PixDailyRollup, (5, rollup_today()))
+    assert row.entradas == Decimal("120.00")
+    assert row.saidas == Decimal("45.50")
+    assert row.count == 3
+
+    totals = month_totals(db, 5)
+    assert totals == {
+        "entradas": Decimal("120.00"),
+        "saidas": Decimal("45.50"),
+        "count": 3,
+    }
+
+    series = last_days_series(db, 5, days=7)
+    assert len(series) == 7
+    assert series[-1] == {
+        "dia": rollup_today().isoformat(),
+        "entradas": 120.0,
+        "saidas": 45.5,
+        "saldo_dia": 74.5,
+    }
+    assert all(p["entradas"] == 0.0 for p in series[:-1])
+
+
+def test_month_totals_ignore_previous_month_and_other_users(db):
+    today = rollup_today()
+    previous_month = today.replace(day=1) - timedelta(days=1)
+
+    db.add(PixDailyRollup(user_id=5, day=previous_month, entradas=Decimal("999.00"), saidas=Decimal("0"), count=1))
+    db.add(PixDailyRollup(user_id=6, day=today, entradas=Decimal("10.00"), saidas=Decimal("0"), count=1))
+    db.add(PixDailyRollup(user_id=5, day=today, entradas=Decimal("1.00"), saidas=Decimal("2.00"), count=2))
+    db.commit()
+
+    assert month_totals(db, 5) == {
+        "entradas": Decimal("1.00"),
+        "saidas": Decimal("2.00"),
+        "count": 2,
+    }
+
+
+def test_rebuild_daily_rollups_from_ledger(db):
+    today = datetime.now(timezone.utc).replace(hour=12)
+    yesterday = today - timedelta(days=1)
+
+    db.add(PixLedger(user_id=1, kind="credit", amount=Decimal("10.00"), created_at=today))
+    db.add(PixLedger(user_id=1, kind="debit", amount=Decimal("3.00"), created_at=today))
+    db.add(PixLedger(user_id=1, kind="credit", amount=Decimal("7.00"), created_at=yesterday))
+    db.add(PixLedger(user_id=2, kind="credit", amount=Decimal("1.00"), created_at=today))
+    db.add(PixDailyRollup(user_id=1, day=today.date(), entradas=Decimal("500.00"), saidas=Decimal("0"), count=9))
+    db.commit()
+
+    result = rebuild_daily_rollups(db, chunk_size=1)
+
+    assert result == {"users": 2, "rows": 3}
+    row = db.get(PixDailyRollup, (1, today.date()))
+    assert row.entradas == Decimal("10.00")
+    assert row.saidas == Decimal("3.00")
+    assert row.count == 2
+    assert db.get(PixDailyRollup, (1, yesterday.date())).entradas == Decimal("7.00")
+    assert db.get(PixDailyRollup, (2, today.date())).count == 1
+
+
+def test_rebuild_locks_wallet_balances_before_rewriting(db):
+    apply_ledger_entry(db, user_id=1, kind="credit", amount=Decimal("10.00"))
+    db.commit()
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(" ".join(statement.split()))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        rebuild_daily_rollups(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    lock = next(i for i, sql in enumerate(statements) if sql.startswith("SELECT wallet_balances.user_id"))
+    delete = next(i for i, sql in enumerate(statements) if sql.startswith("DELETE FROM pix_daily_rollup"))
+    assert lock < delete
+
+
+def test_rebuild_buckets_days_in_utc_on_postgres():
+    class _PgSession:
+        def get_bind(self):
+            return type("Bind", (), {"dialect": postgresql.dialect()})()
+
+    compiled = _ledger_utc_day(_PgSession()).compile(dialect=postgresql.dialect())
+
+    assert str(compiled).startswith("date(timezone(")
+    assert "UTC" in compiled.params.values()
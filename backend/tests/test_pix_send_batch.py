@@ -0,0 +1,172 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from decimal import Decimal
+
+import pytest
+
+from app.core import json_codec
+from app.database import Base
+from app.models.idempotency import IdempotencyKey
+from app.models.pix_daily_rollup import PixDailyRollup
+from app.models.pix_ledger import PixLedger
+from app.models.transaction import Transaction
+from app.services.pix_batch_service import (
+    PixBatchItem,
+    PixBatchValidationError,
+    send_pix_batch,
+)
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import apply_ledger_entry, get_available_balance, ledger_balance
+
+
+def _fund(db, user_id, amount):
+    apply_ledger_entry(db, user_id=user_id, kind="credit", amount=Decimal(amount))
+    db.commit()
+
+
+def _items(*values, prefix="k"):
+    return [
+        PixBatchItem(valor=Decimal(v), chave_pix=f"dest-{i}@pix", idempotency_key=f"{prefix}-{i}")
+        for i, v in enumerate(values)
+    ]
+
+
+def test_batch_debits_once_and_records_everything(db):
+    _fund(db, 1, "100.00")
+
+    result = send_pix_batch(db, user_id=1, items=_items("10.00", "20.50", "5.25"))
+
+    assert result["status"] == "success"
+    assert result["succeeded"] == 3
+    assert result["valor_total"] == "35.75"
+    assert [item["index"] for item in result["items"]] == [0, 1, 2]
+    assert get_available_balance(db, 1) == Decimal("64.25")
+    assert ledger_balance(db, 1) == Decimal("64.25")
+    assert db.query(Transaction).filter_by(user_id=1).count() == 3
+    assert db.query(PixLedger).filter_by(user_id=1, kind="debit").count() == 3
+    rollup = db.query(PixDailyRollup).filter_by(user_id=1).one()
+    assert Decimal(rollup.saidas) == Decimal("35.75")
+    assert rollup.count == 4  # crédito inicial + 3 débitos
+
+    # ledger aponta para a transação de cada item
+    ledger_refs = {row.ref_tx_id for row in db.query(PixLedger).filter_by(kind="debit")}
+    assert ledger_refs == {item["id"] for item in result["items"]}
+
+
+def test_batch_items_share_idempotency_with_single_send(db):
+    _fund(db, 2, "100.00")
+    send_pix_batch(db, user_id=2, items=_items("10.00", prefix="shared"))
+
+    stored = db.query(IdempotencyKey).filter_by(key="shared-0").one()
+    assert stored.namespace == "pix_send"
+    replay = send_pix(db, user_id=2, valor=Decimal("10.00"), chave_pix="dest-0@pix", idempotency_key="shared-0")
+    assert replay == json_codec.loads(stored.response_json)
+
+    # reenviar o mesmo lote não debita de novo
+    again = send_pix_batch(db, user_id=2, items=_items("10.00", prefix="shared"))
+    assert again["items"][0]["replayed"] is True
+    assert get_available_balance(db, 2) == Decimal("90.00")
+
+
+def test_atomic_batch_rejects_everything_on_insufficient_balance(db):
+    _fund(db, 3, "30.00")
+
+    result = send_pix_batch(db, user_id=3, items=_items("10.00", "25.00"), mode="atomic")
+
+    assert result["status"] == "rejected"
+    assert [item["code"] for item in result["items"]] == ["BATCH_REJECTED", "SALDO_INSUFICIENTE"]
+    assert get_available_balance(db, 3) == Decimal("30.00")
+    assert db.query(Transaction).filter_by(user_id=3).count() == 0
+    assert db.query(IdempotencyKey).count() == 0
+
+
+def test_partial_batch_sends_what_fits(db):
+    _fund(db, 4, "30.00")
+
+    result = send_pix_batch(db, user_id=4, items=_items("10.00", "25.00", "15.00"), mode="partial")
+
+    assert result["status"] == "partial"
+    assert [item["status"] for item in result["items"]] == ["success", "failed", "success"]
+    assert result["valor_total"] == "25.00"
+    assert get_available_balance(db, 4) == Decimal("5.00")
+    # item que falhou não grava a key: pode ser reenviado
+    assert {row.key for row in db.query(IdempotencyKey)} == {"k-0", "k-2"}
+
+
+def test_conflicting_key_fails_the_item(db):
+    _fund(db, 5, "50.00")
+    send_pix(db, user_id=5, valor=Decimal("10.00"), chave_pix="outra@pix", idempotency_key="k-0")
+
+    result = send_pix_batch(db, user_id=5, items=_items("10.00", "5.00"), mode="partial")
+
+    assert result["items"][0]["code"] == "IDEMPOTENCY_KEY_REUSE_DIFFERENT_PAYLOAD"
+    assert result["items"][1]["status"] == "success"
+
+
+@pytest.mark.parametrize(
+    "items, mode",
+    [
+        ([], None),
+        ([PixBatchItem(valor=Decimal("1"), chave_pix="a@pix", idempotency_key="x")] * 2, None),
+        ([PixBatchItem(valor=Decimal("1"), chave_pix="a@pix")], "all_or_nothing"),
+    ],
+)
+def test_malformed_batches_are_rejected_before_touching_the_database(db, items, mode):
+    with pytest.raises(PixBatchValidationError):
+        send_pix_batch(db, user_id=6, items=items, mode=mode)
+
+
+def test_batch_endpoint_derives_item_keys_from_header(monkeypatch):
+    import uuid
+
+    from fastapi.testclient import TestClient
+
+    from app import models
+    from app.database import SessionLocal, engine
+    from app.main import app
+    from app.utils.security import hash_password
+
+    monkeypatch.setenv("LOGIN_RL_ENABLED", "0")
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    user = session.query(models.User).filter(models.User.email == "batch@local").first()
+    if not user:
+        user = models.User(username="batch", email="batch@local", role="user")
+        session.add(user)
+    user.hashed_password = hash_password("batch123")
+    session.commit()
+    balance = get_available_balance(session, user.id)
+    if balance < Decimal("50.00"):
+        _fund(session, user.id, str(Decimal("50.00") - balance))
+    session.close()
+
+    client = TestClient(app)
+    token = client.post(
+        "/api/v1/auth/login", json={"username": "batch@local", "password": "batch123"}
+    ).json()["access_token"]
+    # app.db persiste entre execuções: key nova a cada rodada
+    batch_key = f"folha-{uuid.uuid4().hex[:8]}"
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": batch_key}
+    payload = {
+        "items": [
+            {"chave_pix": "a@pix", "valor": "10.00"},
+            {"chave_pix": "b@pix", "valor": "60.00"},
+        ],
+        "mode": "partial",
+    }
+
+    resp = client.post("/api/v1/pix/send/batch", json=payload, headers=headers)
+
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["status"] == "partial"
+    assert [item["idempotency_key"] for item in body["items"]] == [f"{batch_key}:0", f"{batch_key}:1"]
+    assert body["items"][1]["code"] == "SALDO_INSUFICIENTE"
+
+    replay = client.post("/api/v1/pix/send/batch", json=payload, headers=headers).json()
+    assert replay["items"][0]["replayed"] is True
+
+    atomic = client.post("/api/v1/pix/send/batch", json={**payload, "mode": "atomic"}, headers=headers)
+    assert atomic.status_code == 400
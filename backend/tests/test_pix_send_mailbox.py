@@ -0,0 +1,203 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import threading
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from app.core.observability import PIX_SEND_QUEUE_REJECTED_TOTAL, PIX_SEND_TOTAL
+from app.models.wallet_balance import WalletBalance
+from app.services.pix_send_mailbox import (
+    PixSendQueueBusy,
+    UserSendMailbox,
+    release_idle_connection,
+)
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import apply_ledger_entry
+
+
+def _run_concurrently(count, fn):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker(index):
+        barrier.wait()
+        try:
+            fn(index)
+        except Exception as exc:  # pragma: no cover - falha aparece no assert
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return errors
+
+
+def test_same_user_runs_one_at_a_time_other_users_in_parallel():
+    mailbox = UserSendMailbox(max_pending=20, wait_timeout=5)
+    active = {1: 0, 2: 0}
+    peak = {1: 0, 2: 0}
+    overlap = threading.Event()
+    lock = threading.Lock()
+
+    def send(index):
+        user_id = 1 if index % 2 == 0 else 2
+        with mailbox.turn(user_id):
+            with lock:
+                active[user_id] += 1
+                peak[user_id] = max(peak[user_id], active[user_id])
+                if active[1] and active[2]:
+                    overlap.set()
+            time.sleep(0.02)
+            with lock:
+                active[user_id] -= 1
+
+    assert _run_concurrently(10, send) == []
+    assert peak == {1: 1, 2: 1}
+    assert overlap.is_set()
+    assert mailbox.pending(1) == mailbox.pending(2) == 0
+
+
+def test_full_queue_and_wait_timeout_are_rejected():
+    mailbox = UserSendMailbox(max_pending=2, wait_timeout=0.1)
+    full = PIX_SEND_QUEUE_REJECTED_TOTAL.labels(reason="full")
+    full_before = full._value.get()
+    release = threading.Event()
+    holding = threading.Event()
+
+    def hold():
+        with mailbox.turn(7):
+            holding.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert holding.wait(5)
+    try:
+        # segundo na fila desiste no timeout e sai da fila
+        with pytest.raises(PixSendQueueBusy) as timeout:
+            with mailbox.turn(7):
+                pass
+        assert timeout.value.reason == "timeout"
+        assert mailbox.pending(7) == 1
+
+        waiter = threading.Thread(target=lambda: mailbox.turn(7, timeout=5).__enter__())
+        waiter.daemon = True
+        waiter.start()
+        for _ in range(100):
+            if mailbox.pending(7) == 2:
+                break
+            time.sleep(0.01)
+
+        with pytest.raises(PixSendQueueBusy) as rejected:
+            with mailbox.turn(7):
+                pass
+        assert rejected.value.reason == "full"
+        assert full._value.get() == full_before + 1
+    finally:
+        release.set()
+        holder.join(5)
+
+
+def test_release_idle_connection_ends_read_only_transaction(session_factory):
+    db = session_factory()
+    try:
+        db.execute(text("SELECT 1"))
+        assert db.in_transaction()
+        release_idle_connection(db)
+        assert not db.in_transaction()
+
+        db.add(WalletBalance(user_id=99, available=Decimal("1.00"), version=0))
+        db.execute(text("SELECT 1"))
+        release_idle_connection(db)
+        # escrita pendente: não descarta
+        assert db.in_transaction()
+        assert db.new
+    finally:
+        db.close()
+
+
+def test_concurrent_sends_for_one_user_are_serialized(session_factory):
+    db = session_factory()
+    apply_ledger_entry(db, user_id=3, kind="credit", amount=Decimal("100.00"))
+    db.commit()
+    db.close()
+
+    def send(index):
+        session = session_factory()
+        try:
+            send_pix(
+                session,
+                user_id=3,
+                valor=Decimal("10.00"),
+                chave_pix=f"folha-{index}@pix",
+                idempotency_key=f"folha-{index}",
+            )
+        finally:
+            session.close()
+
+    assert _run_concurrently(8, send) == []
+
+    db = session_factory()
+    try:
+        balance = db.query(WalletBalance).filter_by(user_id=3).one()
+        assert Decimal(balance.available) == Decimal("20.00")
+    finally:
+        db.close()
+
+
+def _pix_send_total():
+    return sum(
+        sample.value
+        for family in PIX_SEND_TOTAL.collect()
+        for sample in family.samples
+        if sample.name.endswith("_total")
+    )
+
+
+@pytest.mark.parametrize(
+    "path, target, payload, outcome",
+    [
+        ("/api/v1/pix/send", "send_pix", {"chave_pix": "a@pix", "valor": "1.00"}, "queue_busy"),
+        (
+            "/api/v1/pix/send/batch",
+            "send_pix_batch",
+            {"items": [{"chave_pix": "a@pix", "valor": "1.00"}]},
+            "batch_queue_busy",
+        ),
+    ],
+)
+def test_queue_busy_is_counted_once_through_the_app(monkeypatch, db, path, target, payload, outcome):
+    from fastapi.testclient import TestClient
+
+    from app.api.v1.routes import pix as pix_routes
+    from app.core.rate_limit import limiter
+    from app.database import get_db
+    from app.main import app
+    from app.utils.authz import require_customer
+
+    def busy(*args, **kwargs):
+        raise PixSendQueueBusy("full")
+
+    monkeypatch.setattr(pix_routes, target, busy)
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    monkeypatch.setitem(app.dependency_overrides, require_customer, lambda: SimpleNamespace(id=9))
+    limiter.reset()
+    total = _pix_send_total()
+    by_outcome = PIX_SEND_TOTAL.labels(outcome=outcome)
+    before = by_outcome._value.get()
+
+    response = TestClient(app).post(path, json=payload)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    # rota conta queue_busy; o middleware não soma um rate_limited pelo mesmo 429
+    assert by_outcome._value.get() == before + 1
+    assert _pix_send_total() == total + 1
@@ -0,0 +1,120 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.utils import rate_limit
+from app.utils.rate_limit import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    SqliteRateLimitBackend,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _db_backend(clock):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return DatabaseRateLimitBackend(sessionmaker(bind=engine), clock=clock)
+
+
+@pytest.fixture(params=["memory", "sqlite", "database"])
+def make_backend(request, tmp_path):
+    def _make(clock):
+        if request.param == "memory":
+            return MemoryRateLimitBackend(clock=clock)
+        if request.param == "sqlite":
+            return SqliteRateLimitBackend(str(tmp_path / "rl.sqlite3"), clock=clock)
+        return _db_backend(clock)
+
+    return _make
+
+
+def test_peek_does_not_consume_and_check_blocks_at_limit(make_backend):
+    clock = FakeClock()
+    backend = make_backend(clock)
+
+    for _ in range(3):
+        assert backend.hit("login:ip:1", 3, 60, consume=False) == (True, 0)
+        assert backend.hit("login:ip:1", 3, 60, consume=True) == (True, 0)
+
+    allowed, retry_after = backend.hit("login:ip:1", 3, 60, consume=False)
+    assert allowed is False
+    assert retry_after >= 1
+
+    assert backend.hit("login:ip:1", 3, 60, consume=True)[0] is False
+    assert backend.hit("login:ip:other", 3, 60, consume=True) == (True, 0)
+
+
+def test_sliding_window_releases_gradually(make_backend):
+    clock = FakeClock(now=600.0)  # início de janela
+    backend = make_backend(clock)
+
+    for _ in range(4):
+        backend.hit("k", 4, 60, consume=True)
+
+    clock.now = 630.0
+    allowed, retry_after = backend.hit("k", 4, 60, consume=False)
+    assert allowed is False
+    assert 30 <= retry_after <= 46
+
+    # na janela seguinte o peso da anterior cai com o tempo
+    clock.now = 660.0 + 20
+    assert backend.hit("k", 4, 60, consume=True) == (True, 0)
+
+    clock.now = 660.0 + 121
+    assert backend.hit("k", 4, 60, consume=False) == (True, 0)
+
+
+def test_shared_file_backend_enforces_one_limit_for_all_workers(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SqliteRateLimitBackend(path, clock=clock)
+    worker_b = SqliteRateLimitBackend(path, clock=clock)
+
+    assert worker_a.hit("login:ip:9", 2, 60, consume=True)[0] is True
+    assert worker_b.hit("login:ip:9", 2, 60, consume=True)[0] is True
+    assert worker_a.hit("login:ip:9", 2, 60, consume=False)[0] is False
+    assert worker_b.hit("login:ip:9", 2, 60, consume=True)[0] is False
+
+
+def test_memory_backend_evicts_expired_and_caps_keys():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(max_keys=3, clock=clock)
+
+    for index in range(5):
+        backend.hit(f"ip:{index}", 5, 60, consume=True)
+    assert len(backend) == 3
+
+    clock.now += 600
+    backend.hit("fresh", 5, 60, consume=True)
+    assert len(backend) == 1
+
+
+def test_rl_helpers_use_configured_backend():
+    backend = MemoryRateLimitBackend()
+    previous = rate_limit.get_rate_limit_backend()
+    rate_limit.set_rate_limit_backend(backend)
+    try:
+        assert rate_limit.rl_check("x", 1, 60) == (True, 0)
+        assert rate_limit.rl_peek("x", 1, 60)[0] is False
+        assert rate_limit.rl_check("x", 0, 60) == (True, 0)
+    finally:
+        rate_limit.set_rate_limit_backend(previous)
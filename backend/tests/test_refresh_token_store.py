@@ -0,0 +1,155 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import models
+from app.database import Base, SessionLocal, engine as app_engine
+from app.main import app
+from app.models.refresh_token import RefreshToken
+from app.services.refresh_token_service import (
+    issue_refresh_token,
+    purge_refresh_tokens,
+    rotate_refresh_token,
+)
+from app.utils.security import hash_password, hash_refresh_token
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _active(db, user_id):
+    return (
+        db.query(RefreshToken)
+        .filter(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .count()
+    )
+
+
+def test_rotation_revokes_presented_token(db):
+    first = issue_refresh_token(db, user_id=1, now=NOW)
+    db.commit()
+
+    rotated = rotate_refresh_token(db, first, now=NOW + timedelta(minutes=5))
+    db.commit()
+
+    assert rotated is not None
+    user_id, second = rotated
+    assert user_id == 1
+    assert second != first
+    # token usado não serve de novo; o novo serve
+    assert rotate_refresh_token(db, first, now=NOW + timedelta(minutes=6)) is None
+    assert rotate_refresh_token(db, second, now=NOW + timedelta(minutes=6))[0] == 1
+    db.commit()
+    assert _active(db, 1) == 1
+
+
+def test_expired_or_unknown_token_is_rejected(db):
+    raw = issue_refresh_token(db, user_id=2, now=NOW)
+    db.commit()
+
+    assert rotate_refresh_token(db, raw, now=NOW + timedelta(days=365)) is None
+    assert rotate_refresh_token(db, "nao-existe", now=NOW) is None
+
+
+def test_active_sessions_are_capped_per_user(db):
+    tokens = [
+        issue_refresh_token(db, user_id=3, now=NOW + timedelta(minutes=i), max_active=2)
+        for i in range(4)
+    ]
+    issue_refresh_token(db, user_id=4, now=NOW, max_active=2)
+    db.commit()
+
+    assert _active(db, 3) == 2
+    assert _active(db, 4) == 1
+    # as duas mais antigas foram revogadas
+    assert rotate_refresh_token(db, tokens[0], now=NOW + timedelta(hours=1)) is None
+    assert rotate_refresh_token(db, tokens[3], now=NOW + timedelta(hours=1)) is not None
+
+
+def test_purge_removes_expired_and_old_revoked_in_batches(db):
+    for i in range(5):
+        db.add(
+            RefreshToken(
+                user_id=5,
+                token_hash=f"expired-{i}",
+                expires_at=NOW - timedelta(days=1),
+                created_at=NOW - timedelta(days=8),
+            )
+        )
+    db.add(
+        RefreshToken(
+            user_id=5,
+            token_hash="revoked-old",
+            expires_at=NOW + timedelta(days=6),
+            revoked_at=NOW - timedelta(hours=30),
+            created_at=NOW - timedelta(days=1),
+        )
+    )
+    db.add(
+        RefreshToken(
+            user_id=5,
+            token_hash="revoked-recent",
+            expires_at=NOW + timedelta(days=6),
+            revoked_at=NOW - timedelta(hours=1),
+            created_at=NOW - timedelta(days=1),
+        )
+    )
+    active = issue_refresh_token(db, user_id=6, now=NOW)
+    db.commit()
+
+    purged = purge_refresh_tokens(db, now=NOW, batch_size=2, revoked_retention_hours=24)
+
+    assert purged == {"expired": 5, "revoked": 1}
+    remaining = {row.token_hash for row in db.query(RefreshToken).all()}
+    assert remaining == {"revoked-recent", hash_refresh_token(active)}
+
+
+def test_rotation_is_a_single_probe_on_the_token_hash_index(db):
+    plan = db.execute(
+        text(
+            "EXPLAIN QUERY PLAN UPDATE refresh_tokens SET revoked_at = :now "
+            "WHERE token_hash = :h AND revoked_at IS NULL AND expires_at > :now"
+        ),
+        {"now": NOW, "h": "x"},
+    ).all()
+
+    assert any("ix_refresh_tokens_token_hash" in str(row[-1]) for row in plan)
+
+
+@pytest.fixture()
+def login_user():
+    Base.metadata.create_all(bind=app_engine)
+    session = SessionLocal()
+    user = session.query(models.User).filter(models.User.email == "refresh@local").first()
+    if not user:
+        user = models.User(username="refresh", email="refresh@local", role="user")
+        session.add(user)
+    user.hashed_password = hash_password("refresh123")
+    session.commit()
+    session.close()
+
+
+def test_refresh_endpoint_rotates_and_rejects_reuse(monkeypatch, login_user):
+    monkeypatch.setenv("LOGIN_RL_ENABLED", "0")
+    client = TestClient(app)
+
+    login = client.post("/api/v1/auth/login", json={"username": "refresh@local", "password": "refresh123"})
+    assert login.status_code == 200
+    first = login.json()["refresh_token"]
+
+    refreshed = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert refreshed.status_code == 200
+    body = refreshed.json()
+    assert body["access_token"]
+    assert body["refresh_token"] != first
+
+    reused = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert reused.status_code == 401
+
+    again = client.post("/api/v1/auth/refresh", json={"refresh_token": body["refresh_token"]})
+    assert again.status_code == 200
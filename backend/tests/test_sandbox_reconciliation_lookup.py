@@ -0,0 +1,128 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret")
+
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routes import wallet as wallet_routes
+from app.models.idempotency import IdempotencyKey
+from app.models.user_main import User
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.partner import SandboxPartnerAdapter
+
+BASE_TIME = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def sandbox_adapter(monkeypatch):
+    adapter = SandboxPartnerAdapter()
+    monkeypatch.setattr(wallet_routes, "get_partner_adapter", lambda: adapter)
+    return adapter
+
+
+def _record(db, index, reference, status="confirmed"):
+    key = f"wallet-sandbox-webhook:{index}"
+    received_at = BASE_TIME + timedelta(minutes=index)
+    db.add(
+        IdempotencyKey(
+            key=key,
+            request_hash=f"hash-{index}",
+            status_code=200,
+            response_json=json.dumps(
+                {
+                    "event": {
+                        "provider_reference": reference,
+                        "event_type": "pix.payment.updated",
+                        "status": status,
+                        "amount": "10.00",
+                        "received_at": received_at.isoformat(),
+                    },
+                    "webhook": {"accepted": True},
+                }
+            ),
+        )
+    )
+    db.add(
+        WalletWebhookEvent(
+            idempotency_key=key,
+            user_id=1,
+            provider="sandbox",
+            provider_reference=reference,
+            event_type="pix.payment.updated",
+            status=status,
+            amount=Decimal("10.00"),
+            received_at=received_at,
+        )
+    )
+
+
+def test_lookup_finds_references_older_than_the_old_scan_window(db):
+    _record(db, 0, "ref-antiga")
+    for index in range(1, 301):
+        _record(db, index, f"ref-{index}")
+    db.commit()
+
+    response = wallet_routes.get_wallet_pix_sandbox_reconciliation(
+        provider_reference="ref-antiga",
+        current_user=User(id=1),
+        db=db,
+    )
+
+    assert response["reconciliation"]["event_found"] is True
+    assert response["reconciliation"]["status"] == "confirmed"
+    assert response["idempotency"]["key"] == "wallet-sandbox-webhook:0"
+    assert response["webhook"] == {"accepted": True}
+
+
+def test_lookup_prefers_latest_event_for_reference(db):
+    _record(db, 0, "ref-x", status="pending")
+    _record(db, 1, "ref-x", status="confirmed")
+    db.commit()
+
+    match = wallet_routes._find_sandbox_webhook_event_by_reference(db, "ref-x")
+
+    assert match["idempotency_key"] == "wallet-sandbox-webhook:1"
+    assert wallet_routes._find_sandbox_webhook_event_by_reference(db, "missing") is None
+
+
+def test_batch_reconciles_references_in_request_order(db):
+    _record(db, 0, "ref-a")
+    _record(db, 1, "ref-b")
+    db.commit()
+
+    response = wallet_routes.reconcile_wallet_pix_sandbox_batch(
+        payload=wallet_routes.WalletSandboxReconciliationBatchIn(
+            provider_references=["ref-b", "ref-nao-existe", "ref-a"],
+        ),
+        current_user=User(id=1),
+        db=db,
+    )
+
+    assert response["reconciliation"]["total_requested"] == 3
+    assert response["reconciliation"]["total_found"] == 2
+    assert [item["provider_reference"] for item in response["items"]] == [
+        "ref-b",
+        "ref-nao-existe",
+        "ref-a",
+    ]
+    assert [item["event_found"] for item in response["items"]] == [True, False, True]
+    assert response["can_credit_balance"] is False
+
+
+def test_batch_rejects_oversized_request(db):
+    with pytest.raises(HTTPException) as exc:
+        wallet_routes.reconcile_wallet_pix_sandbox_batch(
+            payload=wallet_routes.WalletSandboxReconciliationBatchIn(
+                provider_references=[f"ref-{i}" for i in range(101)],
+            ),
+            current_user=User(id=1),
+            db=db,
+        )
+
+    assert exc.value.status_code == 422
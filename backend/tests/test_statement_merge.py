@@ -0,0 +1,176 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.api.v1.routes import wallet as wallet_routes
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.partner.types import StatementItem
+from app.services.statement_merge_service import (
+    decode_statement_cursor,
+    merge_statement_sources,
+    sorted_statement_source,
+)
+
+BASE_TIME = datetime(2026, 1, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _item(reference: str, minutes: int) -> StatementItem:
+    return StatementItem(
+        provider_reference=reference,
+        amount=Decimal("1.00"),
+        direction="credit",
+        status="confirmed",
+        created_at=(BASE_TIME + timedelta(minutes=minutes)).isoformat(),
+    )
+
+
+class CountingSource:
+    def __init__(self, items):
+        self.items = items
+        self.consumed = 0
+
+    def __iter__(self):
+        for item in self.items:
+            self.consumed += 1
+            yield item
+
+
+def test_merge_interleaves_sources_by_created_at_desc():
+    partner = sorted_statement_source("partner", [_item("p1", 1), _item("p3", 30), _item("p2", 20)])
+    webhook = iter([_item("w3", 25), _item("w2", 15), _item("w1", 5)])
+
+    items, next_cursor = merge_statement_sources({"partner": partner, "webhook": webhook}, limit=10)
+
+    assert [item.provider_reference for item in items] == ["p3", "w3", "p2", "w2", "w1", "p1"]
+    assert next_cursor is None
+
+
+def test_merge_pulls_only_what_the_page_consumes():
+    older = CountingSource([_item(f"o{i}", -i) for i in range(1000)])
+    newer = CountingSource([_item(f"n{i}", 100 - i) for i in range(1000)])
+
+    items, next_cursor = merge_statement_sources({"older": older, "newer": newer}, limit=5)
+
+    assert [item.provider_reference for item in items] == ["n0", "n1", "n2", "n3", "n4"]
+    assert next_cursor is not None
+    # limit + 1 da fonte que domina a página, 1 (cabeça do heap) da outra
+    assert newer.consumed == 6
+    assert older.consumed == 1
+
+
+def test_cursor_walks_every_item_exactly_once():
+    partner_items = [_item(f"p{i}", i * 3) for i in range(7)]
+    webhook_items = [_item(f"w{i}", i * 2) for i in range(9)]
+    # empate de created_at entre fontes
+    webhook_items.append(_item("w-tie", 6))
+
+    seen = []
+    after = None
+    while True:
+        items, next_cursor = merge_statement_sources(
+            {
+                "partner": sorted_statement_source("partner", partner_items),
+                "webhook": sorted_statement_source("webhook", webhook_items),
+            },
+            limit=4,
+            after=after,
+        )
+        seen.extend(item.provider_reference for item in items)
+        if next_cursor is None:
+            break
+        after = decode_statement_cursor(next_cursor)
+
+    expected = sorted(partner_items + webhook_items, key=lambda item: item.created_at, reverse=True)
+    assert sorted(seen) == sorted(item.provider_reference for item in expected)
+    assert len(seen) == len(set(seen))
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_statement_cursor("nao-e-um-cursor")
+
+
+def test_webhook_source_pages_through_database_lazily(db):
+    for i in range(12):
+        db.add(
+            WalletWebhookEvent(
+                idempotency_key=f"wallet-sandbox-webhook:{i}",
+                user_id=7,
+                provider="sandbox",
+                provider_reference=f"ref-{i:02d}",
+                event_type="pix.payment.confirmed",
+                status="confirmed",
+                amount=Decimal("5.00"),
+                received_at=BASE_TIME + timedelta(minutes=i),
+            )
+        )
+    db.commit()
+
+    seen = []
+    after = None
+    while True:
+        items, next_cursor = merge_statement_sources(
+            {
+                "webhook": wallet_routes._iter_webhook_statement_items(
+                    db,
+                    user_id=7,
+                    page_size=3,
+                    before=after[0] if after else None,
+                )
+            },
+            limit=5,
+            after=after,
+        )
+        seen.extend(item.provider_reference for item in items)
+        if next_cursor is None:
+            break
+        after = decode_statement_cursor(next_cursor)
+
+    assert seen == [f"ref-{i:02d}" for i in reversed(range(12))]
+
+
+def test_webhook_source_keeps_only_latest_event_per_reference_across_pages(db):
+    events = [("dup", 0), ("a", 1), ("b", 2), ("dup", 3)]
+    for i, (reference, minutes) in enumerate(events):
+        db.add(
+            WalletWebhookEvent(
+                idempotency_key=f"wallet-sandbox-webhook:{i}",
+                user_id=8,
+                provider="sandbox",
+                provider_reference=reference,
+                event_type="pix.payment.confirmed",
+                status="confirmed",
+                amount=Decimal("5.00"),
+                received_at=BASE_TIME + timedelta(minutes=minutes),
+            )
+        )
+    db.commit()
+
+    seen = []
+    after = None
+    while True:
+        items, next_cursor = merge_statement_sources(
+            {
+                "webhook": wallet_routes._iter_webhook_statement_items(
+                    db,
+                    user_id=8,
+                    page_size=1,
+                    before=after[0] if after else None,
+                )
+            },
+            limit=1,
+            after=after,
+        )
+        seen.extend((item.provider_reference, item.created_at) for item in items)
+        if next_cursor is None:
+            break
+        after = decode_statement_cursor(next_cursor)
+
+    # "dup" sai só uma vez, com o evento mais recente, mesmo em outra página
+    assert [reference for reference, _ in seen] == ["dup", "b", "a"]
+    assert seen[0][1] == (BASE_TIME + timedelta(minutes=3)).isoformat()
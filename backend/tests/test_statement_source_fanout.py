@@ -0,0 +1,157 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.v1.routes import wallet as wallet_routes
+from app.models.wallet_webhook_event import WalletWebhookEvent
+from app.partner import DemoPartnerAdapter, PartnerAdapter, SandboxPartnerAdapter, StatementItem
+
+BASE_TIME = datetime(2026, 2, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def db(db):
+    for i in range(3):
+        db.add(
+            WalletWebhookEvent(
+                idempotency_key=f"wallet-sandbox-webhook:{i}",
+                user_id=5,
+                provider="sandbox",
+                provider_reference=f"wh-{i}",
+                event_type="pix.payment.confirmed",
+                status="confirmed",
+                amount=Decimal("3.00"),
+                received_at=BASE_TIME + timedelta(minutes=i),
+            )
+        )
+    db.commit()
+    return db
+
+
+def _statement(db, **kwargs):
+    return asyncio.run(
+        wallet_routes.get_wallet_structured_statement(
+            current_user=SimpleNamespace(id=5),
+            db=db,
+            **kwargs,
+        )
+    )
+
+
+def _use_sandbox(monkeypatch, partner_statement):
+    adapter = SandboxPartnerAdapter()
+    monkeypatch.setattr(wallet_routes, "get_partner_adapter", lambda: adapter)
+    monkeypatch.setattr(wallet_routes, "aget_partner_wallet_statement", partner_statement)
+
+
+def test_partner_and_webhook_sources_are_merged(monkeypatch, db):
+    async def partner(**_kwargs):
+        return [
+            StatementItem(
+                provider_reference="partner-1",
+                amount=Decimal("9.00"),
+                direction="debit",
+                status="confirmed",
+                created_at=(BASE_TIME + timedelta(seconds=90)).isoformat(),
+            )
+        ]
+
+    _use_sandbox(monkeypatch, partner)
+
+    result = _statement(db, limit=10)
+
+    assert [item["provider_reference"] for item in result["statement"]["items"]] == [
+        "wh-2",
+        "partner-1",
+        "wh-1",
+        "wh-0",
+    ]
+    assert result["statement"]["partial"] is False
+    assert result["wallet"]["adapter_error"] is None
+
+
+def test_slow_partner_times_out_and_statement_is_partial(monkeypatch, db):
+    async def slow_partner(**_kwargs):
+        await asyncio.sleep(5)
+        return []
+
+    _use_sandbox(monkeypatch, slow_partner)
+    monkeypatch.setattr(wallet_routes, "WALLET_STATEMENT_SOURCE_TIMEOUT_SEC", 0.1)
+
+    started = time.monotonic()
+    result = _statement(db, limit=10)
+
+    assert time.monotonic() - started < 2
+    assert result["statement"]["count"] == 3
+    assert result["statement"]["partial"] is True
+    assert result["wallet"]["source"] == "sandbox"
+    assert result["wallet"]["adapter_error"].startswith("partner: timeout")
+
+
+def test_sources_are_fetched_concurrently(monkeypatch, db):
+    async def slow_partner(**_kwargs):
+        await asyncio.sleep(0.3)
+        return []
+
+    original_prefetch = wallet_routes._prefetch_statement_items
+
+    def slow_prefetch(*args, **kwargs):
+        time.sleep(0.3)
+        return original_prefetch(*args, **kwargs)
+
+    _use_sandbox(monkeypatch, slow_partner)
+    monkeypatch.setattr(wallet_routes, "_prefetch_statement_items", slow_prefetch)
+
+    started = time.monotonic()
+    result = _statement(db, limit=10)
+
+    assert result["statement"]["count"] == 3
+    assert time.monotonic() - started < 0.55
+
+
+def test_all_sources_failing_keeps_unavailable_contract(monkeypatch, db):
+    async def broken_partner(**_kwargs):
+        raise RuntimeError("parceiro fora do ar")
+
+    adapter = DemoPartnerAdapter()
+    monkeypatch.setattr(wallet_routes, "get_partner_adapter", lambda: adapter)
+    monkeypatch.setattr(wallet_routes, "aget_partner_wallet_statement", broken_partner)
+
+    result = _statement(db, limit=10)
+
+    assert result["statement"]["items"] == []
+    assert result["wallet"]["source"] == "unavailable"
+    assert result["wallet"]["adapter_error"] == "partner: parceiro fora do ar"
+
+
+def test_default_async_adapter_calls_run_sync_implementation():
+    class SyncOnlyAdapter(SandboxPartnerAdapter):
+        # força o caminho padrão do contrato (thread)
+        aget_statement = PartnerAdapter.aget_statement
+        aget_balance = PartnerAdapter.aget_balance
+
+        def get_statement(self, *, user_id, limit=50):
+            return [
+                StatementItem(
+                    provider_reference=f"sync-{user_id}-{limit}",
+                    amount=Decimal("1.00"),
+                    direction="credit",
+                    status="confirmed",
+                )
+            ]
+
+    adapter = SyncOnlyAdapter()
+
+    items = asyncio.run(adapter.aget_statement(user_id=8, limit=2))
+    balance = asyncio.run(adapter.aget_balance(user_id=8))
+
+    assert [item.provider_reference for item in items] == ["sync-8-2"]
+    assert balance.user_id == 8
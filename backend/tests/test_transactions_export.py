@@ -0,0 +1,87 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import asyncio
+import csv
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.transaction import Transaction
+from app.routers import export_csv
+
+
+@pytest.fixture()
+def session_factory(memory_session_factory, monkeypatch):
+    factory = memory_session_factory
+
+    db = factory()
+    for day in range(1, 6):
+        db.add(
+            Transaction(
+                user_id=1,
+                tipo="saida",
+                valor=10.5 * day,
+                referencia=f'chave,"{day}"',
+                criado_em=datetime(2026, 3, day, 12, 0, 0),
+            )
+        )
+    db.add(Transaction(user_id=2, tipo="entrada", valor=1.0, criado_em=datetime(2026, 3, 1)))
+    db.commit()
+    db.close()
+
+    monkeypatch.setattr(export_csv, "SessionLocal", factory)
+    monkeypatch.setattr(export_csv, "EXPORT_CHUNK_ROWS", 2)
+    return factory
+
+
+def _body(response) -> bytes:
+    async def _collect():
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk.encode() if isinstance(chunk, str) else chunk)
+        return chunks
+
+    return asyncio.run(_collect())
+
+
+def test_csv_export_streams_in_chunks_and_quotes_fields(session_factory):
+    response = export_csv._export_response(1, "csv", None, None)
+    chunks = _body(response)
+
+    assert response.media_type == "text/csv"
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == list(export_csv.EXPORT_COLUMNS)
+    assert len(rows) == 6
+    assert rows[1][4] == 'chave,"1"'
+    assert {r[5] for r in rows[1:]} == {"1"}
+
+
+def test_ndjson_export_applies_inclusive_date_range(session_factory):
+    response = export_csv._export_response(1, "ndjson", date(2026, 3, 2), date(2026, 3, 3))
+    lines = b"".join(_body(response)).decode().splitlines()
+
+    records = [json.loads(line) for line in lines]
+    assert [r["valor"] for r in records] == [21.0, 31.5]
+
+
+def test_export_rejects_inverted_range(session_factory):
+    with pytest.raises(HTTPException) as exc:
+        export_csv._export_response(1, "csv", date(2026, 3, 5), date(2026, 3, 1))
+    assert exc.value.status_code == 422
+
+
+def test_parquet_export_round_trips(session_factory):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import pyarrow as pa
+
+    response = export_csv._export_response(1, "parquet", None, None)
+    table = pq.read_table(pa.BufferReader(b"".join(_body(response))))
+
+    assert table.num_rows == 5
+    assert table.column("user_id").to_pylist() == [1] * 5
@@ -8,6 +8,7 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 os.environ.setdefault("SECRET_KEY", "test-secret-key")
 os.environ.setdefault("JWT_SECRET", "test-jwt-secret")
 
+from app.models.asaas_payment_correlation import AsaasPaymentCorrelation
 from app.models.idempotency import IdempotencyKey
 from app.partner.asaas_client import AsaasSandboxClient
 from app.partner.asaas_config import (
@@ -48,6 +49,7 @@ class FakeQuery:
 class FakeDb:
     def __init__(self, *, fail_commit=False):
         self.records = {}
+        self.correlations = {}
         self.pending = None
         self.inserted_keys = []
         self.committed = False
@@ -55,6 +57,10 @@ class FakeDb:
         self.fail_commit = fail_commit
 
     def add(self, record):
+        if isinstance(record, AsaasPaymentCorrelation):
+            # mesma transação do registro em idempotency_keys
+            self.correlations.setdefault(record.correlation_key, record)
+            return
         self.pending = record
 
     def flush(self):
@@ -85,6 +91,7 @@ class FakeDb:
 
         for key in self.inserted_keys:
             self.records.pop(key, None)
+            self.correlations.pop(key, None)
 
         self.inserted_keys.clear()
 
@@ -130,6 +137,7 @@ def test_prepares_correlated_pix_payment_and_commits_before_http():
 
     assert db.committed is True
     assert result.correlation_replayed is False
+    assert db.correlations[result.correlation_key].user_id == 321
     assert request.method == "POST"
     assert request.operation == "create_pix_payment"
     assert request.json["externalReference"] == (
@@ -11,6 +11,7 @@ os.environ.setdefault("SECRET_KEY", "test-secret-key")
 os.environ.setdefault("JWT_SECRET", "test-jwt-secret")
 
 from app.api.v1.routes import wallet as wallet_routes
+from app.models.asaas_payment_correlation import AsaasPaymentCorrelation
 from app.partner.asaas_config import (
     ASAAS_SANDBOX_BASE_URL,
     AsaasConfigError,
@@ -48,6 +49,7 @@ class FakeQuery:
 class FakeDb:
     def __init__(self, *, fail_commit=False):
         self.records = {}
+        self.correlations = {}
         self.pending = None
         self.inserted_key = None
         self.fail_commit = fail_commit
@@ -55,6 +57,9 @@ class FakeDb:
         self.rollback_count = 0
 
     def add(self, row):
+        if isinstance(row, AsaasPaymentCorrelation):
+            self.correlations.setdefault(row.correlation_key, row)
+            return
         self.pending = row
 
     def flush(self):
@@ -81,6 +86,7 @@ class FakeDb:
 
         if self.inserted_key is not None:
             self.records.pop(self.inserted_key, None)
+            self.correlations.pop(self.inserted_key, None)
 
         self.pending = None
         self.inserted_key = None
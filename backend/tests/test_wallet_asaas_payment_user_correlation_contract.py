@@ -2,6 +2,7 @@ import json
 
 import pytest
 
+from app.models.asaas_payment_correlation import AsaasPaymentCorrelation
 from app.models.idempotency import IdempotencyKey
 from app.partner.asaas_payment_correlation import (
     ASAAS_PAYMENT_CORRELATION_KEY_PREFIX,
@@ -15,25 +16,28 @@ from app.partner.asaas_payment_correlation import (
 
 
 class FakeQuery:
-    def __init__(self, db):
-        self.db = db
+    def __init__(self, rows):
+        self.rows = rows
         self.key = None
 
     def filter_by(self, **kwargs):
-        self.key = kwargs.get("key")
+        self.key = kwargs.get("key", kwargs.get("correlation_key"))
         return self
 
     def first(self):
-        return self.db.records.get(self.key)
+        return self.rows.get(self.key)
 
 
 class FakeDb:
     def __init__(self):
         self.records = {}
+        self.correlations = {}
 
     def query(self, model):
+        if model is AsaasPaymentCorrelation:
+            return FakeQuery(self.correlations)
         assert model is IdempotencyKey
-        return FakeQuery(self)
+        return FakeQuery(self.records)
 
 
 def _opaque_reference(character: str = "a") -> str:
@@ -0,0 +1,239 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app.core.observability import WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL
+from app.models.pix_ledger import PixLedger
+from app.models.wallet_balance import WalletBalance
+from app.services import pix_service, wallet_balance_service
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import (
+    WalletBalanceConflict,
+    apply_ledger_entry,
+    debit_wallet_balance_optimistic,
+    ledger_balance,
+)
+
+
+def _fund(session_factory, user_id, amount):
+    db = session_factory()
+    try:
+        apply_ledger_entry(db, user_id=user_id, kind="credit", amount=Decimal(amount))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _balance(session_factory, user_id):
+    db = session_factory()
+    try:
+        return db.query(WalletBalance).filter_by(user_id=user_id).one()
+    finally:
+        db.close()
+
+
+def test_concurrent_debits_never_overdraw(session_factory):
+    _fund(session_factory, 1, "100.00")
+    outcomes = []
+    outcomes_lock = threading.Lock()
+    barrier = threading.Barrier(16)
+
+    def worker():
+        db = session_factory()
+        barrier.wait()
+        try:
+            for _ in range(3):
+                try:
+                    debit_wallet_balance_optimistic(
+                        db, user_id=1, amount=Decimal("7.00"), max_attempts=50, backoff_ms=1
+                    )
+                    apply_ledger_entry(
+                        db, user_id=1, kind="debit", amount=Decimal("7.00"), balance_applied=True
+                    )
+                    db.commit()
+                    result = "ok"
+                except ValueError:
+                    db.rollback()
+                    result = "saldo"
+                with outcomes_lock:
+                    outcomes.append(result)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert len(outcomes) == 48
+    # 100 / 7 = 14 débitos; o resto recusado por saldo, nunca negativo
+    assert outcomes.count("ok") == 14
+    balance = _balance(session_factory, 1)
+    assert Decimal(balance.available) == Decimal("2.00")
+    assert balance.version == 1 + 14
+
+    db = session_factory()
+    try:
+        assert ledger_balance(db, 1) == Decimal("2.00")
+        assert db.query(PixLedger).filter_by(user_id=1, kind="debit").count() == 14
+    finally:
+        db.close()
+
+
+def _bump_version_on_first_reads(monkeypatch, user_id, times):
+    """
+    Simula outra transação mudando o saldo entre a leitura e o UPDATE.
+    Na mesma conexão: no sqlite o UPDATE sem linhas já segura o lock de escrita.
+    """
+    real_read = wallet_balance_service._read_balance_version
+    calls = {"n": 0}
+
+    def read(db, uid):
+        current = real_read(db, uid)
+        if calls["n"] < times:
+            calls["n"] += 1
+            db.execute(
+                update(WalletBalance)
+                .where(WalletBalance.user_id == user_id)
+                .values(version=WalletBalance.version + 1)
+            )
+        return current
+
+    monkeypatch.setattr(wallet_balance_service, "_read_balance_version", read)
+    return calls
+
+
+def test_version_conflict_is_retried(monkeypatch, session_factory):
+    _fund(session_factory, 2, "50.00")
+    retried = WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL.labels(outcome="retried")
+    before = retried._value.get()
+    _bump_version_on_first_reads(monkeypatch, 2, times=2)
+
+    db = session_factory()
+    try:
+        version = debit_wallet_balance_optimistic(db, user_id=2, amount=Decimal("20.00"), backoff_ms=0)
+        db.commit()
+    finally:
+        db.close()
+
+    assert retried._value.get() == before + 2
+    # crédito (1) + 2 escritas concorrentes + o débito
+    assert version == 4
+    assert Decimal(_balance(session_factory, 2).available) == Decimal("30.00")
+
+
+def test_exhausted_retries_raise_conflict_without_debiting(monkeypatch, session_factory):
+    _fund(session_factory, 3, "50.00")
+    _bump_version_on_first_reads(monkeypatch, 3, times=10)
+
+    db = session_factory()
+    try:
+        with pytest.raises(WalletBalanceConflict):
+            debit_wallet_balance_optimistic(
+                db, user_id=3, amount=Decimal("20.00"), max_attempts=3, backoff_ms=0
+            )
+        db.rollback()
+    finally:
+        db.close()
+
+    assert Decimal(_balance(session_factory, 3).available) == Decimal("50.00")
+
+
+def test_send_pix_in_optimistic_mode(monkeypatch, session_factory):
+    monkeypatch.setattr(pix_service, "WALLET_BALANCE_LOCK_MODE", "optimistic")
+
+    def fail_on_lock(*args, **kwargs):
+        raise AssertionError("modo otimista não deve travar o saldo com FOR UPDATE")
+
+    _fund(session_factory, 4, "30.00")
+    monkeypatch.setattr(pix_service, "lock_wallet_balance", fail_on_lock)
+    monkeypatch.setattr(wallet_balance_service, "lock_wallet_balance", fail_on_lock)
+
+    db = session_factory()
+    try:
+        tx = send_pix(db, user_id=4, valor=Decimal("12.50"), chave_pix="a@pix", idempotency_key="opt-1")
+        assert tx.valor == Decimal("12.50")
+        replay = send_pix(db, user_id=4, valor=Decimal("12.50"), chave_pix="a@pix", idempotency_key="opt-1")
+        assert replay["id"] == tx.id
+
+        with pytest.raises(ValueError):
+            send_pix(db, user_id=4, valor=Decimal("20.00"), chave_pix="b@pix")
+        db.rollback()
+
+        assert ledger_balance(db, 4) == Decimal("17.50")
+    finally:
+        db.close()
+
+    assert Decimal(_balance(session_factory, 4).available) == Decimal("17.50")
+
+
+def test_first_debit_materializes_missing_balance_row(session_factory):
+    db = session_factory()
+    try:
+        # lançamento anterior à tabela de saldo: só no ledger
+        db.add(PixLedger(user_id=5, kind="credit", amount=Decimal("40.00")))
+        db.commit()
+
+        debit_wallet_balance_optimistic(db, user_id=5, amount=Decimal("15.00"))
+        db.commit()
+    finally:
+        db.close()
+
+    assert Decimal(_balance(session_factory, 5).available) == Decimal("25.00")
+
+
+def test_concurrent_send_pix_races_on_version_without_user_slot(monkeypatch, session_factory):
+    monkeypatch.setattr(pix_service, "WALLET_BALANCE_LOCK_MODE", "optimistic")
+
+    def fail_on_slot(*args, **kwargs):
+        raise AssertionError("modo otimista não deve passar pela fila/advisory lock do usuário")
+
+    monkeypatch.setattr(pix_service, "user_send_slot", fail_on_slot)
+    _fund(session_factory, 6, "50.00")
+
+    # os dois envios leem a mesma version antes de qualquer UPDATE
+    real_read = wallet_balance_service._read_balance_version
+    barrier = threading.Barrier(2)
+    first_read = threading.local()
+
+    def read(db, uid):
+        current = real_read(db, uid)
+        if not getattr(first_read, "done", False):
+            first_read.done = True
+            barrier.wait(10)
+        return current
+
+    monkeypatch.setattr(wallet_balance_service, "_read_balance_version", read)
+    retried = WALLET_BALANCE_DEBIT_CONFLICTS_TOTAL.labels(outcome="retried")
+    before = retried._value.get()
+    errors = []
+
+    def worker(index):
+        db = session_factory()
+        try:
+            # sem Idempotency-Key: no sqlite o INSERT da key travaria o banco antes da leitura
+            send_pix(db, user_id=6, valor=Decimal("20.00"), chave_pix=f"{index}@pix")
+        except Exception as exc:  # pragma: no cover - falha aparece no assert
+            errors.append(exc)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert errors == []
+    # um UPDATE perdeu a version para o outro e foi refeito
+    assert retried._value.get() == before + 1
+    balance = _balance(session_factory, 6)
+    assert Decimal(balance.available) == Decimal("10.00")
+    assert balance.version == 1 + 2
@@ -0,0 +1,98 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from decimal import Decimal
+
+import pytest
+
+from app.models import User
+from app.models.pix_daily_rollup import PixDailyRollup
+from app.models.pix_ledger import PixLedger
+from app.models.wallet_balance import WalletBalance
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import (
+    apply_ledger_entry,
+    get_available_balance,
+    rebuild_wallet_balances,
+)
+
+
+def _credit(db, user_id, amount):
+    apply_ledger_entry(db, user_id=user_id, kind="credit", amount=Decimal(amount))
+    db.commit()
+
+
+def test_send_pix_debits_materialized_balance(db):
+    _credit(db, 7, "100.00")
+
+    tx = send_pix(db, user_id=7, valor=Decimal("30.55"), chave_pix="chave@pix")
+
+    balance = db.get(WalletBalance, 7)
+    assert tx.valor == Decimal("30.55")
+    assert balance.available == Decimal("69.45")
+    assert balance.version == 2
+    assert get_available_balance(db, 7) == Decimal("69.45")
+
+
+def test_send_pix_insufficient_balance_keeps_ledger_untouched(db):
+    _credit(db, 8, "10.00")
+
+    with pytest.raises(ValueError):
+        send_pix(db, user_id=8, valor=Decimal("10.01"), chave_pix="chave@pix")
+
+    db.rollback()
+    assert db.query(PixLedger).filter_by(user_id=8).count() == 1
+    assert get_available_balance(db, 8) == Decimal("10.00")
+
+
+def test_balance_row_is_materialized_from_existing_ledger(db):
+    db.add(PixLedger(user_id=9, kind="credit", amount=Decimal("50.00")))
+    db.add(PixLedger(user_id=9, kind="debit", amount=Decimal("20.00")))
+    db.commit()
+
+    assert db.get(WalletBalance, 9) is None
+    assert get_available_balance(db, 9) == Decimal("30.00")
+
+    send_pix(db, user_id=9, valor=Decimal("5.00"), chave_pix="chave@pix")
+
+    assert db.get(WalletBalance, 9).available == Decimal("25.00")
+
+
+def test_rebuild_recomputes_balances_in_chunks(db):
+    for user_id in (1, 2, 3):
+        db.add(PixLedger(user_id=user_id, kind="credit", amount=Decimal("10.00")))
+    db.add(PixLedger(user_id=2, kind="debit", amount=Decimal("4.00")))
+    db.add(WalletBalance(user_id=1, available=Decimal("999.00"), version=3))
+    db.add(WalletBalance(user_id=42, available=Decimal("5.00"), version=1))
+    db.commit()
+
+    result = rebuild_wallet_balances(db, chunk_size=1)
+
+    assert result == {"users": 3, "updated": 4}
+    assert db.get(WalletBalance, 1).available == Decimal("10.00")
+    assert db.get(WalletBalance, 1).version == 4
+    assert db.get(WalletBalance, 2).available == Decimal("6.00")
+    assert db.get(WalletBalance, 3).available == Decimal("10.00")
+    assert db.get(WalletBalance, 42).available == Decimal("0.00")
+
+
+def test_ledger_seed_materializes_balance_and_rollup(db, engine, memory_session_factory, monkeypatch):
+    from app.utils import ledger_seed
+
+    monkeypatch.setattr(ledger_seed, "engine", engine)
+    monkeypatch.setattr(ledger_seed, "SessionLocal", memory_session_factory)
+    monkeypatch.setenv("SEED_ADMIN_CREDIT", "1000")
+    db.add(User(username="admin", email="admin@local", hashed_password="x", role="admin"))
+    db.commit()
+    admin_id = db.query(User.id).filter(User.email == "admin@local").scalar()
+
+    first = ledger_seed.seed_ledger_from_users()
+    second = ledger_seed.seed_ledger_from_users()
+
+    assert first["users"] == 1
+    assert second["users"] == 0
+    assert get_available_balance(db, admin_id) == Decimal("1000.00")
+    assert db.get(WalletBalance, admin_id).available == Decimal("1000.00")
+    rollup = db.query(PixDailyRollup).filter_by(user_id=admin_id).one()
+    assert rollup.entradas == Decimal("1000.00")
@@ -0,0 +1,79 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import asyncio
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.api.v1.ai import chat_lab as chat_lab_module
+from app.api.v1.ai.chat_lab import ChatPayload, chat_lab, fetch_backend_data
+from app.api.v1.routes import ai_chat as ai_chat_module
+from app.api.v1.routes.ai_chat import ChatRequest, ai_chat
+from app.services.pix_service import send_pix
+from app.services.wallet_balance_service import apply_ledger_entry
+from app.services.wallet_read_service import WalletReadService
+
+
+def test_balance_and_history_read_in_process(db):
+    apply_ledger_entry(db, user_id=11, kind="credit", amount=Decimal("80.00"))
+    db.commit()
+    send_pix(db, user_id=11, valor=Decimal("12.50"), chave_pix="chave@pix", descricao="Mercado")
+
+    service = WalletReadService(db)
+    balance = service.get_balance(11)
+    history = service.get_history(11)
+
+    assert balance["saldo"] == 67.5
+    assert balance["saldo_atual"] == 67.5
+    assert balance["entradas_mes"] == 80.0
+    assert balance["saidas_mes"] == 12.5
+    assert len(balance["ultimos_7d"]) == 7
+    assert balance["source"] == "real"
+
+    assert len(history) == 1
+    assert history[0]["tipo"] == "saida"
+    assert history[0]["valor"] == 12.5
+    assert history[0]["criado_em"] is not None
+
+    assert service.get_history(99) == []
+
+
+def test_chat_lab_reads_wallet_without_http(db):
+    apply_ledger_entry(db, user_id=12, kind="credit", amount=Decimal("10.00"))
+    db.commit()
+
+    service = WalletReadService(db)
+
+    assert fetch_backend_data(service, 12, "saldo")["saldo_atual"] == 10.0
+    assert fetch_backend_data(service, 12, "historico") == {"historico": []}
+
+
+def _record_auth_thread(monkeypatch, module, user_id):
+    threads = []
+
+    def fake_current_user(request, db):
+        threads.append(threading.current_thread())
+        return SimpleNamespace(id=user_id)
+
+    monkeypatch.setattr(module, "get_current_user", fake_current_user)
+    return threads
+
+
+def test_chat_endpoints_resolve_user_off_the_event_loop(db, monkeypatch):
+    apply_ledger_entry(db, user_id=13, kind="credit", amount=Decimal("25.00"))
+    db.commit()
+    request = SimpleNamespace(state=SimpleNamespace(), headers={})
+
+    lab_threads = _record_auth_thread(monkeypatch, chat_lab_module, 13)
+    lab = asyncio.run(chat_lab(ChatPayload(message="qual meu saldo?"), request, db))
+
+    chat_threads = _record_auth_thread(monkeypatch, ai_chat_module, 13)
+    chat = asyncio.run(ai_chat(ChatRequest(message="resumo do mês"), request, db))
+
+    assert lab["intent"] == "saldo"
+    assert "25" in chat["reply"]
+    main = threading.main_thread()
+    assert lab_threads and chat_threads
+    assert all(thread is not main for thread in lab_threads + chat_threads)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from decimal import Decimal
@@ -10,6 +11,7 @@ from sqlalchemy.exc import IntegrityError
 
 from app.api.v1.routes import wallet as wallet_routes
 from app.partner import PixPaymentRequest, SandboxPartnerAdapter
+from app.models.wallet_webhook_event import WalletWebhookEvent
 from app.partner.asaas_payment_correlation import (
     build_asaas_payment_user_correlation_record,
 )
@@ -45,13 +47,53 @@ class FakeQuery:
         return rows
 
 
+class FakeEventQuery:
+    def __init__(self, db):
+        self.db = db
+        self.criteria = {}
+        self.row_limit = None
+
+    def filter_by(self, **kwargs):
+        self.criteria.update(kwargs)
+        return self
+
+    def filter(self, *_args, **_kwargs):
+        return self
+
+    def order_by(self, *_args, **_kwargs):
+        return self
+
+    def limit(self, value):
+        self.row_limit = int(value)
+        return self
+
+    def all(self):
+        rows = [
+            event
+            for event in reversed(self.db.events)
+            if all(
+                getattr(event, name) == value
+                for name, value in self.criteria.items()
+            )
+        ]
+        if self.row_limit is not None:
+            rows = rows[: self.row_limit]
+        return rows
+
+
 class FakeDb:
     def __init__(self):
         self.records = {}
         self.pending = None
         self.transaction_inserted_keys = []
+        self.events = []
+        self.pending_events = []
 
     def add(self, record):
+        if isinstance(record, WalletWebhookEvent):
+            self.pending_events.append(record)
+            return
+
         self.pending = record
 
     def flush(self):
@@ -65,17 +107,27 @@ class FakeDb:
 
     def rollback(self):
         self.pending = None
+        self.pending_events.clear()
         for key in self.transaction_inserted_keys:
             self.records.pop(key, None)
         self.transaction_inserted_keys.clear()
 
     def commit(self):
+        self.events.extend(self.pending_events)
+        self.pending_events.clear()
         self.transaction_inserted_keys.clear()
 
-    def query(self, _model):
+    def query(self, model):
+        if model is WalletWebhookEvent:
+            return FakeEventQuery(self)
+
         return FakeQuery(self)
 
 
+def _structured_statement(**kwargs):
+    return asyncio.run(wallet_routes.get_wallet_structured_statement(**kwargs))
+
+
 def _configure_sandbox(monkeypatch):
     adapter = SandboxPartnerAdapter()
 
@@ -103,10 +155,13 @@ def _configure_sandbox(monkeypatch):
         "handle_partner_wallet_webhook",
         adapter.handle_webhook,
     )
+    async def _empty_partner_statement(**_kwargs):
+        return []
+
     monkeypatch.setattr(
         wallet_routes,
-        "get_partner_wallet_statement",
-        lambda **_kwargs: [],
+        "aget_partner_wallet_statement",
+        _empty_partner_statement,
     )
 
 
@@ -157,7 +212,7 @@ def test_wallet_sandbox_end_to_end_payment_webhook_statement(monkeypatch):
         x_idempotency_key="e2e-webhook-001",
     )
 
-    statement = wallet_routes.get_wallet_structured_statement(
+    statement = _structured_statement(
         limit=50,
         current_user=user,
         db=db,
@@ -220,7 +275,7 @@ def test_sandbox_statement_does_not_mix_events_between_users(monkeypatch):
         x_idempotency_key="private-user-321-event",
     )
 
-    second_statement = wallet_routes.get_wallet_structured_statement(
+    second_statement = _structured_statement(
         limit=50,
         current_user=second_user,
         db=db,
@@ -284,14 +339,14 @@ def test_asaas_correlated_payment_received_projects_once_to_statement(
     )
 
     owner_statement = (
-        wallet_routes.get_wallet_structured_statement(
+        _structured_statement(
             limit=50,
             current_user=owner,
             db=db,
         )
     )
     other_statement = (
-        wallet_routes.get_wallet_structured_statement(
+        _structured_statement(
             limit=50,
             current_user=other_user,
             db=db,
@@ -400,7 +455,7 @@ def test_asaas_unresolved_or_amountless_event_is_not_projected(
         asaas_access_token="secret-token",
     )
 
-    statement = wallet_routes.get_wallet_structured_statement(
+    statement = _structured_statement(
         limit=50,
         current_user=user,
         db=db,